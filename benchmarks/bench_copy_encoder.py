@@ -0,0 +1,88 @@
+"""
+Rows/s of the COPY payload encoders on a synthetic mixed-dtype DataFrame.
+
+Compares the previous per-cell ``apply`` + ``to_csv`` path used by uploads,
+the ``to_csv`` round trip used by filtering/dedupe, and the vectorized
+``helpers.copy_encoder.frame_to_copy_text`` / ``frame_to_copy_binary``.
+No database is needed:
+
+    python benchmarks/bench_copy_encoder.py --rows 200000
+"""
+import argparse
+import os
+import sys
+import time
+from io import StringIO
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from helpers.copy_encoder import frame_to_copy_binary, frame_to_copy_text  # noqa: E402
+
+
+def make_frame(rows):
+    rng = np.random.default_rng(0)
+    floats = rng.normal(size=rows)
+    floats[rng.random(rows) < 0.1] = np.nan
+    return pd.DataFrame({
+        "int_col": rng.integers(0, 1_000_000, size=rows),
+        "float_col": floats,
+        "bool_col": rng.random(rows) < 0.5,
+        "date_col": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 10_000, size=rows), unit="h"),
+        "text_col": pd.Series(rng.integers(0, 5000, size=rows)).map(lambda i: f"customer {i}\tnote"),
+    })
+
+
+def legacy_upload_encoder(df):
+    output = StringIO()
+    df_copy = df.copy()
+    for col in df_copy.columns:
+        df_copy[col] = df_copy[col].apply(
+            lambda x: None if pd.isna(x)
+            else x.strftime('%Y-%m-%d %H:%M:%S') if isinstance(x, pd.Timestamp)
+            else str(x)
+        )
+    df_copy.to_csv(output, index=False, header=False, sep=',', na_rep='\\N')
+    return output.getvalue()
+
+
+def legacy_to_csv_encoder(df):
+    output = StringIO()
+    df.to_csv(output, index=False, header=False)
+    return output.getvalue()
+
+
+def bench(name, func, df, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(df)
+        best = min(best, time.perf_counter() - start)
+    print(f"{name:<28} {best * 1000:10.1f} ms   {len(df) / best:14,.0f} rows/s")
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = make_frame(args.rows)
+    print(f"{args.rows:,} rows x {df.shape[1]} columns")
+    legacy = bench("upload apply + to_csv", legacy_upload_encoder, df, args.repeat)
+    bench("filter/dedupe to_csv", legacy_to_csv_encoder, df, args.repeat)
+    vectorized = bench("copy_encoder text", frame_to_copy_text, df, args.repeat)
+    print(f"speedup vs upload path: {legacy / vectorized:.1f}x")
+
+    sql_types = {"int_col": "BIGINT", "float_col": "DOUBLE PRECISION", "bool_col": "BOOLEAN",
+                 "date_col": "TIMESTAMP", "text_col": "TEXT"}
+    bench("copy_encoder binary", lambda frame: frame_to_copy_binary(frame, sql_types), df, args.repeat)
+    numeric = df[["int_col", "bool_col", "date_col"]]
+    bench("binary, fixed-width only", lambda frame: frame_to_copy_binary(frame, sql_types), numeric, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
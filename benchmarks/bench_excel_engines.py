@@ -0,0 +1,104 @@
+"""
+Parse time and peak memory of the Excel reader engines in
+``helpers.excel_engine`` on synthetic workbooks.
+
+Each (engine, size) pair runs in a fresh process so the reported peak RSS
+belongs to that parse alone; it includes memory allocated in Rust by
+python-calamine, which tracemalloc would not see. Workbooks are generated
+once with openpyxl's write-only mode and cached in --dir:
+
+    python benchmarks/bench_excel_engines.py --rows 10000 100000 1000000
+
+"iter_rows" walks every row the way the streaming upload path does,
+"read_frame" loads the whole sheet into a DataFrame like the pandas path.
+"""
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from multiprocessing import get_context
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+ENGINES = ('openpyxl', 'calamine', 'xlsx_stream')
+
+
+def make_workbook(path, rows):
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('data')
+    sheet.append(['id', 'name', 'amount', 'ratio', 'created', 'active'])
+    start = datetime(2024, 1, 1)
+    for i in range(rows):
+        sheet.append([i, f"customer {i % 5000}", (i * 37) % 100000, (i % 1000) / 7.0,
+                      start + timedelta(minutes=i), i % 2 == 0])
+    workbook.save(path)
+
+
+def _peak_rss_mb():
+    # ru_maxrss is KiB on Linux and bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _run(path, engine_name, mode, queue):
+    from helpers.excel_engine import get_engine
+
+    engine = get_engine(engine_name)
+    if engine.name != engine_name:
+        queue.put(None)
+        return
+    baseline = _peak_rss_mb()
+    start = time.perf_counter()
+    if mode == 'iter_rows':
+        count = sum(1 for _ in engine.iter_rows(path, 'data'))
+    else:
+        count = len(engine.read_frame(path, 'data'))
+    elapsed = time.perf_counter() - start
+    queue.put((elapsed, _peak_rss_mb() - baseline, count))
+
+
+def measure(path, engine_name, mode):
+    context = get_context('spawn')
+    queue = context.Queue()
+    process = context.Process(target=_run, args=(path, engine_name, mode, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--engines', nargs='+', default=list(ENGINES), choices=ENGINES)
+    parser.add_argument('--modes', nargs='+', default=['iter_rows', 'read_frame'],
+                        choices=['iter_rows', 'read_frame'])
+    parser.add_argument('--dir', default=os.path.join(tempfile.gettempdir(), 'eda_bench_workbooks'))
+    args = parser.parse_args()
+
+    os.makedirs(args.dir, exist_ok=True)
+    print(f"{'rows':>10} {'mode':<11} {'engine':<12} {'seconds':>9} {'rows/s':>12} {'peak MB':>9}")
+    for rows in args.rows:
+        path = os.path.join(args.dir, f"bench_{rows}.xlsx")
+        if not os.path.exists(path):
+            start = time.perf_counter()
+            make_workbook(path, rows)
+            print(f"# generated {path} ({os.path.getsize(path) / 1e6:.1f} MB) in {time.perf_counter() - start:.1f}s")
+
+        for mode in args.modes:
+            for engine_name in args.engines:
+                result = measure(path, engine_name, mode)
+                if result is None:
+                    print(f"{rows:>10,} {mode:<11} {engine_name:<12} {'not installed':>9}")
+                    continue
+                elapsed, peak_mb, count = result
+                print(f"{rows:>10,} {mode:<11} {engine_name:<12} {elapsed:9.2f} {count / elapsed:12,.0f} {peak_mb:9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Concurrent /data page latency while a heavy /stats call runs.
+
+Run against a live server (gunicorn with the gevent worker), once with
+DB_COOPERATIVE_IO=off and once with the default, and compare the
+"during /stats" percentiles:
+
+    python benchmarks/bench_gevent_io.py --url http://localhost:8000 \
+        --token <jwt> --table sales_sheet1 --concurrency 8
+"""
+import argparse
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(pct / 100.0 * (len(values) - 1))))
+    return values[index]
+
+
+def page_worker(session, args, stop, latencies):
+    params = {"Filename": args.table, "sheetName": "bench", "page": 0, "pageSize": args.page_size}
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = session.get(f"{args.url}/data", params=params, timeout=args.timeout)
+        latencies.append((time.perf_counter() - start) * 1000)
+        response.raise_for_status()
+
+
+def run_phase(args, headers, with_stats):
+    stop = threading.Event()
+    latencies = []
+    stats_elapsed = None
+
+    with ThreadPoolExecutor(max_workers=args.concurrency + 1) as pool:
+        sessions = []
+        for _ in range(args.concurrency):
+            session = requests.Session()
+            session.headers.update(headers)
+            sessions.append(session)
+            pool.submit(page_worker, session, args, stop, latencies)
+
+        if with_stats:
+            start = time.perf_counter()
+            response = requests.get(
+                f"{args.url}/stats",
+                params={"Filename": args.table, "sheet_name": "bench"},
+                headers=headers,
+                timeout=args.timeout,
+            )
+            stats_elapsed = time.perf_counter() - start
+            response.raise_for_status()
+        else:
+            time.sleep(args.duration)
+        stop.set()
+
+    return latencies, stats_elapsed
+
+
+def report(label, latencies, stats_elapsed=None):
+    print(f"{label}: {len(latencies)} /data requests")
+    if latencies:
+        print(f"  p50 {percentile(latencies, 50):8.1f} ms   p95 {percentile(latencies, 95):8.1f} ms   "
+              f"max {max(latencies):8.1f} ms   mean {statistics.mean(latencies):8.1f} ms")
+    if stats_elapsed is not None:
+        print(f"  /stats took {stats_elapsed:.2f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--token", required=True)
+    parser.add_argument("--table", required=True, help="table with enough rows to make /stats slow")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10.0, help="baseline phase length in seconds")
+    parser.add_argument("--timeout", type=float, default=300.0)
+    args = parser.parse_args()
+
+    headers = {"Authorization": f"Bearer {args.token}"}
+
+    latencies, _ = run_phase(args, headers, with_stats=False)
+    report("baseline", latencies)
+
+    latencies, stats_elapsed = run_phase(args, headers, with_stats=True)
+    report("during /stats", latencies, stats_elapsed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Payload size and server-side build + encode time of a table page in the
+current row-dict shape against ``format=columnar``.
+
+Rows are synthetic cursor tuples (ints, floats, text, timestamps, NULLs),
+shaped like a wide working copy; each shape is built from them the way
+``Gets_Data`` does and encoded with Flask's JSON provider, as ``jsonify``
+would. No database or server is needed:
+
+    python benchmarks/bench_response_format.py --rows 10000 --cols 50
+
+"bytes" is the encoded body, "gzip" what a compressing proxy would send.
+"""
+import argparse
+import gzip
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from flask import Flask
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from helpers.keyset import to_columnar  # noqa: E402
+
+
+def make_rows(rows, cols):
+    rng = random.Random(0)
+    start = datetime(2024, 1, 1)
+    makers = [
+        lambda i: rng.randint(0, 1_000_000),
+        lambda i: None if rng.random() < 0.1 else round(rng.gauss(0, 1000), 4),
+        lambda i: f"customer {rng.randint(0, 5000)}",
+        lambda i: start + timedelta(minutes=i),
+    ]
+    columns = [f"column_{j:02d}_{('amount', 'score', 'name', 'created')[j % 4]}" for j in range(cols)]
+    data = [tuple(makers[j % 4](i) for j in range(cols)) for i in range(rows)]
+    return columns, data
+
+
+def row_dicts(columns, data):
+    # Same loop as Gets_Data's default shape
+    result = []
+    for row in data:
+        row_dict = {}
+        for i, col in enumerate(columns):
+            row_dict[col] = row[i]
+        result.append(row_dict)
+    return result
+
+
+def columnar(columns, data):
+    return {"columns": columns, "types": ["text"] * len(columns), "data": to_columnar(data, len(columns))}
+
+
+def measure(app, build, columns, data, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = app.json.dumps(build(columns, data)).encode()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, len(body), len(gzip.compress(body, 6))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10_000, 100_000])
+    parser.add_argument('--cols', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=3, help="runs per shape, best time is reported")
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    print(f"{'rows':>8} {'cols':>5} {'shape':<9} {'encode ms':>10} {'bytes':>13} {'gzip':>12}")
+    for rows in args.rows:
+        columns, data = make_rows(rows, args.cols)
+        for label, build in (('rows', row_dicts), ('columnar', columnar)):
+            elapsed, size, zipped = measure(app, build, columns, data, args.repeat)
+            print(f"{rows:>8,} {args.cols:>5} {label:<9} {elapsed * 1000:10.1f} {size:13,} {zipped:12,}")
+
+
+if __name__ == '__main__':
+    main()
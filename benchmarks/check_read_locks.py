@@ -0,0 +1,108 @@
+"""
+Check that the read endpoints never block each other on one table.
+
+Runs /data pages and /stats calls in parallel against a live server while
+a separate connection (DB_* settings from .env, as the app uses) samples
+pg_locks for that table. Any lock request that has to wait, or any
+ACCESS EXCLUSIVE lock, fails the check with exit status 1:
+
+    python benchmarks/check_read_locks.py --url http://localhost:8000 \
+        --token <jwt> --table sales_sheet1_copy --concurrency 8 --duration 10
+
+Use a working copy (``*_copy``) that still has its ``id`` column: that is
+the case in which the GET helpers used to run ALTER TABLE ... DROP COLUMN.
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import psycopg2
+import requests
+from dotenv import load_dotenv
+
+_LOCKS_QUERY = """
+    SELECT l.pid, l.mode, l.granted, left(a.query, 120)
+    FROM pg_catalog.pg_locks l
+    LEFT JOIN pg_catalog.pg_stat_activity a ON a.pid = l.pid
+    WHERE l.relation = to_regclass(%s)
+      AND (NOT l.granted OR l.mode = 'AccessExclusiveLock');
+"""
+
+
+def request_worker(session, url, params, args, stop, results):
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = session.get(url, params=params, timeout=args.timeout)
+        results.append((url.rsplit('/', 1)[-1], response.status_code, (time.perf_counter() - start) * 1000))
+
+
+def lock_monitor(args, stop, conflicts):
+    load_dotenv()
+    conn = psycopg2.connect(host=os.getenv('DB_HOST'), user=os.getenv('DB_USER'),
+                            password=os.getenv('DB_PASSWORD'), dbname=os.getenv('DB_NAME'))
+    conn.autocommit = True
+    samples = 0
+    try:
+        with conn.cursor() as cursor:
+            while not stop.is_set():
+                cursor.execute(_LOCKS_QUERY, (f'"{args.table}"',))
+                conflicts.extend(cursor.fetchall())
+                samples += 1
+                time.sleep(args.interval)
+    finally:
+        conn.close()
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--token", required=True)
+    parser.add_argument("--table", required=True)
+    parser.add_argument("--concurrency", type=int, default=8, help="threads per endpoint")
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--interval", type=float, default=0.01, help="seconds between pg_locks samples")
+    parser.add_argument("--timeout", type=float, default=300.0)
+    args = parser.parse_args()
+
+    headers = {"Authorization": f"Bearer {args.token}"}
+    endpoints = [
+        (f"{args.url}/data", {"Filename": args.table, "sheetName": "check", "page": 0, "pageSize": args.page_size}),
+        (f"{args.url}/stats", {"Filename": args.table, "sheet_name": "check"}),
+    ]
+
+    stop = threading.Event()
+    results = []
+    conflicts = []
+    with ThreadPoolExecutor(max_workers=2 * args.concurrency + 1) as pool:
+        monitor = pool.submit(lock_monitor, args, stop, conflicts)
+        for url, params in endpoints:
+            for _ in range(args.concurrency):
+                session = requests.Session()
+                session.headers.update(headers)
+                pool.submit(request_worker, session, url, params, args, stop, results)
+        time.sleep(args.duration)
+        stop.set()
+        samples = monitor.result()
+
+    failed = [result for result in results if result[1] != 200]
+    for endpoint in ('data', 'stats'):
+        latencies = sorted(ms for name, _, ms in results if name == endpoint)
+        if latencies:
+            print(f"/{endpoint}: {len(latencies)} requests, p50 {latencies[len(latencies) // 2]:.1f} ms, "
+                  f"max {latencies[-1]:.1f} ms")
+    print(f"pg_locks samples: {samples}, waiting or exclusive locks seen: {len(conflicts)}")
+    for pid, mode, granted, query in conflicts[:20]:
+        print(f"  pid {pid} {mode} {'granted' if granted else 'WAITING'}: {query}")
+    if failed:
+        print(f"{len(failed)} requests failed, e.g. /{failed[0][0]} -> {failed[0][1]}")
+
+    sys.exit(1 if conflicts or failed else 0)
+
+
+if __name__ == "__main__":
+    main()
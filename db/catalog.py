@@ -0,0 +1,232 @@
+# schema_catalog
+
+import os
+import time
+import logging
+import threading
+
+import psycopg2
+
+from db import session
+
+logger = logging.getLogger(__name__)
+
+# Invalidations are broadcast to every worker with NOTIFY on this channel;
+# the TTL bounds staleness for anything a notification misses (listener
+# connection down, DDL outside the app).
+CATALOG_TTL = float(os.getenv('SCHEMA_CATALOG_TTL', 30))
+CATALOG_CHANNEL = 'schema_catalog'
+# Seconds between attempts to reopen a lost listener connection.
+_LISTEN_RETRY = 5.0
+
+_CATALOG_QUERY = """
+    SELECT c.relname,
+           c.relkind,
+           c.relpersistence,
+           a.attname,
+           pg_catalog.format_type(a.atttypid, NULL) AS data_type,
+           t.typname AS udt_name
+    FROM pg_catalog.pg_class c
+    LEFT JOIN pg_catalog.pg_attribute a
+           ON a.attrelid = c.oid AND a.attnum > 0 AND NOT a.attisdropped
+    LEFT JOIN pg_catalog.pg_type t ON t.oid = a.atttypid
+    WHERE c.relname = ANY(%s)
+      AND c.relkind IN ('r', 'p', 'v', 'm', 'f')
+      AND pg_catalog.pg_table_is_visible(c.oid)
+    ORDER BY c.relname, a.attnum;
+"""
+
+
+class TableInfo:
+    """Existence, kind and ordered columns of one table or view."""
+
+    def __init__(self, name, kind, persistence, columns):
+        self.name = name
+        self.kind = kind                # pg_class.relkind: 'r' table, 'v' view, ...
+        self.persistence = persistence  # pg_class.relpersistence: 'p', 'u' or 't'
+        self.columns = columns          # [(column_name, data_type, udt_name)]
+
+    @property
+    def is_view(self):
+        return self.kind == 'v'
+
+    @property
+    def is_unlogged(self):
+        return self.persistence == 'u'
+
+    def column_names(self, include_id=True):
+        return [col[0] for col in self.columns if include_id or col[0] != 'id']
+
+    def column_types(self, include_id=True):
+        """Map column name to its information_schema-style data type."""
+        return {col[0]: col[1] for col in self.columns if include_id or col[0] != 'id'}
+
+    def udt_types(self, include_id=True):
+        """Map column name to its udt name (int4, float8, text, ...)."""
+        return {col[0]: col[2] for col in self.columns if include_id or col[0] != 'id'}
+
+    def has_column(self, column):
+        return any(col[0] == column for col in self.columns)
+
+
+class SchemaCatalog:
+    """In-process cache of table metadata loaded from pg_catalog."""
+
+    def __init__(self, ttl=CATALOG_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = {}  # table_name -> (TableInfo, loaded_at); missing tables are not cached
+        self._listener = None
+        self._listener_pid = None
+        self._listen_failed_at = None
+
+    def _cached(self, table_name, now):
+        entry = self._entries.get(table_name)
+        if entry is None or now - entry[1] > self.ttl:
+            return False, None
+        return True, entry[0]
+
+    def _load(self, cursor, table_names):
+        cursor.execute(_CATALOG_QUERY, (list(table_names),))
+        found = {}
+        for relname, relkind, relpersistence, attname, data_type, udt_name in cursor.fetchall():
+            info = found.get(relname)
+            if info is None:
+                info = found[relname] = TableInfo(relname, relkind, relpersistence, [])
+            if attname is not None:
+                info.columns.append((attname, data_type, udt_name))
+
+        # A table that does not exist yet is looked up again next time, so a
+        # fresh upload from another worker is visible right away.
+        now = time.monotonic()
+        with self._lock:
+            for table_name, info in found.items():
+                self._entries[table_name] = (info, now)
+        return found
+
+    def _connect_listener(self):
+        from db.config import DB_CONFIG
+        conn = psycopg2.connect(**DB_CONFIG)
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            cursor.execute(f'LISTEN "{CATALOG_CHANNEL}";')
+        return conn
+
+    def _close_listener(self):
+        listener, self._listener = self._listener, None
+        if listener is not None and self._listener_pid == os.getpid():
+            try:
+                listener.close()
+            except Exception:
+                pass
+
+    def _receive_invalidations(self):
+        """
+        Drop entries other workers announced as changed. Reads whatever
+        notifications are pending without waiting. While the listener is
+        down, entries only expire with the TTL; everything is dropped when
+        it is back, since notifications may have been missed meanwhile.
+        """
+        with self._lock:
+            if self._listener_pid != os.getpid():
+                # Never share the parent's listener socket after a fork.
+                self._listener = None
+                self._listener_pid = os.getpid()
+            listener = self._listener
+            if listener is None:
+                now = time.monotonic()
+                if self._listen_failed_at is not None and now - self._listen_failed_at < _LISTEN_RETRY:
+                    return
+                try:
+                    listener = self._listener = self._connect_listener()
+                    self._listen_failed_at = None
+                except Exception as e:
+                    self._listen_failed_at = now
+                    logger.warning(f"Schema catalog listener unavailable, relying on the TTL: {str(e)}")
+                    return
+                self._entries.clear()
+
+            try:
+                listener.poll()
+                notifies = list(listener.notifies)
+                del listener.notifies[:]
+            except Exception as e:
+                logger.warning(f"Schema catalog listener lost: {str(e)}")
+                self._close_listener()
+                self._entries.clear()
+                return
+
+            for notify in notifies:
+                self._entries.pop(notify.payload, None)
+
+    def _announce(self, table_names):
+        """
+        NOTIFY the other workers. Inside a request the notification is
+        sent on the request's connection, so it is delivered on commit and
+        dropped on rollback, when nothing changed.
+        """
+        current = session.current_session()
+        try:
+            if current is not None:
+                cursor = current.conn.cursor()
+            else:
+                with self._lock:
+                    if self._listener is None or self._listener_pid != os.getpid():
+                        return
+                    cursor = self._listener.cursor()
+            with cursor:
+                for table_name in table_names:
+                    cursor.execute("SELECT pg_notify(%s, %s);", (CATALOG_CHANNEL, table_name))
+        except Exception as e:
+            # An aborted request transaction is rolled back, DDL included.
+            logger.debug(f"Could not announce catalog invalidation: {str(e)}")
+
+    def find(self, cursor, candidates):
+        """Return the TableInfo of the first existing candidate name, or None."""
+        self._receive_invalidations()
+        now = time.monotonic()
+        results = {}
+        missing = []
+        with self._lock:
+            for name in candidates:
+                hit, info = self._cached(name, now)
+                if hit:
+                    results[name] = info
+                else:
+                    missing.append(name)
+
+        if missing:
+            results.update(self._load(cursor, missing))
+
+        for name in candidates:
+            if results.get(name) is not None:
+                return results[name]
+        return None
+
+    def describe(self, cursor, table_name):
+        """Return the TableInfo for ``table_name``, or None if it does not exist."""
+        return self.find(cursor, [table_name])
+
+    def invalidate(self, *table_names):
+        """
+        Forget cached entries after DDL on them, here and in every other
+        worker (see ``_announce``).
+
+        Inside a request the entries are dropped again when the request
+        transaction ends, so nothing loaded from uncommitted state survives.
+        """
+        self._drop(table_names)
+        self._announce(table_names)
+        session.on_transaction_end(lambda: self._drop(table_names))
+
+    def _drop(self, table_names):
+        with self._lock:
+            for table_name in table_names:
+                self._entries.pop(table_name, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+catalog = SchemaCatalog()
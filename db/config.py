@@ -1,47 +1,129 @@
-
 import psycopg2
 import pandas as pd
 from io import BytesIO,StringIO
 import numpy as np
 from dotenv import load_dotenv
+from contextlib import contextmanager
+import logging
 import os
 
+from db.pool import ConnectionPool
+from db import session
+from db.green import enable_cooperative_io
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 DB_CONFIG = {
     'host': os.getenv('DB_HOST'),
     'user': os.getenv('DB_USER'),
     'password': os.getenv('DB_PASSWORD'),
-    'dbname': os.getenv('DB_NAME')  
+    'dbname': os.getenv('DB_NAME')
 }
 
+POOL_CONFIG = {
+    'minconn': int(os.getenv('DB_POOL_MIN', 2)),
+    'maxconn': int(os.getenv('DB_POOL_MAX', 10)),
+    'timeout': float(os.getenv('DB_POOL_TIMEOUT', 30)),
+    'max_idle': float(os.getenv('DB_POOL_MAX_IDLE', 300)),
+    'max_lifetime': float(os.getenv('DB_POOL_MAX_LIFETIME', 3600)),
+    'health_check_after': float(os.getenv('DB_POOL_HEALTH_CHECK_AFTER', 30)),
+}
+
+# Under gunicorn's gevent worker this module is imported after monkey
+# patching, so queries yield to other greenlets instead of blocking the hub.
+COOPERATIVE_IO = enable_cooperative_io()
+
+_pool = None
+# Pools inherited across a fork are kept referenced, never closed: closing
+# them would terminate the parent's server sessions over the shared sockets.
+_inherited_pools = []
+
+
+def get_pool():
+    """Return this process's connection pool, creating it after a fork."""
+    global _pool
+    if _pool is None or _pool.pid != os.getpid():
+        if _pool is not None:
+            _inherited_pools.append(_pool)
+        _pool = ConnectionPool(DB_CONFIG, **POOL_CONFIG)
+    return _pool
+
+
 class Database:
     def __init__(self):
         self.config = DB_CONFIG
+        self.pool = get_pool()
 
     def get_db_connection(self):
+        """
+        Return the request's shared connection inside a Flask request, or a
+        pooled connection of its own outside one (startup, background jobs).
+        """
         try:
-             
-            conn = psycopg2.connect(**self.config)
-            print("✅ Database connection established.")  # ADD THIS
+            conn = session.get_session_connection(self.pool)
+            if conn is None:
+                conn = self.pool.getconn()
             return conn
         except Exception as e:
             print(f"❌ Database connection failed: {e}")  # ADD THIS
             return None
 
+    @contextmanager
+    def connection(self):
+        """Check out a dedicated pooled connection, bypassing the request session."""
+        conn = self.pool.getconn()
+        session.count_connection_opened()
+        try:
+            yield conn
+        except Exception:
+            if not conn.closed:
+                conn.rollback()
+            raise
+        finally:
+            self.pool.putconn(conn)
+
+    def warm_pool(self):
+        """Pre-open the minimum number of pooled connections."""
+        try:
+            self.pool.warm()
+            logger.info(f"Database pool warmed: {self.pool.stats()}")
+        except Exception as e:
+            logger.warning(f"Could not warm database pool: {e}")
+
+    def pool_stats(self):
+        stats = self.pool.stats()
+        stats['cooperative_io'] = COOPERATIVE_IO
+        return stats
+
+    def commit(self, conn):
+        """
+        Commit, or defer to the end of the request for the shared connection.
+
+        A deferred commit is not a checkpoint: a later ``rollback`` on the
+        same connection, or an error response, also undoes everything the
+        request wrote before it. Helpers that must keep earlier work when a
+        later step fails should use a SAVEPOINT or ``connection()``.
+        """
+        if conn and not session.is_session_connection(conn):
+            conn.commit()
+
+    def rollback(self, conn):
+        if conn and not conn.closed:
+            conn.rollback()
+
     def close_connection(self, conn):
-        if conn:
-            conn.close()
-            
+        if conn and not session.is_session_connection(conn):
+            self.pool.putconn(conn)
+
     def handle_error(self, conn, error):
-        if conn:
-            conn.rollback()
+        self.rollback(conn)
         return None, str(error)
-    
+
     def close_cursor_and_connection(self, cursor, conn):
-        """Safely close both cursor and connection."""
-        if cursor:
+        """Safely close the cursor and release the connection."""
+        if cursor and not cursor.closed:
             cursor.close()
-        if conn:
-            conn.close()
-            
+        self.close_connection(conn)
+
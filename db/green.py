@@ -0,0 +1,66 @@
+# gevent_cooperative_db_io
+
+import os
+import logging
+
+import psycopg2
+from psycopg2 import extensions
+
+logger = logging.getLogger(__name__)
+
+
+def gevent_wait_callback(conn, timeout=None):
+    """
+    psycopg2 wait callback that yields to the gevent hub while the server works.
+
+    If the waiting greenlet is killed or times out, the running statement is
+    cancelled server-side so the connection can go back to the pool.
+    """
+    from gevent.socket import wait_read, wait_write
+
+    while True:
+        try:
+            state = conn.poll()
+            if state == extensions.POLL_OK:
+                break
+            elif state == extensions.POLL_READ:
+                wait_read(conn.fileno(), timeout=timeout)
+            elif state == extensions.POLL_WRITE:
+                wait_write(conn.fileno(), timeout=timeout)
+            else:
+                raise psycopg2.OperationalError(f"Bad result from poll: {state}")
+        except psycopg2.Error:
+            raise
+        except BaseException:
+            try:
+                conn.cancel()
+            except Exception:
+                pass
+            raise
+
+
+def gevent_is_active():
+    """True when gevent has monkey-patched sockets (e.g. gunicorn gevent workers)."""
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched('socket')
+
+
+def enable_cooperative_io(mode=None):
+    """
+    Install the gevent wait callback according to ``DB_COOPERATIVE_IO``.
+
+    ``auto`` (default) enables it only when gevent is active, ``on`` forces
+    it and ``off`` keeps psycopg2's blocking I/O.
+    """
+    mode = (mode or os.getenv('DB_COOPERATIVE_IO', 'auto')).lower()
+    if mode == 'off':
+        return False
+    if mode == 'auto' and not gevent_is_active():
+        return False
+
+    extensions.set_wait_callback(gevent_wait_callback)
+    logger.info("psycopg2 gevent wait callback installed (cooperative DB I/O)")
+    return True
@@ -0,0 +1,239 @@
+# db_connection_pool
+
+import os
+import time
+import logging
+import threading
+
+import psycopg2
+from psycopg2 import extensions
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection could be checked out before the timeout."""
+
+
+class ConnectionPool:
+    """
+    Bounded, thread/greenlet-safe pool of psycopg2 connections.
+
+    Connections are handed out LIFO so the warmest ones are reused first.
+    A connection is health-checked on checkout when it has been idle for
+    longer than ``health_check_after`` seconds, closed when it is older
+    than ``max_lifetime`` seconds, and idle connections above ``minconn``
+    are reaped after ``max_idle`` seconds.
+    """
+
+    def __init__(self, config, minconn=2, maxconn=10, timeout=30.0,
+                 max_idle=300.0, max_lifetime=3600.0, health_check_after=30.0):
+        self.config = config
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self.health_check_after = health_check_after
+        self.pid = os.getpid()
+
+        self._cond = threading.Condition()
+        self._idle = []        # [(conn, created_at, last_used)]
+        self._idle_ids = set() # id(conn) of every connection in _idle
+        self._in_use = {}      # id(conn) -> created_at
+        self._size = 0
+        self._waiters = 0
+        self._stats = {
+            "checkouts": 0,
+            "timeouts": 0,
+            "checkout_time_total": 0.0,
+            "checkout_time_max": 0.0,
+            "connections_opened": 0,
+            "connections_closed": 0,
+            "health_check_failures": 0,
+        }
+
+    def _connect(self):
+        conn = psycopg2.connect(**self.config)
+        with self._cond:
+            self._stats["connections_opened"] += 1
+        return conn
+
+    def _close(self, conn):
+        try:
+            if not conn.closed:
+                conn.close()
+        except Exception as e:
+            logger.warning(f"Error closing pooled connection: {str(e)}")
+        with self._cond:
+            self._stats["connections_closed"] += 1
+
+    def _is_healthy(self, conn):
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1;")
+            cursor.close()
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def warm(self):
+        """Open connections until ``minconn`` are idle in the pool."""
+        while True:
+            with self._cond:
+                if self._size >= self.minconn:
+                    return
+                self._size += 1
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+            now = time.monotonic()
+            with self._cond:
+                self._idle.append((conn, now, now))
+                self._idle_ids.add(id(conn))
+                self._cond.notify()
+
+    def getconn(self):
+        """Check out a connection, waiting up to ``timeout`` seconds."""
+        start = time.monotonic()
+        deadline = start + self.timeout
+
+        while True:
+            candidate = None
+            with self._cond:
+                while True:
+                    if self._idle:
+                        candidate = self._idle.pop()
+                        self._idle_ids.discard(id(candidate[0]))
+                        break
+                    if self._size < self.maxconn:
+                        self._size += 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise PoolTimeout(
+                            f"Timed out after {self.timeout}s waiting for a database connection "
+                            f"(pool size {self.maxconn})"
+                        )
+                    self._waiters += 1
+                    try:
+                        self._cond.wait(remaining)
+                    finally:
+                        self._waiters -= 1
+
+            now = time.monotonic()
+            if candidate is None:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+                created_at = now
+            else:
+                conn, created_at, last_used = candidate
+                if conn.closed or now - created_at > self.max_lifetime:
+                    self._discard(conn)
+                    continue
+                if now - last_used > self.health_check_after and not self._is_healthy(conn):
+                    with self._cond:
+                        self._stats["health_check_failures"] += 1
+                    self._discard(conn)
+                    continue
+
+            waited = time.monotonic() - start
+            with self._cond:
+                self._in_use[id(conn)] = created_at
+                self._stats["checkouts"] += 1
+                self._stats["checkout_time_total"] += waited
+                self._stats["checkout_time_max"] = max(self._stats["checkout_time_max"], waited)
+            return conn
+
+    def putconn(self, conn, discard=False):
+        """Return a connection to the pool, rolling back any open transaction."""
+        with self._cond:
+            created_at = self._in_use.pop(id(conn), None)
+            already_idle = created_at is None and id(conn) in self._idle_ids
+
+        if already_idle:
+            # Returned twice: it is idle (or about to be checked out again by
+            # someone else), so leave it alone.
+            logger.warning("Connection returned to the pool twice; ignoring the second return")
+            return
+        if created_at is None:
+            # Not ours; never put it in the idle list.
+            if not conn.closed:
+                self._close(conn)
+            return
+
+        now = time.monotonic()
+        if not discard and not conn.closed:
+            status = conn.info.transaction_status
+            if status != extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    conn.rollback()
+                except Exception:
+                    discard = True
+        if discard or conn.closed or now - created_at > self.max_lifetime:
+            self._discard(conn)
+            return
+
+        with self._cond:
+            self._idle.append((conn, created_at, now))
+            self._idle_ids.add(id(conn))
+            self._cond.notify()
+        self._reap_idle()
+
+    def _discard(self, conn):
+        self._close(conn)
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def _reap_idle(self):
+        """Close connections above ``minconn`` that have been idle too long."""
+        now = time.monotonic()
+        expired = []
+        with self._cond:
+            # Oldest idle connections sit at the front of the LIFO list.
+            while (self._idle and self._size - len(expired) > self.minconn
+                   and now - self._idle[0][2] > self.max_idle):
+                expired.append(self._idle.pop(0)[0])
+                self._idle_ids.discard(id(expired[-1]))
+        for conn in expired:
+            self._discard(conn)
+
+    def closeall(self):
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._idle_ids.clear()
+        for conn, _, _ in idle:
+            self._discard(conn)
+
+    def stats(self):
+        """Return a snapshot of pool usage for sizing and monitoring."""
+        with self._cond:
+            checkouts = self._stats["checkouts"]
+            return {
+                "pid": self.pid,
+                "minconn": self.minconn,
+                "maxconn": self.maxconn,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": len(self._in_use),
+                "waiters": self._waiters,
+                "checkouts": checkouts,
+                "timeouts": self._stats["timeouts"],
+                "avg_checkout_ms": round(self._stats["checkout_time_total"] / checkouts * 1000, 3) if checkouts else 0.0,
+                "max_checkout_ms": round(self._stats["checkout_time_max"] * 1000, 3),
+                "connections_opened": self._stats["connections_opened"],
+                "connections_closed": self._stats["connections_closed"],
+                "health_check_failures": self._stats["health_check_failures"],
+            }
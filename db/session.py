@@ -0,0 +1,116 @@
+# request_scoped_db_session
+
+import logging
+from flask import g, has_request_context, current_app, jsonify
+
+logger = logging.getLogger(__name__)
+
+
+class RequestSession:
+    """One pooled connection and one transaction shared by a whole request."""
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.conn = pool.getconn()
+        self.end_callbacks = []
+
+    def run_end_callbacks(self):
+        callbacks, self.end_callbacks = self.end_callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Error in end-of-transaction callback: {str(e)}")
+
+
+def current_session():
+    """Return the request's session, or None outside a request."""
+    if not has_request_context():
+        return None
+    return g.get('db_session')
+
+
+def get_session_connection(pool):
+    """Return the request's connection, checking one out on first use."""
+    session = current_session()
+    if session is None:
+        if not has_request_context():
+            return None
+        session = RequestSession(pool)
+        g.db_session = session
+        count_connection_opened()
+    return session.conn
+
+
+def is_session_connection(conn):
+    session = current_session()
+    return session is not None and session.conn is conn
+
+
+def on_transaction_end(callback):
+    """
+    Run ``callback`` once the request transaction commits or rolls back.
+
+    Returns False (and does nothing) outside a request session.
+    """
+    session = current_session()
+    if session is None:
+        return False
+    session.end_callbacks.append(callback)
+    return True
+
+
+def count_connection_opened():
+    """Bump the per-request debug counter of pool checkouts."""
+    if has_request_context():
+        g.db_connections_opened = g.get('db_connections_opened', 0) + 1
+
+
+def connections_opened():
+    """Number of connections checked out by the current request so far."""
+    if not has_request_context():
+        return 0
+    return g.get('db_connections_opened', 0)
+
+
+def _commit_session(response):
+    session = current_session()
+    if session is None or session.conn.closed:
+        return response
+
+    if response.status_code >= 400:
+        session.conn.rollback()
+    else:
+        try:
+            session.conn.commit()
+        except Exception as e:
+            logger.error(f"Error committing request transaction: {str(e)}")
+            session.conn.rollback()
+            response = jsonify({"error": f"Database commit failed: {str(e)}"})
+            response.status_code = 500
+
+    session.run_end_callbacks()
+
+    if current_app.config.get('DB_DEBUG_COUNTERS') or current_app.debug:
+        response.headers['X-DB-Connections-Opened'] = str(connections_opened())
+    return response
+
+
+def _release_session(exc=None):
+    session = g.pop('db_session', None)
+    if session is None:
+        return
+    discard = False
+    if exc is not None and not session.conn.closed:
+        try:
+            session.conn.rollback()
+        except Exception:
+            discard = True
+    session.pool.putconn(session.conn, discard=discard)
+    session.run_end_callbacks()
+
+
+def init_app(app):
+    """Bind the request-scoped unit of work to the Flask app lifecycle."""
+    app.after_request(_commit_session)
+    app.teardown_request(_release_session)
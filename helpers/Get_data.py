@@ -100,24 +100,31 @@
 #         db.close_cursor_and_connection(cursor, conn)
 
 from db.config import Database
+from db.catalog import catalog
+from helpers.keyset import ROW_KEY, fetch_page
+from helpers.table_metadata import table_row_count
 import logging
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.DEBUG)
 
 
-def get_table_data(filename, sheet_name, page=0, page_size=10):
+def get_table_data(filename, sheet_name, page=0, page_size=10, after=None, fmt='rows'):
     """
     Retrieve data from a table based on filename and sheet name with pagination.
 
     Args:
         filename (str): The name of the file
         sheet_name (str): The name of the sheet
-        page (int): The page number (0-based)
+        page (int): The page number (0-based), used when ``after`` is None
         page_size (int): The number of rows per page
+        after (int): Row key decoded from the previous page's ``nextAfter`` token
+        fmt (str): 'rows' (data is a list of rows) or 'columnar' (one list per
+            column, plus the column types in column order)
 
     Returns:
-        tuple: (result, error) where result contains data, columns, and total rows or None if error
+        tuple: (result, error) where result contains data, columns, total rows and
+        the nextAfter token, or None if error
     """
     db = Database()
     conn = None
@@ -133,74 +140,40 @@ def get_table_data(filename, sheet_name, page=0, page_size=10):
 
         cursor = conn.cursor()
 
-        # Check if table exists
-        cursor.execute("""
-            SELECT EXISTS (
-                SELECT FROM information_schema.tables
-                WHERE table_schema = 'postgres' AND table_name = %s
-            );
-        """, (table_name,))
-
-        if not cursor.fetchone()[0]:
+        # Check if table exists and get column names
+        table_info = catalog.describe(cursor, table_name)
+        if table_info is None:
             return None, f"Table {table_name} does not exist"
 
-        # Get column names
-        cursor.execute("""
-            SELECT column_name
-            FROM information_schema.columns
-            WHERE table_schema = 'postgres'
-            AND table_name = %s
-            ORDER BY ordinal_position;
-        """, (table_name,))
-
-        columns = [col[0] for col in cursor.fetchall()]
-        logger.debug(f"Columns before filtering: {columns}")
-
-        # Remove 'id' column if it exists (same as before)
-        try:
-            if 'id' in columns:
-                cursor.execute(f'ALTER TABLE "{table_name}" DROP COLUMN id;')
-                conn.commit()
-
-                # Refresh column list
-                cursor.execute("""
-                    SELECT column_name
-                    FROM information_schema.columns
-                    WHERE table_name = %s
-                    ORDER BY ordinal_position;
-                """, (table_name,))
-
-                columns = [col[0] for col in cursor.fetchall()]
-        except Exception as e:
-            logger.warning(f"Could not drop 'id' column: {str(e)}")
-            if conn:
-                conn.rollback()
-                cursor.close()
-                cursor = conn.cursor()
-
-        # Get total row count for pagination
-        cursor.execute(f'SELECT COUNT(*) FROM "{table_name}";')
-        total_rows = cursor.fetchone()[0]
-
-        # Get the paginated data
-        offset = page * page_size
-        cursor.execute(f'SELECT * FROM "{table_name}" LIMIT %s OFFSET %s;',
-                      (page_size, offset))
-        data = cursor.fetchall()
-
-        # Convert data to list of lists for JSON serialization
-        data_list = [list(row) for row in data]
-
-        return {
+        # Read-only: 'id' is the internal row key, left out of the projection
+        # rather than dropped (DDL here would lock the table for every reader).
+        columns = table_info.column_names(include_id=False)
+        logger.debug(f"Columns: {columns}")
+
+        # Total row count for pagination, maintained instead of counted
+        total_rows, estimated = table_row_count(cursor, table_name)
+
+        # Get the page in row key order
+        columnar = fmt == 'columnar'
+        data_list, next_after = fetch_page(cursor, table_name, columns, page_size, page, after,
+                                           keyed=table_info.has_column(ROW_KEY), columnar=columnar)
+
+        result = {
             'columns': columns,
             'data': data_list,
-            'totalRows': total_rows
-        }, None
+            'totalRows': total_rows,
+            'totalRowsEstimated': estimated,
+            'nextAfter': next_after
+        }
+        if columnar:
+            column_types = table_info.column_types(include_id=False)
+            result['types'] = [column_types[col] for col in columns]
+        return result, None
 
     except Exception as e:
         logger.error(f"Error retrieving table data: {str(e)}")
         if conn:
-            conn.rollback()
+            db.rollback(conn)
         return None, f"Database error: {str(e)}"
 
     finally:
@@ -1,4 +1,5 @@
 from db.config import Database
+from db.catalog import catalog
 import logging
 
 logger = logging.getLogger(__name__)
@@ -31,56 +32,19 @@ def get_table_datas(filename, sheet_name):
 
         cursor = conn.cursor()
 
-        # Check if table exists
-        cursor.execute("""
-            SELECT EXISTS (
-                SELECT FROM information_schema.tables
-                WHERE table_schema = 'postgres' AND table_name = %s
-            );
-        """, (table_name,))
-
-        if not cursor.fetchone()[0]:
+        # Check if table exists and get column names
+        table_info = catalog.describe(cursor, table_name)
+        if table_info is None:
             return None, f"Table {table_name} does not exist"
 
-        # Get column names
-        cursor.execute("""
-            SELECT column_name
-            FROM information_schema.columns
-            WHERE table_schema = 'postgres'
-            AND table_name = %s
-            ORDER BY ordinal_position;
-        """, (table_name,))
-
-        columns = [col[0] for col in cursor.fetchall()]
-        logger.debug(f"Columns before filtering: {columns}")
-
-        # Remove 'id' column if it exists
-        try:
-            if 'id' in columns:
-                cursor.execute(f'ALTER TABLE "{table_name}" DROP COLUMN id;')
-                conn.commit()
-
-                # Refresh column list
-                cursor.execute("""
-                    SELECT column_name
-                    FROM information_schema.columns
-                    WHERE table_name = %s
-                    ORDER BY ordinal_position;
-                """, (table_name,))
-
-                columns = [col[0] for col in cursor.fetchall()]
-        except Exception as e:
-            logger.warning(f"Could not drop 'id' column: {str(e)}")
-            if conn:
-                conn.rollback()
-                cursor.close()
-                cursor = conn.cursor()
-
-
-            # Continue even if dropping the column fails
+        # Read-only: 'id' is the internal row key, left out of the projection
+        # rather than dropped (DDL here would lock the table for every reader).
+        columns = table_info.column_names(include_id=False)
+        logger.debug(f"Columns: {columns}")
 
         # Get the data
-        cursor.execute(f'SELECT * FROM "{table_name}";')
+        column_list = ', '.join(f'"{col}"' for col in columns)
+        cursor.execute(f'SELECT {column_list} FROM "{table_name}";')
         data = cursor.fetchall()
 
         # Convert data to list of lists for JSON serialization
@@ -94,7 +58,7 @@ def get_table_datas(filename, sheet_name):
     except Exception as e:
         logger.error(f"Error retrieving table data: {str(e)}")
         if conn:
-            conn.rollback()
+            db.rollback(conn)
         return None, f"Database error: {str(e)}"
 
     finally:
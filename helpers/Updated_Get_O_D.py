@@ -1,13 +1,16 @@
 # Get.py
 import psycopg2
 from db.config import Database
+from db.catalog import catalog
+from helpers.keyset import ROW_KEY, fetch_page, to_columnar
+from helpers.table_metadata import table_row_count
 import logging
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.DEBUG)
 
 
-def Gets_Data(table_name, page=None, page_size=None):
+def Gets_Data(table_name, page=None, page_size=None, after=None, fmt='rows'):
     db = Database()
     conn = None
     cursor = None
@@ -29,45 +32,30 @@ def Gets_Data(table_name, page=None, page_size=None):
         logger.debug(f"Attempting to query table: {table_name}")
 
         # Check if table exists
-        cursor.execute("""
-            SELECT EXISTS (
-                SELECT FROM information_schema.tables 
-                WHERE table_name = %s
-            );
-        """, (table_name,))
-
-        exists = cursor.fetchone()[0]
-        if not exists:
+        table_info = catalog.describe(cursor, table_name)
+        if table_info is None:
             logger.warning(f"Table {table_name} does not exist")
             return {"error": f"Table {table_name} does not exist"}, 404
 
         # Get the data from the table, excluding the 'id' column
-        cursor.execute(f"""
-            SELECT column_name 
-            FROM information_schema.columns 
-            WHERE table_name = %s 
-            AND column_name != 'id'
-            ORDER BY ordinal_position;
-        """, (table_name,))
-
-        columns = [col[0] for col in cursor.fetchall()]
+        columns = table_info.column_names(include_id=False)
 
         # Determine if we're using pagination
         pagination_enabled = page is not None and page_size is not None
 
-        if pagination_enabled:
-            # Get total row count for pagination
-            cursor.execute(f'SELECT COUNT(*) FROM "{table_name}";')
-            total_rows = cursor.fetchone()[0]
+        # Columnar: {columns, types, data: one list per column}, built straight
+        # from the cursor tuples instead of one dict per row
+        columnar = fmt == 'columnar'
 
-            # Calculate offset for pagination
-            offset = page * page_size
+        next_after = None
+        if pagination_enabled:
+            # Total row count for pagination, maintained instead of counted
+            total_rows, _ = table_row_count(cursor, table_name)
 
-            # Construct the query with quoted column names and pagination
-            columns_str = ', '.join(f'"{col}"' for col in columns)
-            query = f'SELECT {columns_str} FROM "{table_name}" LIMIT %s OFFSET %s;'
-            logger.debug(f"Executing paginated query: {query} with params: {page_size}, {offset}")
-            cursor.execute(query, (page_size, offset))
+            # Page in row key order, after the given key or at an offset
+            logger.debug(f"Fetching page {page} (after {after}) of {page_size} rows from {table_name}")
+            data, next_after = fetch_page(cursor, table_name, columns, page_size, page or 0, after,
+                                          keyed=table_info.has_column(ROW_KEY), columnar=columnar)
         else:
             # For backward compatibility, fetch all rows
             columns_str = ', '.join(f'"{col}"' for col in columns)
@@ -75,22 +63,32 @@ def Gets_Data(table_name, page=None, page_size=None):
             logger.debug(f"Executing full query: {query}")
             cursor.execute(query)
 
-        # Fetch data
-        data = cursor.fetchall()
-
-        # Convert data to list of dictionaries
-        result = []
-        for row in data:
-            row_dict = {}
-            for i, col in enumerate(columns):
-                row_dict[col] = row[i]
-            result.append(row_dict)
+            # Fetch data
+            data = cursor.fetchall()
+            if columnar:
+                data = to_columnar(data, len(columns))
+
+        if columnar:
+            column_types = table_info.column_types(include_id=False)
+            result = {
+                "columns": columns,
+                "types": [column_types[col] for col in columns],
+                "data": data
+            }
+        else:
+            # Convert data to list of dictionaries
+            result = []
+            for row in data:
+                row_dict = {}
+                for i, col in enumerate(columns):
+                    row_dict[col] = row[i]
+                result.append(row_dict)
 
         if pagination_enabled:
-            logger.info(f"Successfully retrieved {len(result)} rows out of {total_rows} total")
-            return result, columns, total_rows
+            logger.info(f"Successfully retrieved a page of {page_size} rows out of {total_rows} total")
+            return result, columns, total_rows, next_after
         else:
-            logger.info(f"Successfully retrieved {len(result)} rows")
+            logger.info(f"Successfully retrieved all rows of {table_name}")
             return result
 
     except Exception as e:
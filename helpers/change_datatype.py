@@ -1,6 +1,8 @@
 # datatype_manage_helper_function
 
 from db.config import Database
+from db.catalog import catalog
+from helpers.working_table import materialize_working_table
 import logging
 import json
 from datetime import date, datetime
@@ -39,29 +41,14 @@ def check_table_existence(table_name):
         cursor = conn.cursor()
         
         # Check if table exists
-        cursor.execute("""
-            SELECT EXISTS (
-                SELECT FROM information_schema.tables 
-                WHERE table_name = %s
-            );
-        """, (table_name,))
-        
-        exists = cursor.fetchone()[0]
+        table_info = catalog.describe(cursor, table_name)
         
         # If table exists, get column information
-        if exists:
-            cursor.execute("""
-                SELECT column_name, data_type 
-                FROM information_schema.columns 
-                WHERE table_name = %s;
-            """, (table_name,))
-            
-            columns = cursor.fetchall()
-            
+        if table_info is not None:
             return {
                 "exists": True,
                 "table_name": table_name,
-                "columns": [{"name": col[0], "type": col[1]} for col in columns]
+                "columns": [{"name": name, "type": data_type} for name, data_type, _ in table_info.columns]
             }, None
         
         return {
@@ -114,17 +101,12 @@ def get_column_data_types(table_name, column):
             
         cursor = conn.cursor()
         
-        cursor.execute("""
-            SELECT data_type 
-            FROM information_schema.columns 
-            WHERE table_name = %s AND column_name = %s;
-        """, (table_name, column))
-        
-        result = cursor.fetchone()
-        if not result:
+        table_info = catalog.describe(cursor, table_name)
+        data_type = table_info.column_types().get(column) if table_info else None
+        if not data_type:
             return None, None, f"Column '{column}' not found in table '{table_name}'"
             
-        original_type = result[0].lower()
+        original_type = data_type.lower()
         mapped_type = data_type_map.get(original_type, "string")  # Default to string if unknown
         
         return mapped_type, original_type, None
@@ -302,6 +284,9 @@ def change_column_data_types(table_name, columns_to_change):
     """
     Change the data types of columns in a table.
 
+    All columns change in the request's one transaction: if any column
+    fails, the columns converted before it are rolled back too.
+
     Args:
         table_name (str): The name of the table
         columns_to_change (dict): Dictionary mapping column names to new data types
@@ -321,16 +306,11 @@ def change_column_data_types(table_name, columns_to_change):
         cursor = conn.cursor()
 
         # Check if table exists
-        cursor.execute("""
-            SELECT EXISTS (
-                SELECT FROM information_schema.tables 
-                WHERE table_name = %s
-            );
-        """, (table_name,))
-
-        if not cursor.fetchone()[0]:
+        if catalog.describe(cursor, table_name) is None:
             return None, f"Table '{table_name}' does not exist"
 
+        materialize_working_table(cursor, table_name)
+
         # Process each column
         for column, new_type in columns_to_change.items():
             try:
@@ -424,12 +404,14 @@ def change_column_data_types(table_name, columns_to_change):
                         END;
                     """)
 
-                conn.commit()
+                db.commit(conn)
+                catalog.invalidate(table_name)
 
             except Exception as e:
-                conn.rollback()
+                db.rollback(conn)
+                catalog.invalidate(table_name)
                 logger.error(f"Error processing column {column}: {str(e)}")
-                return None, f"Error converting {column}: {str(e)}"
+                return None, f"Error converting {column}: {str(e)} (no columns were changed)"
 
         return {
             "message": "Data types updated successfully",
@@ -0,0 +1,312 @@
+# chunked_upload_helper_function
+
+import os
+import re
+import json
+import time
+import uuid
+import fcntl
+import hashlib
+import logging
+import tempfile
+from contextlib import contextmanager
+
+from helpers.upload_staging import STAGING_DIR, stage_file
+from helpers.delimited_ingest import is_delimited
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.DEBUG)
+
+# Chunks are written straight into one preallocated file per upload. It
+# lives under the staging directory so completing the upload is a rename.
+CHUNKED_DIR = os.getenv('UPLOAD_CHUNKED_DIR', os.path.join(STAGING_DIR, 'chunked'))
+CHUNKED_TTL = float(os.getenv('UPLOAD_CHUNKED_TTL', 24 * 3600))
+CHUNKED_MAX_BYTES = int(os.getenv('UPLOAD_CHUNKED_MAX_BYTES', 2 * 1024 * 1024 * 1024))
+# Chunk size suggested to clients; any size is accepted.
+CHUNK_BYTES = int(os.getenv('UPLOAD_CHUNK_BYTES', 8 * 1024 * 1024))
+
+_UPLOAD_ID_RE = re.compile(r'^[0-9a-f]{32}$')
+_READ_BUFFER = 1024 * 1024
+
+
+class ChunkError(Exception):
+    """A chunk or upload request that cannot be applied; ``status`` is the HTTP code."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def _state_path(upload_id):
+    return os.path.join(CHUNKED_DIR, f"{upload_id}.json")
+
+
+def _data_path(upload_id):
+    return os.path.join(CHUNKED_DIR, f"{upload_id}.data")
+
+
+def _merge_range(ranges, start, end):
+    """Add [start, end) to a sorted list of disjoint [start, end) ranges."""
+    merged = []
+    for low, high in sorted(ranges + [[start, end]]):
+        if merged and low <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], high)
+        else:
+            merged.append([low, high])
+    return merged
+
+
+def _subtract_range(ranges, start, end):
+    """Remove [start, end) from a sorted list of disjoint [start, end) ranges."""
+    remaining = []
+    for low, high in ranges:
+        if low < start:
+            remaining.append([low, min(high, start)])
+        if high > end:
+            remaining.append([max(low, end), high])
+    return remaining
+
+
+def _overlaps(ranges, start, end):
+    return any(low < end and start < high for low, high in ranges)
+
+
+def _pwrite_all(fd, block, offset):
+    written = os.pwrite(fd, block, offset)
+    while written < len(block):
+        written += os.pwrite(fd, block[written:], offset + written)
+
+
+def _read_checked(stream, sink, start, end, sha256):
+    """
+    Pass the chunk body from ``stream`` to ``sink(block, offset)``, then
+    check its length and ``sha256``; raises ChunkError.
+
+    Returns:
+        str: the hex digest of the body
+    """
+    digest = hashlib.sha256()
+    offset = start
+    while offset < end:
+        block = stream.read(min(_READ_BUFFER, end - offset))
+        if not block:
+            break
+        digest.update(block)
+        sink(block, offset)
+        offset += len(block)
+
+    if offset != end:
+        raise ChunkError(f"Chunk body ended after {offset - start} of {end - start} bytes")
+    chunk_sha256 = digest.hexdigest()
+    if sha256 and chunk_sha256 != sha256.lower():
+        raise ChunkError("Chunk checksum mismatch, please resend this range")
+    return chunk_sha256
+
+
+def _public(state):
+    received = sum(high - low for low, high in state['ranges'])
+    return {
+        'uploadId': state['uploadId'],
+        'fileName': state['fileName'],
+        'totalSize': state['totalSize'],
+        'bytesReceived': received,
+        'ranges': state['ranges'],
+        'complete': received == state['totalSize'],
+        'chunkSize': CHUNK_BYTES,
+    }
+
+
+@contextmanager
+def _locked_state(upload_id, owner=None, exclusive=True):
+    """
+    Yield the upload's state dict under a file lock; changes are written
+    back on exit. Chunks of one upload may arrive on different workers.
+    Uploads of other users are reported as not found.
+    """
+    if not upload_id or not _UPLOAD_ID_RE.match(upload_id):
+        raise ChunkError("Upload not found", 404)
+    try:
+        f = open(_state_path(upload_id), 'r+')
+    except FileNotFoundError:
+        raise ChunkError("Upload not found", 404)
+
+    with f:
+        fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        state = json.load(f)
+        if state.get('owner') and owner != state['owner']:
+            raise ChunkError("Upload not found", 404)
+        before = json.dumps(state, sort_keys=True)
+        yield state
+        if exclusive and json.dumps(state, sort_keys=True) != before:
+            f.seek(0)
+            f.truncate()
+            json.dump(state, f)
+
+
+def _remove(upload_id):
+    for path in (_data_path(upload_id), _state_path(upload_id)):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def evict_uploads(now=None):
+    """Delete chunked uploads that have not received data for UPLOAD_CHUNKED_TTL."""
+    now = time.time() if now is None else now
+    try:
+        names = os.listdir(CHUNKED_DIR)
+    except FileNotFoundError:
+        return
+    for name in names:
+        upload_id, ext = os.path.splitext(name)
+        if ext != '.json':
+            continue
+        try:
+            if now - os.path.getmtime(os.path.join(CHUNKED_DIR, name)) > CHUNKED_TTL:
+                _remove(upload_id)
+        except FileNotFoundError:
+            pass
+
+
+def initiate_upload(filename, total_size, owner=None):
+    """
+    Start a chunked upload and preallocate its file.
+
+    Returns:
+        tuple: (status dict, error)
+    """
+    if not filename or not (filename.endswith('.xlsx') or is_delimited(filename)):
+        return None, "Invalid file format. Only .xlsx, .csv and .tsv (optionally .gz or .zst) are allowed."
+    try:
+        total_size = int(total_size)
+    except (TypeError, ValueError):
+        return None, "totalSize must be an integer"
+    if total_size <= 0:
+        return None, "totalSize must be positive"
+    if total_size > CHUNKED_MAX_BYTES:
+        return None, f"File too large, the limit is {CHUNKED_MAX_BYTES} bytes"
+
+    os.makedirs(CHUNKED_DIR, exist_ok=True)
+    evict_uploads()
+
+    upload_id = uuid.uuid4().hex
+    fd = os.open(_data_path(upload_id), os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    try:
+        # Reserve the space now so a full disk fails here, not mid-upload.
+        if hasattr(os, 'posix_fallocate'):
+            os.posix_fallocate(fd, 0, total_size)
+        else:
+            os.ftruncate(fd, total_size)
+    except OSError as e:
+        os.close(fd)
+        _remove(upload_id)
+        return None, f"Could not reserve {total_size} bytes: {e}"
+    os.close(fd)
+
+    state = {
+        'uploadId': upload_id,
+        'fileName': filename,
+        'totalSize': total_size,
+        'owner': owner,
+        'ranges': [],
+        'createdAt': time.time(),
+    }
+    with open(_state_path(upload_id), 'w') as f:
+        json.dump(state, f)
+    logger.info(f"Started chunked upload {upload_id} of {filename} ({total_size} bytes)")
+    return _public(state), None
+
+
+def upload_status(upload_id, owner=None):
+    """Return the received byte ranges of an upload; raises ChunkError if unknown."""
+    with _locked_state(upload_id, owner, exclusive=False) as state:
+        return _public(state)
+
+
+def write_chunk(upload_id, start, end, total_size, stream, sha256=None, owner=None):
+    """
+    Write bytes [start, end) read from ``stream`` into the upload's file.
+
+    A new range is streamed to disk with pwrite at its offset, hashed on
+    the way; it only counts as received when it matches ``sha256``. A
+    range that overlaps bytes already received is first spooled to a
+    scratch file and checked there, so a bad resend never overwrites good
+    bytes. The digest is returned as ``chunkSha256`` either way, and
+    clients retry failed chunks as is.
+
+    Returns:
+        dict: the upload status; raises ChunkError on a bad chunk
+    """
+    with _locked_state(upload_id, owner, exclusive=False) as state:
+        expected_total = state['totalSize']
+        resend = _overlaps(state['ranges'], start, end)
+    if total_size is not None and total_size != expected_total:
+        raise ChunkError(f"Total size {total_size} does not match the upload's {expected_total}")
+    if start < 0 or end <= start or end > expected_total:
+        raise ChunkError(f"Range {start}-{end - 1} is outside the file (0-{expected_total - 1})", 416)
+
+    try:
+        fd = os.open(_data_path(upload_id), os.O_WRONLY)
+    except FileNotFoundError:
+        raise ChunkError("Upload not found", 404)
+    try:
+        if resend:
+            with tempfile.TemporaryFile(dir=CHUNKED_DIR) as scratch:
+                chunk_sha256 = _read_checked(stream, lambda block, offset: scratch.write(block), start, end, sha256)
+                scratch.seek(0)
+                offset = start
+                for block in iter(lambda: scratch.read(_READ_BUFFER), b''):
+                    _pwrite_all(fd, block, offset)
+                    offset += len(block)
+        else:
+            try:
+                chunk_sha256 = _read_checked(stream, lambda block, offset: _pwrite_all(fd, block, offset),
+                                             start, end, sha256)
+            except ChunkError:
+                # A concurrent request may have delivered this range meanwhile;
+                # its bytes are gone now, so it has to be sent again.
+                with _locked_state(upload_id, owner) as state:
+                    state['ranges'] = _subtract_range(state['ranges'], start, end)
+                raise
+    finally:
+        os.close(fd)
+
+    with _locked_state(upload_id, owner) as state:
+        state['ranges'] = _merge_range(state['ranges'], start, end)
+        status = _public(state)
+    status['chunkSha256'] = chunk_sha256
+    return status
+
+
+def complete_upload(upload_id, sha256=None, owner=None):
+    """
+    Hand a fully received upload over to the staging area.
+
+    The preallocated file already is the assembled workbook, so it is
+    renamed into place rather than copied.
+
+    Returns:
+        tuple: (staging token, filename); raises ChunkError
+    """
+    with _locked_state(upload_id, owner) as state:
+        status = _public(state)
+        if not status['complete']:
+            missing = status['totalSize'] - status['bytesReceived']
+            raise ChunkError(f"Upload is missing {missing} bytes", 409)
+
+        filename = state['fileName']
+        # Checked before the file is staged, so a corrupt upload never gets a token
+        token = stage_file(_data_path(upload_id), filename, expected_sha256=sha256)
+
+    _remove(upload_id)
+    if token is None:
+        raise ChunkError("File checksum mismatch, please upload the file again", 422)
+    logger.info(f"Completed chunked upload {upload_id} as staged {token}")
+    return token, filename
+
+
+def abort_upload(upload_id, owner=None):
+    """Discard an upload and its received chunks; raises ChunkError if unknown."""
+    with _locked_state(upload_id, owner):
+        _remove(upload_id)
@@ -0,0 +1,250 @@
+# copy_encoder_helper_function
+
+import logging
+import struct
+from io import BytesIO, StringIO
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.DEBUG)
+
+NULL = '\\N'
+
+# Characters that must be backslash-escaped in COPY text format.
+_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+
+def _to_text(values, formatter=str):
+    """Format a 1-d array with a C-level map instead of a per-cell apply."""
+    return np.array(list(map(formatter, values.tolist())), dtype=object)
+
+
+def _with_nulls(values, mask):
+    """Return an object array of strings with NULL where ``mask`` is set."""
+    if mask is not None and mask.any():
+        values[mask] = NULL
+    return values
+
+
+def _encode_integers(series):
+    mask = series.isna().to_numpy() if series.hasnans else None
+    if mask is not None:
+        values = series.to_numpy(dtype='int64', na_value=0)
+    else:
+        values = series.to_numpy()
+    return _with_nulls(_to_text(values), mask)
+
+
+def _encode_floats(series):
+    values = series.to_numpy(dtype='float64', na_value=np.nan)
+    mask = np.isnan(values)
+    finite = np.isfinite(values)
+
+    # Integral floats (e.g. BIGINT columns read back with NULLs) are written
+    # without a fractional part so they load into integer and float columns alike.
+    if finite.any() and np.all(np.mod(values[finite], 1) == 0) and np.all(np.abs(values[finite]) < 2 ** 53):
+        text = _to_text(np.where(finite, values, 0).astype('int64'))
+    else:
+        text = _to_text(values, repr)
+
+    infinite = ~finite & ~mask
+    if infinite.any():
+        text[infinite & (values > 0)] = 'Infinity'
+        text[infinite & (values < 0)] = '-Infinity'
+    return _with_nulls(text, mask)
+
+
+def _encode_bools(series):
+    mask = series.isna().to_numpy() if series.hasnans else None
+    values = series.to_numpy(dtype=bool, na_value=False)
+    text = np.where(values, 't', 'f').astype(object)
+    return _with_nulls(text, mask)
+
+
+def _encode_datetimes(series):
+    mask = series.isna().to_numpy()
+    if getattr(series.dt, 'tz', None) is not None:
+        values = series.dt.tz_convert('UTC').dt.tz_localize(None).to_numpy()
+        suffix = '+00'
+    else:
+        values = series.to_numpy()
+        suffix = ''
+    text = np.datetime_as_string(values.astype('datetime64[us]'), unit='us').astype(object)
+    if suffix:
+        text = text + suffix
+    return _with_nulls(text, mask)
+
+
+def _encode_objects(series):
+    mask = series.isna().to_numpy()
+    text = list(map(str, series.tolist()))
+    joined = '\x00'.join(text)
+    if '\\' in joined or '\t' in joined or '\n' in joined or '\r' in joined:
+        text = [value.translate(_ESCAPES) for value in text]
+    return _with_nulls(np.array(text, dtype=object), mask)
+
+
+def encode_column(series):
+    """Encode one column as an object array of COPY text-format fields."""
+    dtype = series.dtype
+    if pd.api.types.is_bool_dtype(dtype):
+        return _encode_bools(series)
+    if pd.api.types.is_integer_dtype(dtype):
+        return _encode_integers(series)
+    if pd.api.types.is_float_dtype(dtype):
+        return _encode_floats(series)
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return _encode_datetimes(series)
+    return _encode_objects(series)
+
+
+def frame_to_copy_text(df):
+    """Encode a DataFrame as PostgreSQL COPY text format (tab separated, \\N for NULL)."""
+    if df.empty:
+        return ''
+    columns = [encode_column(df.iloc[:, i]) for i in range(df.shape[1])]
+    return '\n'.join(map('\t'.join, zip(*columns))) + '\n'
+
+
+# --- binary format -------------------------------------------------------
+
+PGCOPY_HEADER = b'PGCOPY\n\xff\r\n\x00' + struct.pack('!ii', 0, 0)
+PGCOPY_TRAILER = struct.pack('!h', -1)
+_NULL_FIELD = struct.pack('!i', -1)
+_PG_EPOCH = np.datetime64('2000-01-01T00:00:00', 'us')
+
+_PG_EPOCH_DATE = np.datetime64('2000-01-01', 'D')
+
+# Fixed-width binary layout per SQL type created at upload.
+_BINARY_FIXED = {
+    'SMALLINT': '>i2',
+    'INTEGER': '>i4',
+    'BIGINT': '>i8',
+    'DOUBLE PRECISION': '>f8',
+    'BOOLEAN': '>u1',
+    'DATE': '>i4',
+    'TIMESTAMP': '>i8',
+}
+
+
+def supports_binary(sql_types):
+    """True if every column type has a binary encoder (fixed width or TEXT)."""
+    return all(t in _BINARY_FIXED or t == 'TEXT' for t in sql_types.values())
+
+
+def _binary_values(series, sql_type):
+    """Return (numpy values in wire dtype, null mask) for a fixed-width column."""
+    mask = series.isna().to_numpy()
+    if sql_type in ('TIMESTAMP', 'DATE'):
+        series = pd.to_datetime(series)
+        if series.dt.tz is not None:
+            series = series.dt.tz_convert('UTC').dt.tz_localize(None)
+        if sql_type == 'DATE':
+            values = series.to_numpy(dtype='datetime64[D]')
+            values = np.where(mask, _PG_EPOCH_DATE, values)
+            values = (values - _PG_EPOCH_DATE).astype('int64')
+        else:
+            values = series.to_numpy(dtype='datetime64[us]')
+            values = np.where(mask, _PG_EPOCH, values)
+            values = (values - _PG_EPOCH).astype('int64')
+    elif sql_type == 'BOOLEAN':
+        values = series.to_numpy(dtype=bool, na_value=False).astype('uint8')
+    elif sql_type in ('SMALLINT', 'INTEGER', 'BIGINT'):
+        if pd.api.types.is_float_dtype(series.dtype):
+            values = np.where(mask, 0, series.to_numpy(dtype='float64', na_value=0)).astype('int64')
+        else:
+            values = series.to_numpy(dtype='int64', na_value=0)
+    else:
+        values = series.to_numpy(dtype='float64', na_value=np.nan)
+    return values.astype(_BINARY_FIXED[sql_type]), mask
+
+
+def _binary_cells(series, sql_type):
+    """Encode one column as a list of length-prefixed binary fields."""
+    if sql_type in _BINARY_FIXED:
+        values, mask = _binary_values(series, sql_type)
+        width = values.dtype.itemsize
+        cells = np.empty(len(values), dtype=[('len', '>i4'), ('val', values.dtype)])
+        cells['len'] = width
+        cells['val'] = values
+        step = width + 4
+        buf = cells.tobytes()
+        out = [buf[i:i + step] for i in range(0, len(buf), step)]
+    else:
+        mask = series.isna().to_numpy()
+        if pd.api.types.is_object_dtype(series.dtype) or pd.api.types.is_string_dtype(series.dtype):
+            text = map(str, series.tolist())
+        else:
+            text = encode_column(series).tolist()
+        out = []
+        for value in text:
+            data = value.encode('utf-8')
+            out.append(struct.pack('!i', len(data)) + data)
+
+    if mask.any():
+        for i in np.flatnonzero(mask):
+            out[i] = _NULL_FIELD
+    return out
+
+
+def frame_to_copy_binary(df, sql_types, header=True, trailer=True):
+    """
+    Encode a DataFrame as PostgreSQL COPY binary format.
+
+    ``sql_types`` maps each column to the SQL type of its target column
+    (see supports_binary); binary COPY requires values in exactly
+    that type, so the server does no text parsing. When every column is
+    fixed width and NOT NULL the whole payload is built in one numpy buffer.
+    """
+    parts = [PGCOPY_HEADER] if header else []
+    n_rows, n_cols = df.shape
+    field_count = struct.pack('!h', n_cols)
+
+    if n_rows:
+        columns = [df.iloc[:, i] for i in range(n_cols)]
+        types = [sql_types.get(col, 'TEXT') for col in df.columns]
+
+        if all(t in _BINARY_FIXED for t in types) and not any(c.hasnans for c in columns):
+            fields = [('n', '>i2')]
+            for i, sql_type in enumerate(types):
+                fields += [(f'l{i}', '>i4'), (f'v{i}', _BINARY_FIXED[sql_type])]
+            rows = np.empty(n_rows, dtype=fields)
+            rows['n'] = n_cols
+            for i, (column, sql_type) in enumerate(zip(columns, types)):
+                values, _ = _binary_values(column, sql_type)
+                rows[f'l{i}'] = values.dtype.itemsize
+                rows[f'v{i}'] = values
+            parts.append(rows.tobytes())
+        else:
+            cells = [_binary_cells(column, sql_type) for column, sql_type in zip(columns, types)]
+            parts.append(b''.join(field_count + b''.join(row) for row in zip(*cells)))
+
+    if trailer:
+        parts.append(PGCOPY_TRAILER)
+    return b''.join(parts)
+
+
+def copy_frame(cursor, table_name, df, sql_types=None, freeze=False):
+    """
+    COPY the rows of a DataFrame into the matching columns of a table.
+
+    With ``sql_types`` the rows are sent in binary format; ``freeze`` adds
+    FREEZE and is only valid when the table was created or truncated in the
+    current transaction.
+    """
+    if df.empty:
+        return 0
+    column_list = ', '.join(f'"{col}"' for col in df.columns)
+    options = ['FORMAT binary'] if sql_types is not None else ['FORMAT text']
+    if freeze:
+        options.append('FREEZE')
+    copy_sql = f'COPY "{table_name}" ({column_list}) FROM STDIN WITH ({", ".join(options)})'
+
+    if sql_types is not None:
+        payload = BytesIO(frame_to_copy_binary(df, sql_types))
+    else:
+        payload = StringIO(frame_to_copy_text(df))
+    cursor.copy_expert(sql=copy_sql, file=payload)
+    return len(df)
@@ -1,6 +1,7 @@
 # datatype_helper_function
 
 from   db.config import Database
+from   db.catalog import catalog
 import logging
 
 logger = logging.getLogger(__name__)
@@ -37,37 +38,17 @@ def get_table_data_types(table_name, sheet_name):
             
         cursor = conn.cursor()
         
-        # Find the correct table name
-        table_exists = False
-        actual_table_name = None
-        
-        for try_table_name in possible_table_names:
-            cursor.execute("""
-                SELECT EXISTS (
-                    SELECT FROM information_schema.tables 
-                    WHERE table_name = %s
-                    AND table_schema NOT IN ('pg_catalog', 'information_schema')
-                );
-            """, (try_table_name,))
-            
-            if cursor.fetchone()[0]:
-                actual_table_name = try_table_name
-                table_exists = True
-                logger.info(f"Found existing table: {actual_table_name}")
-                break
-                
-        if not table_exists:
+        # Find the correct table name (all candidates resolved in one lookup)
+        table_info = catalog.find(cursor, possible_table_names)
+
+        if table_info is None:
             return None, f"Table not found. Tried: {', '.join(possible_table_names)}"
+
+        actual_table_name = table_info.name
+        logger.info(f"Found existing table: {actual_table_name}")
             
         # Get column data types
-        cursor.execute("""
-            SELECT column_name, data_type 
-            FROM information_schema.columns 
-            WHERE table_name = %s 
-            ORDER BY ordinal_position;
-        """, (actual_table_name,))
-        
-        columns_info = cursor.fetchall()
+        columns_info = [(name, data_type) for name, data_type, _ in table_info.columns]
         logger.debug(f"Found columns: {columns_info}")
         
         if not columns_info:
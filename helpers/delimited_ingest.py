@@ -0,0 +1,191 @@
+# delimited_ingest_helper_function
+
+import io
+import re
+import csv
+import gzip
+import logging
+
+import pandas as pd
+
+from helpers.excel_stream import make_header
+from helpers.type_inference import INFERENCE_SAMPLE_ROWS, infer_column
+
+try:
+    import zstandard
+except ImportError:  # in requirements.txt; without it .zst uploads are rejected up front
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.DEBUG)
+
+# Delimited files have no sheets; they are listed and loaded as this one.
+DELIMITED_SHEET_NAME = 'csv_import'
+
+DELIMITED_SUFFIXES = ('.csv', '.tsv', '.csv.gz', '.tsv.gz') + (('.csv.zst', '.tsv.zst') if zstandard else ())
+
+# Decompressed bytes read from the start of the file for type inference.
+SAMPLE_BYTES = 4 * 1024 * 1024
+COPY_BUFFER = 1024 * 1024
+
+# Values the server parses itself during COPY. A column only gets a
+# non-TEXT type if every sampled value already has this shape. Zero-padded
+# numbers (zip codes, ids) and single-letter flags stay TEXT, as in
+# type_inference.
+_COPY_SAFE = {
+    'int': re.compile(r'[+-]?(?:[1-9]\d*|0)'),
+    'float': re.compile(r'[+-]?(?:(?:[1-9]\d*|0)(?:\.\d*)?|\.\d+)(?:[eE][+-]?\d+)?|[+-]?(?:NaN|Infinity|inf)',
+                        re.IGNORECASE),
+    'bool': re.compile(r'true|false|yes|no', re.IGNORECASE),
+    'datetime': re.compile(r'\d{4}-\d{2}-\d{2}(?:[ T]\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?)?'),
+}
+
+# COPY error context: 'COPY t, line 12, column qty: "abc"'
+_CONTEXT_COLUMN_RE = re.compile(r'COPY [^,]+, line \d+, column (.+?): ')
+
+
+def is_delimited(filename):
+    return filename.lower().endswith(DELIMITED_SUFFIXES)
+
+
+def _delimiter(filename):
+    name = filename.lower()
+    for suffix in ('.gz', '.zst'):
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+    return '\t' if name.endswith('.tsv') else ','
+
+
+def open_delimited(file, filename):
+    """
+    Return a binary stream of the decompressed file content, from the start.
+    ``file`` is a seekable binary file object (or FileStorage).
+    """
+    raw = getattr(file, 'stream', file)
+    raw.seek(0)
+    name = filename.lower()
+    if name.endswith('.gz'):
+        return gzip.GzipFile(fileobj=raw, mode='rb')
+    if name.endswith('.zst'):
+        if zstandard is None:
+            raise RuntimeError("zstandard is not installed, .zst uploads are unavailable")
+        return zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True, closefd=False)
+    return raw
+
+
+def sample_delimited(file, filename, sample_rows=None):
+    """
+    Read the header and up to ``sample_rows`` records from the start of the
+    file, decompressing only what that needs.
+
+    Returns:
+        tuple: (header, [row lists])
+    """
+    sample_rows = sample_rows or INFERENCE_SAMPLE_ROWS
+    stream = open_delimited(file, filename)
+    head = stream.read(SAMPLE_BYTES)
+    truncated = bool(stream.read(1))
+
+    text = head.decode('utf-8', errors='replace')
+    if text.startswith('\ufeff'):
+        text = text[1:]
+    if truncated:
+        # Drop the partial last line; a later record may still be cut in
+        # a quoted field, so the last parsed record is dropped too.
+        text = text[:text.rfind('\n') + 1]
+
+    records = list(csv.reader(io.StringIO(text), delimiter=_delimiter(filename)))
+    if truncated and records:
+        records = records[:-1]
+    if not records:
+        raise ValueError("File is empty")
+
+    header = make_header([value if value != '' else None for value in records[0]])
+    header = ['ID' if col == 'id' else col for col in header]
+    return header, records[1:sample_rows + 1]
+
+
+def _copy_safe(values, kind):
+    pattern = _COPY_SAFE.get(kind)
+    if pattern is None:
+        return False
+    stripped = values.str.strip()
+    return bool(stripped.str.fullmatch(pattern).all())
+
+
+def infer_delimited_types(header, rows):
+    """
+    SQL type per column from the sampled rows.
+
+    The values are loaded by the server's own COPY parser, not converted in
+    Python, so only types whose text the server reads as is are used
+    (plain integers and decimals, true/false, ISO dates); everything else
+    is TEXT. Only empty fields are NULL.
+    """
+    width = len(header)
+    padded = [row[:width] + [''] * (width - len(row)) for row in rows]
+    frame = pd.DataFrame(padded, columns=header, dtype=object)
+
+    sql_types = {}
+    for col in header:
+        values = frame[col]
+        present = values[values != '']
+        if present.empty:
+            sql_types[col] = 'TEXT'
+            continue
+        # No name hint: Excel day serials are not a thing in CSV extracts.
+        column_type = infer_column(present.reset_index(drop=True))
+        if column_type.kind in ('int', 'float', 'bool', 'datetime') and _copy_safe(present, column_type.kind):
+            sql_types[col] = column_type.sql_type
+        else:
+            sql_types[col] = 'TEXT'
+    return sql_types
+
+
+def failed_column(error, columns):
+    """Column named in a COPY data error's context, or None."""
+    context = getattr(getattr(error, 'diag', None), 'context', None) or ''
+    match = _CONTEXT_COLUMN_RE.search(context)
+    if match and match.group(1) in columns:
+        return match.group(1)
+    return None
+
+
+class _LineCounter:
+    """Wrap a binary stream and report approximate rows read to ``progress``."""
+
+    def __init__(self, stream, progress):
+        self._stream = stream
+        self._progress = progress
+        self.lines = 0
+
+    def read(self, size=-1):
+        block = self._stream.read(size)
+        if block:
+            self.lines += block.count(b'\n')
+            # The header line is not a row.
+            rows = max(self.lines - 1, 0)
+            self._progress(rows, rows)
+        return block
+
+
+def copy_delimited(cursor, table_name, columns, file, filename, freeze=False, progress=None):
+    """
+    Stream the decompressed file into ``COPY ... FROM STDIN (FORMAT csv)``.
+    The server skips the header line and parses every value itself.
+
+    Returns:
+        int: rows copied
+    """
+    column_list = ', '.join(f'"{col}"' for col in columns)
+    delimiter = "E'\\t'" if _delimiter(filename) == '\t' else "','"
+    options = ['FORMAT csv', 'HEADER true', f'DELIMITER {delimiter}', "ENCODING 'UTF8'"]
+    if freeze:
+        options.append('FREEZE')
+    copy_sql = f'COPY "{table_name}" ({column_list}) FROM STDIN WITH ({", ".join(options)})'
+
+    stream = open_delimited(file, filename)
+    if progress:
+        stream = _LineCounter(stream, progress)
+    cursor.copy_expert(sql=copy_sql, file=stream, size=COPY_BUFFER)
+    return cursor.rowcount
@@ -0,0 +1,166 @@
+# excel_engine_helper_function
+
+import os
+import sys
+import zipfile
+import logging
+from datetime import date, datetime
+
+import pandas as pd
+from openpyxl import load_workbook
+
+from helpers.xlsx_reader import read_workbook_index, iter_sheet_rows
+
+try:
+    from python_calamine import CalamineWorkbook
+except ImportError:  # optional, Rust-backed reader
+    CalamineWorkbook = None
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.DEBUG)
+
+# Reader behind uploads: 'openpyxl', 'calamine' (needs python-calamine),
+# 'xlsx_stream' (helpers.xlsx_reader) or 'auto' (xlsx_stream for streamed
+# rows, calamine when installed - else openpyxl - for whole-sheet frames).
+EXCEL_ENGINE = os.getenv('EXCEL_ENGINE', 'auto').lower()
+
+
+def _sheet_not_found(sheet_name):
+    return ValueError(f"Worksheet named '{sheet_name}' not found")
+
+
+class OpenpyxlEngine:
+    """
+    An Excel reader: ``iter_rows`` yields a sheet's rows as tuples (header
+    first, missing cells as None) and ``read_frame`` loads it like
+    ``pd.read_excel``. ``file`` is a path or a seekable binary file object.
+    """
+
+    name = 'openpyxl'
+
+    def iter_rows(self, file, sheet_name):
+        if hasattr(file, 'seek'):
+            file.seek(0)
+        workbook = load_workbook(file, read_only=True, data_only=True)
+        try:
+            if sheet_name not in workbook.sheetnames:
+                raise _sheet_not_found(sheet_name)
+            yield from workbook[sheet_name].iter_rows(values_only=True)
+        finally:
+            workbook.close()
+
+    def read_frame(self, file, sheet_name):
+        if hasattr(file, 'seek'):
+            file.seek(0)
+        return pd.read_excel(file, sheet_name=sheet_name, engine='openpyxl')
+
+
+class CalamineEngine(OpenpyxlEngine):
+    """
+    python-calamine: the workbook is parsed in Rust, rows come back as lists.
+    The whole sheet range is loaded before the first row is yielded, so
+    ``iter_rows`` memory grows with the sheet.
+    """
+
+    name = 'calamine'
+
+    def _open(self, file):
+        if isinstance(file, (str, os.PathLike)):
+            return CalamineWorkbook.from_path(os.fspath(file))
+        file.seek(0)
+        return CalamineWorkbook.from_filelike(file)
+
+    @staticmethod
+    def _value(value):
+        # Same conversions as pandas' calamine reader: '' is an empty cell,
+        # integral floats are ints and dates are datetimes.
+        if value == '':
+            return None
+        if isinstance(value, float) and value.is_integer():
+            return int(value)
+        if isinstance(value, date) and not isinstance(value, datetime):
+            return datetime(value.year, value.month, value.day)
+        return value
+
+    def iter_rows(self, file, sheet_name):
+        workbook = self._open(file)
+        if sheet_name not in workbook.sheet_names:
+            raise _sheet_not_found(sheet_name)
+        sheet = workbook.get_sheet_by_name(sheet_name)
+        # Rows start at the top of the sheet but columns at the first used one.
+        lead = (None,) * sheet.start[1] if sheet.start else ()
+        value = self._value
+        for row in sheet.iter_rows():
+            yield lead + tuple(value(v) for v in row)
+
+    def read_frame(self, file, sheet_name):
+        if hasattr(file, 'seek'):
+            file.seek(0)
+        return pd.read_excel(file, sheet_name=sheet_name, engine='calamine')
+
+
+class XlsxStreamEngine(OpenpyxlEngine):
+    """helpers.xlsx_reader: iterparse over the sheet XML, no workbook object."""
+
+    name = 'xlsx_stream'
+
+    def iter_rows(self, file, sheet_name):
+        if hasattr(file, 'seek'):
+            file.seek(0)
+        index = read_workbook_index(file)
+        if sheet_name not in index.sheets:
+            raise _sheet_not_found(sheet_name)
+        if hasattr(file, 'seek'):
+            file.seek(0)
+        with zipfile.ZipFile(file) as archive:
+            yield from iter_sheet_rows(archive, index.sheets[sheet_name], index)
+
+    def read_frame(self, file, sheet_name):
+        # Imported here: excel_stream builds its chunk iterator on this module.
+        from helpers.excel_stream import chunk_rows
+        for header, rows in chunk_rows(self.iter_rows(file, sheet_name), sys.maxsize):
+            return pd.DataFrame(rows, columns=header)
+        return pd.DataFrame()
+
+
+class AutoEngine(XlsxStreamEngine):
+    """
+    Streamed rows with bounded memory from xlsx_stream; whole-sheet frames,
+    where the sheet is in memory anyway, from calamine when installed.
+    """
+
+    def __init__(self):
+        self.frame_engine = CalamineEngine() if CalamineWorkbook is not None else OpenpyxlEngine()
+        self.name = f"xlsx_stream+{self.frame_engine.name}"
+
+    def read_frame(self, file, sheet_name):
+        return self.frame_engine.read_frame(file, sheet_name)
+
+
+_ENGINES = {
+    'openpyxl': OpenpyxlEngine,
+    'calamine': CalamineEngine,
+    'xlsx_stream': XlsxStreamEngine,
+    'auto': AutoEngine,
+}
+_engines = {}
+
+
+def get_engine(name=None):
+    """Return the configured Excel engine, falling back to openpyxl."""
+    name = (name or EXCEL_ENGINE).lower()
+    if name in _engines:
+        return _engines[name]
+
+    chosen = name
+    if name == 'calamine' and CalamineWorkbook is None:
+        logger.warning("EXCEL_ENGINE=calamine but python-calamine is not installed, using openpyxl")
+        chosen = 'openpyxl'
+    elif name not in _ENGINES:
+        logger.warning(f"Unknown EXCEL_ENGINE '{name}', using openpyxl")
+        chosen = 'openpyxl'
+
+    engine = _ENGINES[chosen]()
+    logger.info(f"Excel reader engine: {engine.name} (requested '{name}')")
+    _engines[name] = engine
+    return engine
@@ -0,0 +1,101 @@
+# excel_stream_helper_function
+
+import logging
+import zipfile
+import xml.etree.ElementTree as ET
+
+from helpers.excel_engine import get_engine
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.DEBUG)
+
+
+def read_sheet_names(file):
+    """
+    List worksheet names from ``xl/workbook.xml`` without parsing any sheet.
+
+    ``file`` is a path or a seekable binary file object.
+    """
+    if hasattr(file, 'seek'):
+        file.seek(0)
+    with zipfile.ZipFile(file) as archive:
+        root = ET.fromstring(archive.read('xl/workbook.xml'))
+    # Match on the local name so transitional and strict OOXML both work.
+    names = [el.get('name') for el in root.iter() if el.tag.rsplit('}', 1)[-1] == 'sheet']
+    if hasattr(file, 'seek'):
+        file.seek(0)
+    return names
+
+
+def make_header(values):
+    """Build column names from a header row the way pandas.read_excel does."""
+    header = []
+    seen = {}
+    for i, value in enumerate(values):
+        name = f"Unnamed: {i}" if value is None or str(value).strip() == '' else str(value)
+        if name in seen:
+            seen[name] += 1
+            deduped = f"{name}.{seen[name]}"
+            while deduped in seen:
+                seen[name] += 1
+                deduped = f"{name}.{seen[name]}"
+            seen[deduped] = 0
+            name = deduped
+        else:
+            seen[name] = 0
+        header.append(name)
+    return header
+
+
+def chunk_rows(rows, chunk_size):
+    """
+    Turn a raw row iterator (header first) into (header, chunk) pairs.
+
+    Rows are padded/truncated to the header width. Blank rows are held back
+    and only emitted when a non-blank row follows, so trailing blank rows
+    are dropped like pandas does. A header-only sheet yields one empty chunk.
+    """
+    rows = iter(rows)
+    header = None
+    for values in rows:
+        if values is not None and any(v is not None for v in values):
+            header = make_header(values)
+            break
+    if header is None:
+        return
+
+    width = len(header)
+    chunk = []
+    pending_blank = []
+    yielded = False
+
+    for values in rows:
+        values = tuple(values[:width]) if values is not None else ()
+        if len(values) < width:
+            values = values + (None,) * (width - len(values))
+
+        if all(v is None for v in values):
+            pending_blank.append(values)
+            continue
+        if pending_blank:
+            chunk.extend(pending_blank)
+            pending_blank = []
+        chunk.append(values)
+
+        if len(chunk) >= chunk_size:
+            yield header, chunk
+            yielded = True
+            chunk = []
+
+    if chunk or not yielded:
+        yield header, chunk
+
+
+def iter_sheet_chunks(file, sheet_name, chunk_size=10000, engine=None):
+    """
+    Stream a worksheet as (header, rows) chunks of at most ``chunk_size`` rows.
+
+    Rows come from the configured Excel engine (see helpers.excel_engine),
+    so only the current chunk of rows is held in memory as Python values.
+    """
+    yield from chunk_rows(get_engine(engine).iter_rows(file, sheet_name), chunk_size)
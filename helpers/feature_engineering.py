@@ -288,6 +288,8 @@
 # feature_engineering_helper_function
 
 from db.config import Database
+from db.catalog import catalog
+from helpers.working_table import materialize_working_table
 import logging
 
 logger = logging.getLogger(__name__)
@@ -306,14 +308,7 @@ def verify_table_exists(table_name):
             
         cursor = conn.cursor()
         
-        cursor.execute("""
-            SELECT EXISTS (
-                SELECT FROM information_schema.tables 
-                WHERE table_name = %s
-            );
-        """, (table_name,))
-        
-        return cursor.fetchone()[0]
+        return catalog.describe(cursor, table_name) is not None
         
     except Exception as e:
         logger.error(f"Error verifying table existence: {str(e)}")
@@ -335,14 +330,14 @@ def get_categorical_columns(table_name):
             
         cursor = conn.cursor()
         
-        cursor.execute("""
-            SELECT column_name, data_type 
-            FROM information_schema.columns 
-            WHERE table_name = %s 
-            AND data_type IN ('character varying', 'text', 'varchar', 'character');
-        """, (table_name,))
-        
-        return [row[0] for row in cursor.fetchall()], None
+        table_info = catalog.describe(cursor, table_name)
+        if table_info is None:
+            return [], None
+
+        return [
+            name for name, data_type in table_info.column_types().items()
+            if data_type in ('character varying', 'text', 'varchar', 'character')
+        ], None
         
     except Exception as e:
         logger.error(f"Error getting categorical columns: {str(e)}")
@@ -364,6 +359,7 @@ def split_categorical_columns(table_name, columns_config):
             return None, "Database connection failed"
             
         cursor = conn.cursor()
+        materialize_working_table(cursor, table_name)
         processed_columns = []
         
         for split_config in columns_config:
@@ -391,7 +387,8 @@ def split_categorical_columns(table_name, columns_config):
                     SET "{new_col}" = TRIM(SPLIT_PART("{column}", %s, {idx}));
                 """, (delimiter,))
         
-        conn.commit()
+        db.commit(conn)
+        catalog.invalidate(table_name)
         return processed_columns, None
         
     except Exception as e:
@@ -459,6 +456,7 @@ def one_hot_encode_columns(table_name, columns):
             return None, "Database connection failed"
 
         cursor = conn.cursor()
+        materialize_working_table(cursor, table_name)
 
         for column in columns:
             # Get unique non-null values from the column
@@ -490,7 +488,8 @@ def one_hot_encode_columns(table_name, columns):
                     END;
                 ''', (value,))
 
-        conn.commit()
+        db.commit(conn)
+        catalog.invalidate(table_name)
         return columns, None
 
     except Exception as e:
@@ -498,10 +497,7 @@ def one_hot_encode_columns(table_name, columns):
         return db.handle_error(conn, e)
 
     finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+        db.close_cursor_and_connection(cursor, conn)
 
 
 def concatenate_columns(table_name, concat_configs):
@@ -516,6 +512,7 @@ def concatenate_columns(table_name, concat_configs):
             return None, "Database connection failed"
             
         cursor = conn.cursor()
+        materialize_working_table(cursor, table_name)
         new_columns = []
         
         for concat_config in concat_configs:
@@ -537,7 +534,8 @@ def concatenate_columns(table_name, concat_configs):
                 SET "{new_column}" = {concat_expr};
             """)
         
-        conn.commit()
+        db.commit(conn)
+        catalog.invalidate(table_name)
         return new_columns, None
         
     except Exception as e:
@@ -64,13 +64,18 @@ def create_feedback_table():
                 timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             );
         """)
-        conn.commit()
+        db.commit(conn)
         return True, None
         
     except Exception as e:
         logger.error(f"Error creating feedback table: {str(e)}")
+        if conn:
+            db.rollback(conn)
         return False, str(e)
 
+    finally:
+        db.close_cursor_and_connection(cursor, conn)
+
 
 def submit_user_feedback(username, feedback, rating):
     """Submit user feedback to the database."""
@@ -96,7 +101,7 @@ def submit_user_feedback(username, feedback, rating):
             "INSERT INTO feedback (username, feedback, rating, timestamp) VALUES (%s, %s, %s, %s);",
             (username, feedback, rating, timestamp)
         )
-        conn.commit()
+        db.commit(conn)
         
         return {"message": "Feedback submitted successfully!"}, None
         
@@ -3,7 +3,11 @@
 from db.config import Database
 import logging
 import pandas as pd
-from io import StringIO
+from helpers.copy_encoder import copy_frame
+from helpers.working_table import materialize_working_table
+from helpers.table_metadata import set_row_count
+from helpers.keyset import ROW_KEY
+from db.catalog import catalog
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.DEBUG)
@@ -106,11 +110,22 @@ def apply_filters_to_table(original_table_name, sheet_name, filters):
             
         cursor = conn.cursor()
 
-        # Get data from the copy table
-        cursor.execute(f'SELECT * FROM "{copy_table_name}";')
-        colnames = [desc[0] for desc in cursor.description]
+        table_info = catalog.describe(cursor, copy_table_name)
+        if table_info is None:
+            return None, f"Table '{copy_table_name}' does not exist"
+
+        # Get data from the copy table; the row key is the index, so it is
+        # written back with the filtered rows but never filtered on or returned
+        colnames = table_info.column_names(include_id=False)
+        has_key = table_info.has_column(ROW_KEY)
+        select_columns = ([ROW_KEY] if has_key else []) + colnames
+        select_list = ', '.join(f'"{col}"' for col in select_columns)
+        order_clause = f' ORDER BY "{ROW_KEY}"' if has_key else ''
+        cursor.execute(f'SELECT {select_list} FROM "{copy_table_name}"{order_clause};')
         rows = cursor.fetchall()
-        df = pd.DataFrame(rows, columns=colnames)
+        df = pd.DataFrame(rows, columns=select_columns)
+        if has_key:
+            df = df.set_index(ROW_KEY)
         logger.info(f"Original data shape: {df.shape}")
         
         # Convert numeric columns
@@ -128,12 +143,11 @@ def apply_filters_to_table(original_table_name, sheet_name, filters):
             }, None
 
         # Update the copy table with filtered data
-        cursor.execute(f'TRUNCATE TABLE "{copy_table_name}";')
-        output = StringIO()
-        filtered_df.to_csv(output, index=False, header=False)
-        output.seek(0)
-        cursor.copy_expert(f'COPY "{copy_table_name}" FROM STDIN WITH (FORMAT csv)', output)
-        conn.commit()
+        if not materialize_working_table(cursor, copy_table_name, with_data=False):
+            cursor.execute(f'TRUNCATE TABLE "{copy_table_name}";')
+        copy_frame(cursor, copy_table_name, filtered_df.reset_index() if has_key else filtered_df)
+        set_row_count(cursor, copy_table_name, len(filtered_df))
+        db.commit(conn)
         
         result = filtered_df.to_dict(orient='records')
         return {
@@ -1,5 +1,9 @@
 import pandas as pd
 from db.config import Database
+from db.catalog import catalog
+from helpers.working_table import drop_working_table, scratch_table_clause, add_row_key
+from helpers.table_metadata import set_row_count
+from helpers.keyset import ROW_KEY
 from io import StringIO
 import logging
 import csv
@@ -24,38 +28,32 @@ def get_table_data(table_name):
         logger.info(f"Attempting to find table: {table_name}")
         
         # Check if table exists (case-insensitive)
-        cursor.execute("""
-            SELECT table_name 
-            FROM information_schema.tables 
-            WHERE table_name ILIKE %s
-            AND table_schema NOT IN ('pg_catalog', 'information_schema');
-        """, (table_name,))
-        
-        result = cursor.fetchone()
-        if not result:
+        table_info = catalog.find(cursor, [table_name, table_name.lower()])
+        if table_info is None:
             raise Exception(f"Table '{table_name}' does not exist")
             
         # Use the actual table name from the database
-        actual_table_name = result[0]
+        actual_table_name = table_info.name
         
         logger.info(f"Requested table name: {table_name}")
         logger.info(f"Actual table name in database: {actual_table_name}")
         
         # Get column types
-        cursor.execute("""
-            SELECT column_name, data_type 
-            FROM information_schema.columns 
-            WHERE table_name = %s;
-        """, (actual_table_name,))
-        column_types = {col: dtype for col, dtype in cursor.fetchall()}
+        column_types = table_info.column_types()
         logger.debug(f"Column types: {column_types}")
         
-        # Get data
-        cursor.execute(f'SELECT * FROM "{actual_table_name}"')
+        # Get data; the row key becomes the index so fills never see it as a column
+        columns = table_info.column_names(include_id=False)
+        has_key = table_info.has_column(ROW_KEY)
+        select_columns = ([ROW_KEY] if has_key else []) + columns
+        select_list = ', '.join(f'"{col}"' for col in select_columns)
+        order_clause = f' ORDER BY "{ROW_KEY}"' if has_key else ''
+        cursor.execute(f'SELECT {select_list} FROM "{actual_table_name}"{order_clause}')
         data = cursor.fetchall()
-        columns = [desc[0] for desc in cursor.description]
-        
-        df = pd.DataFrame(data, columns=columns)
+
+        df = pd.DataFrame(data, columns=select_columns)
+        if has_key:
+            df = df.set_index(ROW_KEY)
         logger.info(f"Retrieved {len(df)} rows from table")
         
         return df, actual_table_name, column_types
@@ -83,13 +81,15 @@ def update_table_data(df, table_name, column_types):
         cursor.execute(f'DROP TABLE IF EXISTS "{temp_table}"')
         
         # Create columns
-        columns = [f'"{col}" {column_types.get(col, "TEXT")}' for col in df.columns]
-        create_query = f'CREATE TABLE "{temp_table}" ({", ".join(columns)})'
+        write_columns = ([ROW_KEY] if df.index.name == ROW_KEY else []) + list(df.columns)
+        columns = [f'"{col}" {column_types.get(col, "TEXT")}' for col in write_columns]
+        create_query = f'CREATE {scratch_table_clause()}TABLE "{temp_table}" ({", ".join(columns)})'
         cursor.execute(create_query)
         
         # Convert DataFrame to native Python types
         # This is crucial for handling numpy types like int64, float64, etc.
-        df_copy = df.copy()
+        # A row key index from get_table_data is written back as the id column.
+        df_copy = df.reset_index() if df.index.name == ROW_KEY else df.copy()
         
         # Convert all numpy int and float types to Python native types
         for col in df_copy.select_dtypes(include=['int', 'float']).columns:
@@ -112,14 +112,17 @@ def update_table_data(df, table_name, column_types):
         # Swap tables
         cursor.execute(f'DROP TABLE IF EXISTS "{table_name}"')
         cursor.execute(f'ALTER TABLE "{temp_table}" RENAME TO "{table_name}"')
+        add_row_key(cursor, table_name)
+        set_row_count(cursor, table_name, len(data_tuples))
         
-        conn.commit()   
+        db.commit(conn)
+        catalog.invalidate(table_name, temp_table)
         return True
         
     except Exception as e:
         logger.error(f"Error in update_table_data: {str(e)}")
         if conn:
-            conn.rollback()
+            db.rollback(conn)
         raise e
     finally:
         db.close_cursor_and_connection(cursor, conn)
@@ -138,23 +141,30 @@ def get_column_types(df):
 
 
 def handle_missing_data(table_name, columns, action, method=None):
+    db = Database()
+    conn = None
+    cursor = None
+
     try:
         logger.info(f"Handling missing data for table: {table_name}")
 
-        db = Database()
         conn = db.get_db_connection()
+        if not conn:
+            return None, "Database connection failed"
+
         cursor = conn.cursor()
 
         
         copy_table_name = f"{table_name}_copy"
 
        
-        cursor.execute(f'DROP TABLE IF EXISTS "{copy_table_name}"')
+        drop_working_table(cursor, copy_table_name)
 
         
-        cursor.execute(f'CREATE TABLE "{copy_table_name}" AS TABLE "{table_name}"')
+        cursor.execute(f'CREATE {scratch_table_clause()}TABLE "{copy_table_name}" AS TABLE "{table_name}"')
 
-        conn.commit() 
+        db.commit(conn)
+        catalog.invalidate(copy_table_name)
 
        
         df, actual_table_name, column_types = get_table_data(copy_table_name)
@@ -228,9 +238,6 @@ def handle_missing_data(table_name, columns, action, method=None):
         logger.error(f"Error handling missing data: {str(e)}")
         return None, str(e)
     finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+        db.close_cursor_and_connection(cursor, conn)
 
     
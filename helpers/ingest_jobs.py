@@ -0,0 +1,316 @@
+# ingest_jobs_helper_function
+
+import os
+import re
+import json
+import time
+import uuid
+import logging
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from psycopg2 import errors
+
+from db.config import Database
+from db.catalog import catalog
+from helpers.excel_stream import iter_sheet_chunks
+from helpers.upload_staging import open_staged
+from helpers.upload_insert_data import stream_chunks_into_table, copy_delimited_into_table, UPLOAD_CHUNK_ROWS
+from helpers.delimited_ingest import is_delimited
+from helpers.working_table import create_working_table
+from helpers.table_metadata import record_loaded_table
+from helpers.upload_spool import map_upload
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.DEBUG)
+
+# Job state lives in JSON files so any gunicorn worker on the host can
+# report progress or cancel a job running in another worker.
+JOB_DIR = os.getenv('UPLOAD_JOB_DIR', os.path.join(tempfile.gettempdir(), 'eda_ingest_jobs'))
+JOB_WORKERS = int(os.getenv('UPLOAD_JOB_WORKERS', 2))
+JOB_TTL = float(os.getenv('UPLOAD_JOB_TTL', 24 * 3600))
+# A queued or running job whose process has not shown signs of life for
+# this many seconds (worker killed, host restarted) is reported as failed.
+JOB_STALE_SECONDS = float(os.getenv('UPLOAD_JOB_STALE_SECONDS', 120))
+CANCEL_POLL_SECONDS = 0.5
+HEARTBEAT_SECONDS = 5.0
+
+FINISHED = ('done', 'failed', 'cancelled')
+
+_JOB_ID_RE = re.compile(r'^[0-9a-f]{32}$')
+
+_executor = None
+_executor_lock = threading.Lock()
+# job_id -> connection of the jobs running in this process, for the watcher.
+_running = {}
+# Unfinished jobs submitted in this process; the watcher keeps their heartbeat.
+_local_jobs = set()
+_watcher = None
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def _state_path(job_id):
+    return os.path.join(JOB_DIR, f"{job_id}.json")
+
+
+def _cancel_path(job_id):
+    return os.path.join(JOB_DIR, f"{job_id}.cancel")
+
+
+def _heartbeat_path(job_id):
+    return os.path.join(JOB_DIR, f"{job_id}.heartbeat")
+
+
+def _touch_heartbeat(job_id):
+    with open(_heartbeat_path(job_id), 'a'):
+        pass
+    os.utime(_heartbeat_path(job_id))
+
+
+def _last_seen(state):
+    """Latest sign of life of a job: its last state write or heartbeat."""
+    try:
+        heartbeat = os.path.getmtime(_heartbeat_path(state['jobId']))
+    except FileNotFoundError:
+        heartbeat = 0
+    return max(state.get('updatedAt', 0), heartbeat)
+
+
+def _write_state(state):
+    state['updatedAt'] = time.time()
+    tmp_path = f"{_state_path(state['jobId'])}.{os.getpid()}.{threading.get_ident()}.part"
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, _state_path(state['jobId']))
+
+
+def _cancel_requested(job_id):
+    return os.path.exists(_cancel_path(job_id))
+
+
+def get_job(job_id, owner=None):
+    """
+    Return the job's state dict, or None if it is unknown or belongs to
+    another user. A job whose process stopped heartbeating is marked failed.
+    """
+    if not job_id or not _JOB_ID_RE.match(job_id):
+        return None
+    try:
+        with open(_state_path(job_id)) as f:
+            state = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    if state.get('owner') and owner != state['owner']:
+        return None
+
+    if state['status'] not in FINISHED and time.time() - _last_seen(state) > JOB_STALE_SECONDS:
+        logger.warning(f"Ingest job {job_id} lost its process (pid {state.get('pid')})")
+        state.update(status='failed', phase='failed',
+                     error=f"Import process {state.get('pid')} stopped responding")
+        _write_state(state)
+
+    state.pop('owner', None)
+    state['cancelRequested'] = _cancel_requested(job_id)
+    return state
+
+
+def cancel_job(job_id, owner=None):
+    """
+    Ask a job to stop. The process running it aborts its in-flight COPY
+    server-side and rolls the load back.
+
+    Returns:
+        tuple: (state, error)
+    """
+    state = get_job(job_id, owner)
+    if state is None:
+        return None, "Job not found"
+    if state['status'] in FINISHED:
+        return state, None
+
+    with open(_cancel_path(job_id), 'w') as f:
+        f.write(str(time.time()))
+    state['cancelRequested'] = True
+    return state, None
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix='ingest-job')
+        return _executor
+
+
+def _watch_cancellations():
+    """
+    Cancel the running statement of local jobs whose cancel flag appeared,
+    and keep the heartbeat of local unfinished jobs fresh.
+    """
+    last_heartbeat = 0
+    while True:
+        time.sleep(CANCEL_POLL_SECONDS)
+        if time.monotonic() - last_heartbeat >= HEARTBEAT_SECONDS:
+            last_heartbeat = time.monotonic()
+            for job_id in list(_local_jobs):
+                try:
+                    _touch_heartbeat(job_id)
+                except OSError as e:
+                    logger.error(f"Error writing heartbeat of job {job_id}: {str(e)}")
+        for job_id, conn in list(_running.items()):
+            if _cancel_requested(job_id) and not conn.closed:
+                logger.info(f"Cancelling ingest job {job_id}")
+                try:
+                    conn.cancel()
+                except Exception as e:
+                    logger.error(f"Error cancelling job {job_id}: {str(e)}")
+
+
+def _ensure_watcher():
+    global _watcher
+    with _executor_lock:
+        if _watcher is None or not _watcher.is_alive():
+            _watcher = threading.Thread(target=_watch_cancellations, name='ingest-job-cancel', daemon=True)
+            _watcher.start()
+
+
+def evict_jobs(now=None):
+    """Delete state files of jobs that finished more than UPLOAD_JOB_TTL ago."""
+    now = time.time() if now is None else now
+    try:
+        names = os.listdir(JOB_DIR)
+    except FileNotFoundError:
+        return
+    for name in names:
+        path = os.path.join(JOB_DIR, name)
+        try:
+            if now - os.path.getmtime(path) > JOB_TTL:
+                os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def submit_ingest_job(staging_token, filename, sheetname, original_table_name, copy_table_name,
+                      owner=None, fingerprint=None):
+    """
+    Queue the load of a staged upload and return its initial state.
+
+    The whole load (DROP, CREATE, COPY chunks, copy table) runs in one
+    transaction on a dedicated pooled connection, so a failed or cancelled
+    job leaves no partial tables behind.
+    """
+    os.makedirs(JOB_DIR, exist_ok=True)
+    evict_jobs()
+
+    state = {
+        'jobId': uuid.uuid4().hex,
+        'status': 'queued',
+        'phase': 'queued',
+        'fileName': filename,
+        'sheetName': sheetname,
+        'tableName': original_table_name,
+        'rowsParsed': 0,
+        'rowsCopied': 0,
+        'error': None,
+        'createdAt': time.time(),
+        'pid': os.getpid(),
+        'owner': owner,
+    }
+    _write_state(state)
+    _touch_heartbeat(state['jobId'])
+    _local_jobs.add(state['jobId'])
+    _ensure_watcher()
+    _get_executor().submit(_run_job, dict(state), staging_token, original_table_name, copy_table_name,
+                           owner, fingerprint)
+    return state
+
+
+def _run_job(state, staging_token, original_table_name, copy_table_name, owner=None, fingerprint=None):
+    job_id = state['jobId']
+
+    def update(**changes):
+        state.update(changes)
+        _write_state(state)
+
+    def progress(rows_parsed, rows_copied):
+        if _cancel_requested(job_id):
+            raise JobCancelled()
+        update(rowsParsed=rows_parsed, rowsCopied=rows_copied)
+        # Under gevent this thread is a greenlet; let requests run between chunks.
+        time.sleep(0)
+
+    try:
+        _load_job(state, update, progress, staging_token, original_table_name, copy_table_name,
+                  owner, fingerprint)
+    finally:
+        _local_jobs.discard(job_id)
+
+
+def _load_job(state, update, progress, staging_token, original_table_name, copy_table_name,
+              owner=None, fingerprint=None):
+    job_id = state['jobId']
+    sheetname = state['sheetName']
+
+    if _cancel_requested(job_id):
+        update(status='cancelled', phase='cancelled')
+        return
+
+    staged = open_staged(staging_token)
+    if staged is None:
+        update(status='failed', phase='failed', error='Staged upload not found or expired')
+        return
+
+    db = Database()
+    delimited = is_delimited(state['fileName'])
+    mapped = None if delimited else map_upload(staged)
+    try:
+        update(status='running', phase='loading')
+        with db.connection() as conn:
+            _running[job_id] = conn
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute(f"DROP TABLE IF EXISTS {original_table_name} CASCADE;")
+                    if delimited:
+                        total_rows = copy_delimited_into_table(
+                            cursor, staged, state['fileName'], original_table_name, progress=progress)
+                    else:
+                        def read_chunks():
+                            return iter_sheet_chunks(mapped or staged, sheetname, UPLOAD_CHUNK_ROWS)
+                        total_rows = stream_chunks_into_table(
+                            cursor, read_chunks(), sheetname, original_table_name, progress=progress,
+                            reread=read_chunks)
+                    record_loaded_table(cursor, original_table_name, owner, fingerprint, sheetname, total_rows)
+
+                    update(phase='creating_copy')
+                    create_working_table(cursor, original_table_name, copy_table_name)
+                    if _cancel_requested(job_id):
+                        raise JobCancelled()
+
+                update(phase='committing')
+                conn.commit()
+            finally:
+                _running.pop(job_id, None)
+
+        catalog.invalidate(original_table_name, copy_table_name)
+        update(status='done', phase='done', rowsCopied=total_rows)
+        logger.info(f"Ingest job {job_id} finished: {total_rows} rows into {original_table_name}")
+
+    except (JobCancelled, errors.QueryCanceled) as e:
+        if _cancel_requested(job_id):
+            update(status='cancelled', phase='cancelled')
+            logger.info(f"Ingest job {job_id} cancelled, load rolled back")
+        else:
+            update(status='failed', phase='failed', error=str(e))
+
+    except Exception as e:
+        logger.error(f"Ingest job {job_id} failed: {str(e)}")
+        update(status='failed', phase='failed', error=str(e))
+
+    finally:
+        if mapped is not None:
+            mapped.close()
+        staged.close()
@@ -0,0 +1,81 @@
+# keyset_pagination_helper_function
+
+import json
+import base64
+import logging
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.DEBUG)
+
+# Indexed row key every original and working table carries; pages are
+# read in its order.
+ROW_KEY = 'id'
+
+# Shapes of a page: 'rows' (list of rows) or 'columnar' (one list per column).
+RESPONSE_FORMATS = ('rows', 'columnar')
+
+
+def encode_after(key):
+    """Opaque ``after`` token for the row key of the last row of a page."""
+    return base64.urlsafe_b64encode(json.dumps([key]).encode()).decode().rstrip('=')
+
+
+def decode_after(token):
+    """Row key inside an ``after`` token; ValueError if it is not a valid token."""
+    try:
+        value = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid 'after' token")
+    if not (isinstance(value, list) and len(value) == 1
+            and isinstance(value[0], int) and not isinstance(value[0], bool)):
+        raise ValueError("Invalid 'after' token")
+    return value[0]
+
+
+def to_columnar(rows, width, skip=0):
+    """
+    Transpose cursor tuples into one list per column, dropping the first
+    ``skip`` columns; no per-row object is built.
+    """
+    if not rows:
+        return [[] for _ in range(width)]
+    return [list(values) for values in zip(*rows)][skip:]
+
+
+def fetch_page(cursor, table_name, columns, page_size, page=0, after=None, keyed=True, columnar=False):
+    """
+    Read one page of ``columns`` in row key order.
+
+    With ``after`` (a decoded token) the page starts right after that key
+    through the primary key index, so any page costs the same as the
+    first; otherwise it is found with OFFSET ``page * page_size``. Tables
+    without the row key (``keyed=False``) only support OFFSET paging.
+
+    Returns:
+        tuple: (rows as lists, or one list per column with ``columnar``,
+        token for the next page or None on the last page)
+    """
+    column_list = ', '.join(f'"{col}"' for col in columns)
+
+    if not keyed:
+        if after is not None:
+            raise ValueError(f"Table {table_name} has no row key, page it with 'page' instead of 'after'")
+        cursor.execute(f'SELECT {column_list} FROM "{table_name}" LIMIT %s OFFSET %s;',
+                       (page_size, page * page_size))
+        rows = cursor.fetchall()
+        return (to_columnar(rows, len(columns)) if columnar else [list(row) for row in rows]), None
+
+    select = f'SELECT "{ROW_KEY}"{", " + column_list if column_list else ""} FROM "{table_name}"'
+    # One extra row tells whether a next page exists.
+    if after is not None:
+        cursor.execute(f'{select} WHERE "{ROW_KEY}" > %s ORDER BY "{ROW_KEY}" LIMIT %s;',
+                       (after, page_size + 1))
+    else:
+        cursor.execute(f'{select} ORDER BY "{ROW_KEY}" LIMIT %s OFFSET %s;',
+                       (page_size + 1, page * page_size))
+    rows = cursor.fetchall()
+
+    next_after = encode_after(rows[page_size - 1][0]) if 0 < page_size < len(rows) else None
+    if columnar:
+        return to_columnar(rows[:page_size], len(columns), skip=1), next_after
+    return [list(row[1:]) for row in rows[:page_size]], next_after
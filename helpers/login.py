@@ -41,7 +41,7 @@ def authenticate_user(username, password):
             VALUES (%s, %s)
         """, (session_id, user['id']))
 
-        conn.commit()
+        db.commit(conn)
         
         # Generate JWT token
         token = jwt.encode({
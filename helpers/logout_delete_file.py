@@ -1,6 +1,8 @@
 # logout_delete_file_helper_function
 
 from db.config import Database
+from db.catalog import catalog
+from helpers.table_metadata import forget_tables
 import logging
 from io import StringIO
 
@@ -23,33 +25,44 @@ def delete_data_from_table(table_name, sheet_names):
 
         # Query to find tables matching the pattern
         query = """
-            SELECT table_name
-            FROM information_schema.tables
-            WHERE table_name LIKE %s
-            AND table_schema NOT IN ('pg_catalog', 'information_schema')
+            SELECT c.relname, c.relkind
+            FROM pg_catalog.pg_class c
+            WHERE c.relname LIKE %s
+            AND c.relkind IN ('r', 'p', 'v', 'm', 'f')
+            AND pg_catalog.pg_table_is_visible(c.oid)
         """
         cursor.execute(query, (f"{table_name}%",))  # Use a wildcard for matching tables starting with `table_name`
         tables_to_drop = cursor.fetchall()
         logger.info(f"Found tables to drop: {tables_to_drop}")
 
         if tables_to_drop:
-            # Use StringIO to construct the DROP TABLE query efficiently
-            query_builder = StringIO()
-            query_builder.write("DROP TABLE IF EXISTS ")
+            # Lazy working copies are views: DROP TABLE rejects them, so drop
+            # views first and then the tables they were reading from.
+            views = [row[0] for row in tables_to_drop if row[1] == 'v']
+            tables = [row[0] for row in tables_to_drop if row[1] != 'v']
 
-            # Collect all table names in the query
-            for i, row in enumerate(tables_to_drop):
-                table_name_with_sheet = row[0]
-                query_builder.write(f'"{table_name_with_sheet}"')  # Quote table names for safety
-                if i < len(tables_to_drop) - 1:
-                    query_builder.write(", ")  # Add a comma between table names if it's not the last one
-            
-            # Convert the StringIO content to a string
-            drop_query = query_builder.getvalue()
+            for statement, names in (("DROP VIEW IF EXISTS ", views), ("DROP TABLE IF EXISTS ", tables)):
+                if not names:
+                    continue
+                # Use StringIO to construct the DROP query efficiently
+                query_builder = StringIO()
+                query_builder.write(statement)
+
+                # Collect all table names in the query
+                for i, name in enumerate(names):
+                    query_builder.write(f'"{name}"')  # Quote table names for safety
+                    if i < len(names) - 1:
+                        query_builder.write(", ")  # Add a comma between table names if it's not the last one
+
+                # Convert the StringIO content to a string
+                drop_query = query_builder.getvalue()
+
+                logger.info(f"Executing drop query: {drop_query}")
+                cursor.execute(drop_query)
 
-            logger.info(f"Executing drop query: {drop_query}")
-            cursor.execute(drop_query)
-            conn.commit()
+            forget_tables(cursor, views + tables)
+            db.commit(conn)
+            catalog.invalidate(*[row[0] for row in tables_to_drop])
 
             logger.info(f"All tables starting with {table_name} have been dropped.")
             return True
@@ -60,7 +73,7 @@ def delete_data_from_table(table_name, sheet_names):
     except Exception as e:
         logger.error(f"Error deleting tables for {table_name}: {str(e)}")
         if conn:
-            conn.rollback()
+            db.rollback(conn)
         return False
         
     finally:
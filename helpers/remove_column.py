@@ -1,6 +1,8 @@
 #remove_column_helper_function
 
 from db.config import Database
+from db.catalog import catalog
+from helpers.working_table import materialize_working_table
 import logging
 
 logger = logging.getLogger(__name__)
@@ -9,16 +11,8 @@ logging.basicConfig(level=logging.DEBUG)
 def get_remaining_columns(table_name, cursor, schema='postgres'):
     """Fetch remaining columns from the specified table and schema."""
     try:
-        cursor.execute("""
-            SELECT column_name 
-            FROM information_schema.columns 
-            WHERE table_name = %s 
-            AND table_schema = %s
-            AND column_name != 'id'
-            ORDER BY ordinal_position;
-        """, (table_name, schema))
-        
-        columns = [row[0] for row in cursor.fetchall()]
+        table_info = catalog.describe(cursor, table_name)
+        columns = table_info.column_names(include_id=False) if table_info else []
         return {"columns": columns}
     except Exception as e:
         logger.error(f"Error fetching columns: {e}")
@@ -36,13 +30,16 @@ def get_remaining_columns(table_name, cursor, schema='postgres'):
 
 def verify_table_exists(cursor, table_name):
     """Verify if the table exists and return all available tables if it doesn't."""
+    if catalog.describe(cursor, table_name) is not None:
+        return True, [table_name]
+
     cursor.execute("""
         SELECT table_name 
         FROM information_schema.tables 
         WHERE table_schema = 'postgres';
     """)
     available_tables = [row[0] for row in cursor.fetchall()]
-    return table_name in available_tables, available_tables
+    return False, available_tables
 
 def remove_columns(original_table_name, sheet_name, columns_to_remove):
     """Remove specified columns from a table."""
@@ -70,15 +67,18 @@ def remove_columns(original_table_name, sheet_name, columns_to_remove):
         if not table_exists:
             return None, f"Table '{table_name}' does not exist."
 
+        materialize_working_table(cursor, table_name)
+
         # Construct the SQL command to remove columns
         for column in columns_to_remove:
             logger.info(f"Attempting to remove column: {column}")
             cursor.execute(f'ALTER TABLE "{table_name}" DROP COLUMN IF EXISTS "{column}";')
+        catalog.invalidate(table_name)
 
         # Get remaining columns
         remaining_columns = get_remaining_columns(table_name, cursor)
 
-        conn.commit()
+        db.commit(conn)
         return {
             "message": "Columns removed successfully",
             "remaining_columns": remaining_columns["columns"]
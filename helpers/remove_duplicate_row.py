@@ -2,7 +2,9 @@
 
 from db.config import Database
 import pandas as pd
-from io import StringIO
+from helpers.copy_encoder import copy_frame
+from helpers.working_table import materialize_working_table
+from helpers.table_metadata import set_row_count
 
 def remove_duplicates_from_table(table_name, duplicate_columns):
     db = Database()
@@ -25,12 +27,11 @@ def remove_duplicates_from_table(table_name, duplicate_columns):
         df_deduped = df.drop_duplicates(subset=duplicate_columns, keep='first')
 
         # Clear table and insert deduplicated data
-        cursor.execute(f'TRUNCATE TABLE "{table_name}";')
-        output = StringIO()
-        df_deduped.to_csv(output, index=False, header=False)
-        output.seek(0)
-        cursor.copy_expert(f'COPY "{table_name}" FROM STDIN WITH (FORMAT csv)', output)
-        conn.commit()
+        if not materialize_working_table(cursor, table_name, with_data=False):
+            cursor.execute(f'TRUNCATE TABLE "{table_name}";')
+        copy_frame(cursor, table_name, df_deduped)
+        set_row_count(cursor, table_name, len(df_deduped))
+        db.commit(conn)
         cursor.close()
         
         return {
@@ -1,4 +1,6 @@
 from db.config import Database
+from db.catalog import catalog
+from helpers.working_table import materialize_working_table
 import logging
 
 logger = logging.getLogger(__name__)
@@ -20,28 +22,28 @@ def rename_columns_in_copy(table_name, sheet_name, column_mappings):
         copy_table = f"{table_name}_{sheet_name}_copy"  # Copy table name
 
         # Check existing columns in the copy table
-        cursor.execute("""
-            SELECT column_name FROM information_schema.columns 
-            WHERE table_name = %s
-        """, (copy_table,))
-        columns = [row[0] for row in cursor.fetchall()]
+        table_info = catalog.describe(cursor, copy_table)
+        columns = table_info.column_names() if table_info else []
 
         # Validate columns
         for old_column in column_mappings.keys():
             if old_column not in columns:
                 return {"error": f"Column '{old_column}' not found in table '{copy_table}'"}
 
+        materialize_working_table(cursor, copy_table)
+
         # Rename each column
         for old_column, new_column in column_mappings.items():
             cursor.execute(f'ALTER TABLE "{copy_table}" RENAME COLUMN "{old_column}" TO "{new_column}"')
 
-        conn.commit()
+        db.commit(conn)
+        catalog.invalidate(copy_table)
         return {"message": f"Columns renamed successfully in copy table '{copy_table}'"}
 
     except Exception as e:
         logger.error(f"Error renaming columns: {str(e)}")
         if conn:
-            conn.rollback()
+            db.rollback(conn)
         return {"error": str(e)}
 
     finally:
@@ -1,6 +1,9 @@
 # rollback_helper_function
 
 from db.config import Database
+from db.catalog import catalog
+from helpers.working_table import lazy_mode, reset_working_table, add_row_key
+from helpers.table_metadata import set_row_count
 import logging
 
 logger = logging.getLogger(__name__)
@@ -9,38 +12,34 @@ logging.basicConfig(level=logging.DEBUG)
 def sync_table_structure(cursor, original_table, copy_table):
     """Synchronize the structure of the copy table with the original table."""
     try:
-        # Get original table structure
-        cursor.execute("""
-            SELECT column_name, data_type
-            FROM information_schema.columns
-            WHERE table_name = %s
-            ORDER BY ordinal_position
-        """, (original_table,))
-        original_columns = cursor.fetchall()
+        # Get original and copy table structure in one catalog lookup each
+        original_info = catalog.describe(cursor, original_table)
+        copy_info = catalog.describe(cursor, copy_table)
+        if original_info is None:
+            raise Exception(f"Table '{original_table}' does not exist")
+        if copy_info is None:
+            raise Exception(f"Table '{copy_table}' does not exist")
+
+        original_columns = [(name, data_type) for name, data_type, _ in original_info.columns]
+        copy_column_types = copy_info.column_types()
         
         # Create dictionary of column types
-        original_column_types = {col[0]: col[1] for col in original_columns}
+        original_column_types = dict(original_columns)
         
         # Add or modify columns in copy table
         for column_name, data_type in original_columns:
             column_name_quoted = '"{}"'.format(column_name.replace('"', '""'))
+            copy_column_type = copy_column_types.get(column_name)
 
-            
             # Add column if it doesn't exist
-            cursor.execute(f"""
-                ALTER TABLE {copy_table}
-                ADD COLUMN IF NOT EXISTS {column_name_quoted} {data_type};
-            """)
-            
-            # Check and update column type if necessary
-            cursor.execute("""
-                SELECT data_type
-                FROM information_schema.columns
-                WHERE table_name = %s AND column_name = %s
-            """, (copy_table, column_name))
-            copy_column_type = cursor.fetchone()
+            if copy_column_type is None:
+                cursor.execute(f"""
+                    ALTER TABLE {copy_table}
+                    ADD COLUMN IF NOT EXISTS {column_name_quoted} {data_type};
+                """)
             
-            if copy_column_type and copy_column_type[0] != data_type:
+            # Update column type if necessary
+            elif copy_column_type != data_type:
                 cursor.execute(f"""
                     ALTER TABLE {copy_table}
                     ALTER COLUMN {column_name_quoted} TYPE {data_type}
@@ -48,18 +47,12 @@ def sync_table_structure(cursor, original_table, copy_table):
                 """)
         
         # Remove extra columns from copy table
-        cursor.execute("""
-            SELECT column_name
-            FROM information_schema.columns
-            WHERE table_name = %s
-        """, (copy_table,))
-        copy_columns = [col[0] for col in cursor.fetchall()]
-        
-        for column_name in copy_columns:
+        for column_name in copy_column_types:
             if column_name not in original_column_types:
                 column_name_quoted = '"{}"'.format(column_name.replace('"', '""'))
                 cursor.execute(f"ALTER TABLE {copy_table} DROP COLUMN IF EXISTS {column_name_quoted};")
-                
+
+        catalog.invalidate(copy_table)
         return True
     except Exception as e:
         logger.error(f"Error in sync_table_structure: {str(e)}")
@@ -72,14 +65,8 @@ def sync_data_from_original_to_copy(cursor, original_table, copy_table):
         cursor.execute(f"TRUNCATE TABLE {copy_table}")
         
         # Get column names
-        cursor.execute("""
-            SELECT column_name
-            FROM information_schema.columns
-            WHERE table_name = %s
-            ORDER BY ordinal_position
-        """, (original_table,))
-        
-        columns = [row[0] for row in cursor.fetchall()]
+        original_info = catalog.describe(cursor, original_table)
+        columns = original_info.column_names() if original_info else []
         logger.debug(f"Columns to sync: {columns}")
         
         column_str = ', '.join(f'"{col}"' for col in columns)
@@ -90,6 +77,7 @@ def sync_data_from_original_to_copy(cursor, original_table, copy_table):
                 INSERT INTO {copy_table} ({column_str})
                 SELECT {column_str} FROM {original_table}
             """)
+            set_row_count(cursor, copy_table, cursor.rowcount)
         
         return True
         
@@ -116,12 +104,19 @@ def sync_tables(table_name, sheet_name):
             
         cursor = conn.cursor()
         
-        # Sync table structure and data
-        sync_table_structure(cursor, original_table, copy_table)
-        sync_data_from_original_to_copy(cursor, original_table, copy_table)
+        copy_info = catalog.describe(cursor, copy_table)
+        if lazy_mode() or (copy_info is not None and copy_info.is_view):
+            # Copy-on-write copies are reset by pointing them back at the original
+            reset_working_table(cursor, original_table, copy_table)
+        else:
+            # Sync table structure and data
+            sync_table_structure(cursor, original_table, copy_table)
+            sync_data_from_original_to_copy(cursor, original_table, copy_table)
+            # Copies made before they kept their row key get it back here
+            add_row_key(cursor, copy_table)
         
         # Commit changes
-        conn.commit()
+        db.commit(conn)
         
         return {
             "status": "success",
@@ -0,0 +1,108 @@
+# sheet_preview_helper_function
+
+import os
+import time
+import zipfile
+import logging
+
+import pandas as pd
+
+from helpers.xlsx_reader import index_archive, iter_sheet_rows
+from helpers.excel_stream import chunk_rows
+from helpers.delimited_ingest import DELIMITED_SHEET_NAME, is_delimited, sample_delimited, infer_delimited_types
+from helpers.upload_insert_data import infer_frame_types
+from helpers.upload_spool import map_upload
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.DEBUG)
+
+# Rows returned by a preview when the request does not ask for a number,
+# and the most it may ask for.
+PREVIEW_ROWS = int(os.getenv('PREVIEW_ROWS', 20))
+PREVIEW_MAX_ROWS = int(os.getenv('PREVIEW_MAX_ROWS', 1000))
+
+
+def _sheet_head(source, sheet_name, limit):
+    """
+    Header and first ``limit`` rows of a worksheet.
+
+    Rows come from helpers.xlsx_reader with lazily parsed shared strings,
+    so parsing stops after those rows: the rest of the sheet XML and of
+    the shared strings table is never read.
+    """
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    with zipfile.ZipFile(source) as archive:
+        index = index_archive(archive, lazy_strings=True)
+        if sheet_name not in index.sheets:
+            index.shared_strings.close()
+            raise ValueError(f"Worksheet named '{sheet_name}' not found")
+
+        rows = iter_sheet_rows(archive, index.sheets[sheet_name], index)
+        chunks = chunk_rows(rows, limit)
+        try:
+            for header, chunk in chunks:
+                return header, chunk
+            return [], []
+        finally:
+            # Close the generators while the zip member is still open.
+            chunks.close()
+            rows.close()
+            index.shared_strings.close()
+
+
+def _json_rows(df):
+    """DataFrame rows as lists of JSON-ready values; NaN/NaT become None."""
+    return df.astype(object).where(df.notna(), None).values.tolist()
+
+
+def preview_sheet(file, sheet_name, limit=None):
+    """
+    First rows of an uploaded sheet and the column types an import would
+    use, read straight from the file without touching the database.
+
+    Types are inferred from the returned rows only, so parsing stops right
+    after them; the import looks at up to INFERENCE_SAMPLE_ROWS rows and
+    may pick a wider type. Ask for more rows for a closer match.
+
+    Returns:
+        tuple: ({sheetName, columns, types, rows, elapsedMs}, error)
+    """
+    limit = limit or PREVIEW_ROWS
+    started = time.perf_counter()
+    mapped = None
+
+    try:
+        if is_delimited(file.filename or ''):
+            sheet_name = DELIMITED_SHEET_NAME
+            header, sample = sample_delimited(file, file.filename, sample_rows=limit)
+            sql_types = infer_delimited_types(header, sample)
+            width = len(header)
+            # Only empty fields load as NULL, the rest is parsed by COPY.
+            rows = [[value if value != '' else None for value in row[:width]] + [None] * (width - len(row))
+                    for row in sample]
+        else:
+            mapped = map_upload(file)
+            header, sample = _sheet_head(mapped or file, sheet_name, limit)
+            header = ['ID' if col == 'id' else col for col in header]
+            df, column_types = infer_frame_types(pd.DataFrame(sample, columns=header))
+            sql_types = {col: column_types[col].sql_type for col in header}
+            rows = _json_rows(df)
+
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+        logger.info(f"Previewed {len(rows)} rows of sheet {sheet_name} in {elapsed_ms} ms")
+        return {
+            'sheetName': sheet_name,
+            'columns': header,
+            'types': sql_types,
+            'rows': rows,
+            'elapsedMs': elapsed_ms,
+        }, None
+
+    except Exception as e:
+        logger.error(f"Error previewing sheet {sheet_name}: {str(e)}")
+        return None, str(e)
+
+    finally:
+        if mapped is not None:
+            mapped.close()
@@ -140,6 +140,8 @@
 #pre_stats_helper_function
 
 from db.config import Database
+from db.catalog import catalog
+from helpers.table_metadata import table_row_count
 import logging
 
 logger = logging.getLogger(__name__)
@@ -164,30 +166,15 @@ def get_table_statistics(filename, sheet_name):
         cursor = conn.cursor()
  
         # Check if table exists
-        cursor.execute("""
-            SELECT EXISTS (
-                SELECT FROM information_schema.tables
-                WHERE table_name = %s
-            );
-        """, (table_name,))
-       
-        if not cursor.fetchone()[0]:
+        table_info = catalog.describe(cursor, table_name)
+        if table_info is None:
             return None, f"Table '{table_name}' does not exist"
 
         # Get total row count
-        cursor.execute(f'SELECT COUNT(*) FROM "{table_name}"')
-        total_rows = cursor.fetchone()[0]
+        total_rows, _ = table_row_count(cursor, table_name, estimate=False)
  
         # Get column names and types with more specific type checking
-        cursor.execute("""
-            SELECT column_name, udt_name
-            FROM information_schema.columns
-            WHERE table_name = %s
-            AND column_name != 'id'
-            ORDER BY ordinal_position;
-        """, (table_name,))
-       
-        columns_info = cursor.fetchall()
+        columns_info = list(table_info.udt_types(include_id=False).items())
         logger.debug(f"Columns info: {columns_info}")
        
         statistics = []
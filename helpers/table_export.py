@@ -0,0 +1,144 @@
+# table_export_helper_function
+
+import io
+import os
+import logging
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from helpers.keyset import ROW_KEY, to_columnar
+from helpers.table_stream import iter_table_batches
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.DEBUG)
+
+# Rows per record batch fetched from the server-side cursor; also the size
+# of each Parquet row group. Bounds the rows held in the worker at once.
+EXPORT_BATCH_ROWS = int(os.getenv('EXPORT_BATCH_ROWS', 50000))
+# Parquet column compression: snappy, zstd, gzip, lz4 or none.
+EXPORT_PARQUET_COMPRESSION = os.getenv('EXPORT_PARQUET_COMPRESSION', 'snappy').lower()
+
+# Catalog udt names and the Arrow type their values are loaded as.
+_ARROW_TYPES = {
+    'int2': pa.int16(),
+    'int4': pa.int32(),
+    'int8': pa.int64(),
+    'float4': pa.float32(),
+    'float8': pa.float64(),
+    'bool': pa.bool_(),
+    'text': pa.string(),
+    'varchar': pa.string(),
+    'bpchar': pa.string(),
+    'date': pa.date32(),
+    'timestamp': pa.timestamp('us'),
+    'timestamptz': pa.timestamp('us', tz='UTC'),
+    'time': pa.time64('us'),
+}
+
+
+def arrow_schema(columns, udt_types):
+    """
+    Arrow schema for ``columns`` and the select expression of each one.
+
+    NUMERIC is exported as its exact text: the working tables use it
+    without precision or scale for integers wider than BIGINT and for
+    decimals alike, which neither a float nor a fixed Arrow decimal holds
+    without losing digits. Other types without an Arrow counterpart here
+    (json, uuid, interval, ...) are exported as text too.
+
+    Returns:
+        tuple: (pa.Schema, [select expression])
+    """
+    fields = []
+    expressions = []
+    for col in columns:
+        udt = udt_types.get(col)
+        quoted = f'"{col}"'
+        if udt in _ARROW_TYPES:
+            fields.append(pa.field(col, _ARROW_TYPES[udt]))
+            expressions.append(quoted)
+        else:
+            fields.append(pa.field(col, pa.string()))
+            expressions.append(f'{quoted}::TEXT')
+    return pa.schema(fields), expressions
+
+
+def iter_record_batches(table_info, batch_rows=None):
+    """Yield (schema, RecordBatch) pairs of a table's rows in row key order."""
+    columns = table_info.column_names(include_id=False)
+    schema, expressions = arrow_schema(columns, table_info.udt_types(include_id=False))
+    yield schema, None
+
+    batches = iter_table_batches(table_info.name, columns, table_info.has_column(ROW_KEY),
+                                 batch_rows or EXPORT_BATCH_ROWS, expressions)
+    for rows in batches:
+        arrays = [pa.array(values, type=field.type)
+                  for values, field in zip(to_columnar(rows, len(columns)), schema)]
+        yield schema, pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+class _DrainedSink(io.RawIOBase):
+    """
+    Write-only file that hands out what was written since the last drain.
+    Keeps the absolute position, which the Parquet writer records as
+    column chunk offsets in the footer.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _export(table_info, open_writer, batch_rows=None):
+    sink = _DrainedSink()
+    writer = None
+    rows = 0
+    for schema, batch in iter_record_batches(table_info, batch_rows):
+        if writer is None:
+            writer = open_writer(pa.PythonFile(sink, mode='w'), schema)
+        if batch is not None:
+            writer.write_batch(batch)
+            rows += batch.num_rows
+        data = sink.drain()
+        if data:
+            yield data
+    writer.close()
+    yield sink.drain()
+    logger.info(f"Exported {rows} rows of {table_info.name}")
+
+
+def export_arrow_stream(table_info, batch_rows=None):
+    """Yield a table as an Arrow IPC stream, one record batch at a time."""
+    return _export(table_info, pa.ipc.new_stream, batch_rows)
+
+
+def export_parquet(table_info, batch_rows=None):
+    """Yield a table as a Parquet file, one row group per record batch."""
+    compression = None if EXPORT_PARQUET_COMPRESSION == 'none' else EXPORT_PARQUET_COMPRESSION
+    return _export(table_info, lambda sink, schema: pq.ParquetWriter(sink, schema, compression=compression),
+                   batch_rows)
+
+
+# format -> (exporter, mimetype, file extension)
+EXPORT_FORMATS = {
+    'arrow': (export_arrow_stream, 'application/vnd.apache.arrow.stream', 'arrows'),
+    'parquet': (export_parquet, 'application/vnd.apache.parquet', 'parquet'),
+}
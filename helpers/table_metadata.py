@@ -0,0 +1,163 @@
+# table_metadata_helper_function
+
+import os
+import logging
+
+from db.config import Database
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.DEBUG)
+
+# One row per original table: who loaded it, from which file content and
+# sheet (fingerprint), and how many rows it holds. Working copies get a row
+# with just their row count.
+METADATA_TABLE = 'table_metadata'
+
+# 'on' answers row counts of tables without a maintained count from the
+# planner's estimate (pg_class.reltuples) instead of running COUNT(*).
+ROW_COUNT_ESTIMATE = os.getenv('ROW_COUNT_ESTIMATE', 'off').lower()
+
+_table_ready = False
+
+
+def ensure_metadata_table(cursor):
+    """Create the metadata table unless this process already committed it."""
+    if _table_ready:
+        return
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {METADATA_TABLE} (
+            table_name TEXT PRIMARY KEY,
+            owner TEXT,
+            fingerprint TEXT,
+            sheet_name TEXT,
+            row_count BIGINT NOT NULL DEFAULT 0,
+            created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+
+
+def init_metadata_table():
+    """Startup hook: create the metadata table on a pooled connection."""
+    global _table_ready
+    db = Database()
+    try:
+        with db.connection() as conn:
+            with conn.cursor() as cursor:
+                # Serialize workers starting together; concurrent CREATE TABLE
+                # IF NOT EXISTS can still collide on the row type.
+                cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s));", (METADATA_TABLE,))
+                ensure_metadata_table(cursor)
+            conn.commit()
+        _table_ready = True
+        return True
+    except Exception as e:
+        logger.warning(f"Could not create {METADATA_TABLE}: {e}")
+        return False
+
+
+def find_loaded_table(cursor, table_name, owner, fingerprint):
+    """
+    Return the row count of ``table_name`` if ``owner`` loaded it from the
+    same content and sheet and it still exists, else None. One query.
+    """
+    if not owner or not fingerprint:
+        return None
+    ensure_metadata_table(cursor)
+    cursor.execute(f"""
+        SELECT row_count
+        FROM {METADATA_TABLE}
+        WHERE table_name = %s
+          AND owner = %s
+          AND fingerprint = %s
+          AND to_regclass(format('%%I', table_name)) IS NOT NULL
+    """, (table_name, owner, fingerprint))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def record_loaded_table(cursor, table_name, owner, fingerprint, sheet_name, row_count):
+    """
+    Record a freshly loaded original table, replacing what was known about
+    an earlier table of that name. Runs in the load's transaction so the
+    record never outlives a rolled-back load.
+    """
+    ensure_metadata_table(cursor)
+    cursor.execute(f"""
+        INSERT INTO {METADATA_TABLE} (table_name, owner, fingerprint, sheet_name, row_count, created_at)
+        VALUES (%s, %s, %s, %s, %s, CURRENT_TIMESTAMP)
+        ON CONFLICT (table_name) DO UPDATE
+        SET owner = EXCLUDED.owner,
+            fingerprint = EXCLUDED.fingerprint,
+            sheet_name = EXCLUDED.sheet_name,
+            row_count = EXCLUDED.row_count,
+            created_at = EXCLUDED.created_at;
+    """, (table_name, owner, fingerprint, sheet_name, row_count))
+
+
+def forget_tables(cursor, table_names):
+    """Drop the metadata of tables that were deleted."""
+    if not table_names:
+        return
+    ensure_metadata_table(cursor)
+    cursor.execute(f"DELETE FROM {METADATA_TABLE} WHERE table_name = ANY(%s);", (list(table_names),))
+
+
+def set_row_count(cursor, table_name, row_count):
+    """
+    Store the exact row count of ``table_name`` after a load or a change to
+    its rows. Call it in the transaction that changed the rows, so the two
+    commit or roll back together.
+    """
+    ensure_metadata_table(cursor)
+    cursor.execute(f"""
+        INSERT INTO {METADATA_TABLE} (table_name, row_count)
+        VALUES (%s, %s)
+        ON CONFLICT (table_name) DO UPDATE
+        SET row_count = EXCLUDED.row_count;
+    """, (table_name, row_count))
+
+
+def copy_row_count(cursor, source_table, target_table):
+    """Give ``target_table`` the maintained count of ``source_table`` (a view over it), or none."""
+    ensure_metadata_table(cursor)
+    cursor.execute(f"DELETE FROM {METADATA_TABLE} WHERE table_name = %s;", (target_table,))
+    cursor.execute(f"""
+        INSERT INTO {METADATA_TABLE} (table_name, row_count)
+        SELECT %s, row_count FROM {METADATA_TABLE} WHERE table_name = %s;
+    """, (target_table, source_table))
+
+
+def table_row_count(cursor, table_name, estimate=None):
+    """
+    Row count of ``table_name`` without scanning it when it is maintained.
+
+    Tables loaded before counts were kept have no record; they are counted
+    with COUNT(*), or, with ``estimate`` (default ROW_COUNT_ESTIMATE), read
+    from pg_class.reltuples once the table has been analyzed.
+
+    Returns:
+        tuple: (row_count, estimated)
+    """
+    if estimate is None:
+        estimate = ROW_COUNT_ESTIMATE == 'on'
+    ensure_metadata_table(cursor)
+    cursor.execute(f"SELECT row_count FROM {METADATA_TABLE} WHERE table_name = %s;", (table_name,))
+    row = cursor.fetchone()
+    if row is not None:
+        return row[0], False
+
+    if estimate:
+        # -1 (never analyzed) falls through to an exact count.
+        cursor.execute("""
+            SELECT c.reltuples::BIGINT
+            FROM pg_catalog.pg_class c
+            WHERE c.relname = %s
+              AND c.relkind IN ('r', 'p', 'm')
+              AND pg_catalog.pg_table_is_visible(c.oid)
+        """, (table_name,))
+        row = cursor.fetchone()
+        if row is not None and row[0] >= 0:
+            return row[0], True
+
+    cursor.execute(f'SELECT COUNT(*) FROM "{table_name}";')
+    return cursor.fetchone()[0], False
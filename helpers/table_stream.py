@@ -0,0 +1,108 @@
+# table_stream_helper_function
+
+import os
+import json
+import uuid
+import logging
+
+from flask import current_app
+
+from db.config import Database
+from db.catalog import catalog
+from helpers.keyset import ROW_KEY
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.DEBUG)
+
+# Rows fetched from the server-side cursor per round trip, and so the most
+# rows held in the worker at once while a table is streamed.
+STREAM_ITERSIZE = int(os.getenv('STREAM_ITERSIZE', 2000))
+
+STREAM_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'json': 'application/json',
+}
+
+
+def resolve_stream_table(table_name):
+    """
+    Check the working copy to stream before the response starts, so a
+    missing table is still answered with a 404.
+
+    Returns:
+        tuple: (TableInfo, error)
+    """
+    db = Database()
+    conn = None
+    cursor = None
+    try:
+        table_name = table_name.strip().lower()
+        if not table_name.endswith('_copy'):
+            table_name = f"{table_name}_copy"
+
+        conn = db.get_db_connection()
+        if not conn:
+            return None, "Database connection failed"
+        cursor = conn.cursor()
+
+        table_info = catalog.describe(cursor, table_name)
+        if table_info is None:
+            return None, f"Table {table_name} does not exist"
+        return table_info, None
+
+    except Exception as e:
+        logger.error(f"Error resolving table to stream: {str(e)}")
+        return db.handle_error(conn, e)
+
+    finally:
+        db.close_cursor_and_connection(cursor, conn)
+
+
+def iter_table_batches(table_name, columns, keyed=True, itersize=None, expressions=None):
+    """
+    Yield the rows of ``columns`` as lists of tuples, ``itersize`` at a time,
+    from a server-side (named) cursor. ``expressions`` replaces the plain
+    column references in the select list (casts), one per column.
+
+    Runs on a dedicated pooled connection rather than the request's, since
+    the response body is produced after the view function has returned.
+    The cursor and connection are released when the generator finishes or
+    is closed (client gone).
+    """
+    itersize = itersize or STREAM_ITERSIZE
+    column_list = ', '.join(expressions or [f'"{col}"' for col in columns])
+    order = f' ORDER BY "{ROW_KEY}"' if keyed else ''
+
+    db = Database()
+    with db.connection() as conn:
+        with conn.cursor(name=f"stream_{uuid.uuid4().hex}") as cursor:
+            cursor.itersize = itersize
+            cursor.execute(f'SELECT {column_list} FROM "{table_name}"{order};')
+            streamed = 0
+            while True:
+                rows = cursor.fetchmany(itersize)
+                if not rows:
+                    break
+                streamed += len(rows)
+                yield rows
+    logger.info(f"Streamed {streamed} rows from {table_name}")
+
+
+def stream_table(table_name, columns, keyed=True, fmt='ndjson', itersize=None):
+    """
+    Encode a table as NDJSON (one object per line) or as one JSON array,
+    one chunk per batch. Values are encoded like ``jsonify`` does.
+    """
+    encode = json.JSONEncoder(default=current_app.json.default, ensure_ascii=False).encode
+    batches = iter_table_batches(table_name, columns, keyed, itersize)
+
+    if fmt == 'ndjson':
+        for rows in batches:
+            yield ''.join(encode(dict(zip(columns, row))) + '\n' for row in rows)
+        return
+
+    separator = '['
+    for rows in batches:
+        yield separator + ','.join(encode(dict(zip(columns, row))) for row in rows)
+        separator = ','
+    yield '[]' if separator == '[' else ']'
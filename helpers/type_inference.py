@@ -0,0 +1,295 @@
+# type_inference_helper_function
+
+import os
+import re
+import logging
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.DEBUG)
+
+# Rows per column looked at to pick a type; the whole column is still
+# validated when it is converted.
+INFERENCE_SAMPLE_ROWS = int(os.getenv('UPLOAD_INFERENCE_SAMPLE', 1000))
+
+# kind is how values are parsed, sql_type what the column is created as.
+ColumnType = namedtuple('ColumnType', ['sql_type', 'kind'])
+
+EMPTY = ColumnType('TEXT', 'empty')
+TEXT = ColumnType('TEXT', 'text')
+
+NULL_TOKENS = {'', 'na', 'n/a', 'nan', 'null', 'none', 'nil', '-', '--', '#n/a', '#null!'}
+BOOL_TOKENS = {'true': True, 't': True, 'yes': True, 'y': True,
+               'false': False, 'f': False, 'no': False, 'n': False}
+# Single letters (codes, grades, initials) only read as booleans in a
+# column that also spells at least one of them out.
+BOOL_WORDS = {'true', 'yes', 'false', 'no'}
+
+# No leading zeros (other than "0" itself): zip codes, ids and account
+# numbers like 02134 stay text.
+_DIGITS = r'(?:[1-9]\d{0,2}(?:,\d{3})+|[1-9]\d*|0)'
+_NUMBER = rf'{_DIGITS}(?:\.\d+)?(?:[eE][+-]?\d+)?|\.\d+(?:[eE][+-]?\d+)?'
+_INT_RE = re.compile(rf'[+-]?{_DIGITS}')
+_FLOAT_RE = re.compile(rf'[+-]?(?:{_NUMBER})')
+_PERCENT_RE = re.compile(rf'[+-]?(?:{_NUMBER})\s*%')
+_CURRENCY_SYMBOLS = '$€£¥₹'
+_CURRENCY_RE = re.compile(
+    rf'\(?[+-]?\s*[{_CURRENCY_SYMBOLS}]\s*[+-]?(?:{_NUMBER})\)?'
+    rf'|\(?[+-]?(?:{_NUMBER})\s*[{_CURRENCY_SYMBOLS}]\)?'
+)
+_DATE_LIKE_RE = re.compile(r'.*\d.*[-/.: ].*\d.*|\d{8}')
+
+# Excel stores dates as day serials. Cells with a date number format are
+# already read as dates; a plain number is only read as a serial when the
+# whole column name is a date word, and only inside a plausible range
+# (1927-2099). Names merely containing one (monthly_revenue) never are.
+DATE_NAMES = {'date', 'datetime', 'timestamp', 'dt', 'dob', 'birthdate', 'birth_date', 'date_of_birth'}
+_EXCEL_SERIAL_RANGE = (10000, 73051)
+
+_INT_RANGES = (
+    ('SMALLINT', -2 ** 15, 2 ** 15 - 1),
+    ('INTEGER', -2 ** 31, 2 ** 31 - 1),
+    ('BIGINT', -2 ** 63, 2 ** 63 - 1),
+)
+INT_TYPES = ['SMALLINT', 'INTEGER', 'BIGINT', 'NUMERIC']
+
+
+def _int_type(values):
+    """Narrowest integer SQL type for a numeric array with no NaNs."""
+    if len(values) == 0:
+        return 'SMALLINT'
+    low, high = values.min(), values.max()
+    for sql_type, type_min, type_max in _INT_RANGES:
+        if type_min <= low and high <= type_max:
+            return sql_type
+    return 'NUMERIC'
+
+
+def _strip_nulls(series):
+    """Return the column as stripped strings with NULL-like tokens removed."""
+    values = series.dropna()
+    if values.empty:
+        return values.astype(object)
+    if values.map(type).eq(float).any():
+        # Integral floats in mixed columns (1.0) should read as ints.
+        values = values.map(lambda v: str(int(v)) if isinstance(v, float) and v.is_integer() else v)
+    text = values.astype(str).str.strip()
+    return text[~text.str.lower().isin(NULL_TOKENS)]
+
+
+def _is_date_name(name):
+    return name is not None and re.sub(r'[\s-]+', '_', str(name).strip().lower()) in DATE_NAMES
+
+
+def _datetime_type(values):
+    """DATE when every value is at midnight, else TIMESTAMP."""
+    values = values.dropna()
+    if values.empty:
+        return 'TIMESTAMP'
+    if getattr(values.dt, 'tz', None) is not None:
+        return 'TIMESTAMP'
+    midnight = (values == values.dt.normalize()).all()
+    return 'DATE' if midnight else 'TIMESTAMP'
+
+
+def _parse_dates(text):
+    """Parse strings as dates, or return None if any value does not parse."""
+    if not text.str.fullmatch(_DATE_LIKE_RE).all():
+        return None
+    for fmt in ('ISO8601', 'mixed'):
+        try:
+            parsed = pd.to_datetime(text, format=fmt, errors='coerce')
+        except (ValueError, TypeError, OverflowError):
+            continue
+        if parsed.notna().all():
+            return parsed
+    return None
+
+
+def _infer_numeric(series, name):
+    values = series.dropna()
+    if values.empty:
+        return EMPTY
+    if pd.api.types.is_bool_dtype(series.dtype):
+        return ColumnType('BOOLEAN', 'bool')
+
+    array = values.to_numpy(dtype='float64')
+    if not np.isfinite(array).all():
+        return ColumnType('DOUBLE PRECISION', 'float')
+
+    integral = np.all(np.mod(array, 1) == 0)
+    low, high = _EXCEL_SERIAL_RANGE
+    if _is_date_name(name) and low <= array.min() and array.max() <= high:
+        return ColumnType('DATE' if integral else 'TIMESTAMP', 'excel_date')
+
+    if pd.api.types.is_integer_dtype(series.dtype):
+        return ColumnType(_int_type(values.to_numpy()), 'int')
+    if integral and np.abs(array).max() < 2 ** 53:
+        return ColumnType(_int_type(array), 'int')
+    return ColumnType('DOUBLE PRECISION', 'float')
+
+
+def _infer_text(series, name):
+    text = _strip_nulls(series)
+    if text.empty:
+        return EMPTY
+
+    lowered = text.str.lower()
+    if lowered.isin(BOOL_TOKENS.keys()).all() and lowered.isin(BOOL_WORDS).any():
+        return ColumnType('BOOLEAN', 'bool')
+    if text.str.fullmatch(_INT_RE).all():
+        numbers = pd.to_numeric(text.str.replace(',', '', regex=False), errors='coerce')
+        if numbers.notna().all():
+            if _is_date_name(name):
+                inferred = _infer_numeric(numbers, name)
+                if inferred.kind == 'excel_date':
+                    return inferred
+            return ColumnType(_int_type(numbers.to_numpy()), 'int')
+        return ColumnType('NUMERIC', 'int')
+    if text.str.fullmatch(_FLOAT_RE).all():
+        return ColumnType('DOUBLE PRECISION', 'float')
+    if text.str.fullmatch(_PERCENT_RE).all():
+        return ColumnType('DOUBLE PRECISION', 'percent')
+    if text.str.fullmatch(_CURRENCY_RE).all():
+        return ColumnType('NUMERIC', 'currency')
+
+    dates = _parse_dates(text)
+    if dates is not None:
+        return ColumnType(_datetime_type(dates), 'datetime')
+    return TEXT
+
+
+def infer_column(series, name=None, sample_rows=None):
+    """Pick the narrowest ColumnType that fits a sample of the column."""
+    sample_rows = sample_rows or INFERENCE_SAMPLE_ROWS
+    sample = series
+    if len(series) > sample_rows:
+        # Head and tail: sorted sheets keep their extremes at the ends.
+        half = sample_rows // 2
+        sample = pd.concat([series.iloc[:half], series.iloc[-half:]])
+
+    dtype = series.dtype
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return ColumnType(_datetime_type(series), 'datetime')
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_numeric_dtype(dtype):
+        # Numeric columns are cheap to scan in full, so ranges are exact.
+        return _infer_numeric(series, name)
+    return _infer_text(sample, name)
+
+
+def _convert(series, column_type):
+    """Convert a column by its kind; returns (converted, ok)."""
+    kind = column_type.kind
+    if kind in ('empty', 'text'):
+        return series, True
+
+    if pd.api.types.is_datetime64_any_dtype(series.dtype) or pd.api.types.is_bool_dtype(series.dtype):
+        return series, kind in ('datetime', 'bool')
+
+    is_numeric = pd.api.types.is_numeric_dtype(series.dtype)
+    if is_numeric:
+        text = None
+        numbers = series.astype('float64')
+        present = numbers.notna()
+    else:
+        text = series.where(series.notna(), None)
+        text = text.map(lambda v: str(int(v)) if isinstance(v, float) and v.is_integer() else v, na_action='ignore')
+        text = text.astype(str).where(series.notna()).str.strip()
+        text = text.where(~text.str.lower().isin(NULL_TOKENS))
+        present = text.notna()
+
+    if kind == 'bool':
+        if text is None:
+            return series, False
+        converted = text.str.lower().map(BOOL_TOKENS).astype('boolean')
+    elif kind in ('int', 'float', 'percent', 'excel_date'):
+        if text is not None:
+            cleaned = text.str.replace(',', '', regex=False)
+            if kind == 'percent':
+                cleaned = cleaned.str.rstrip('%').str.strip()
+            numbers = pd.to_numeric(cleaned, errors='coerce')
+            if kind == 'percent':
+                numbers = numbers / 100
+        if kind == 'excel_date':
+            converted = pd.to_datetime(numbers, unit='D', origin='1899-12-30', errors='coerce')
+        elif kind == 'int' and column_type.sql_type != 'NUMERIC':
+            if numbers[present].mod(1).ne(0).any():
+                return series, False
+            converted = numbers.round().astype('Int64')
+        elif kind == 'int':
+            # Beyond BIGINT: keep the exact digits for the NUMERIC column.
+            converted = text.str.replace(',', '', regex=False) if text is not None else numbers
+        else:
+            converted = numbers.astype('float64')
+    elif kind == 'currency':
+        if text is None:
+            return series.astype('float64'), True
+        negative = text.str.startswith('(') & text.str.endswith(')')
+        cleaned = text.str.replace(rf'[(){_CURRENCY_SYMBOLS},\s]', '', regex=True)
+        if pd.to_numeric(cleaned, errors='coerce')[present].isna().any():
+            return series, False
+        converted = cleaned.where(~negative, '-' + cleaned.str.lstrip('+-'))
+        return converted, True
+    elif kind == 'datetime':
+        if text is None:
+            return series, False
+        converted = _parse_dates(text[present])
+        if converted is None:
+            return series, False
+        converted = converted.reindex(series.index)
+    else:
+        return series, False
+
+    ok = not converted[present].isna().any()
+    return converted, ok
+
+
+def convert_column(series, column_type, name=None):
+    """
+    Convert a column to the Python/pandas values its type expects.
+
+    The type was picked from a sample; if some value elsewhere in the column
+    does not parse, the column is re-inferred from all of its values.
+
+    Returns:
+        tuple: (converted series, ColumnType actually applied)
+    """
+    converted, ok = _convert(series, column_type)
+    if ok:
+        return converted, column_type
+
+    full_type = infer_column(series, name, sample_rows=len(series) or 1)
+    converted, ok = _convert(series, full_type)
+    if ok:
+        return converted, full_type
+    return series, TEXT
+
+
+def infer_frame(df):
+    """Infer and convert every column; returns (converted df, {column: ColumnType})."""
+    types = {}
+    converted = {}
+    for col in df.columns:
+        column_type = infer_column(df[col], col)
+        converted[col], types[col] = convert_column(df[col], column_type, col)
+    if types:
+        logger.debug(f"Inferred column types: { {col: t.sql_type for col, t in types.items()} }")
+    return pd.DataFrame(converted, index=df.index), types
+
+
+def widen_sql_type(current, incoming):
+    """Return the narrowest SQL type that can hold values of both types."""
+    if current == incoming:
+        return current
+    if current in INT_TYPES and incoming in INT_TYPES:
+        return max(current, incoming, key=INT_TYPES.index)
+    numeric = set(INT_TYPES) | {'DOUBLE PRECISION'}
+    if current in numeric and incoming in numeric:
+        # NUMERIC keeps integers beyond BIGINT exact; a float would round them.
+        return 'NUMERIC' if 'NUMERIC' in (current, incoming) else 'DOUBLE PRECISION'
+    if {current, incoming} == {'DATE', 'TIMESTAMP'}:
+        return 'TIMESTAMP'
+    return 'TEXT'
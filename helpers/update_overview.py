@@ -91,7 +91,7 @@ def get_column_types_from_db(table_name):
     for column_name, data_type in data_types.items():
         logger.debug(f"Categorizing column: {column_name}, type: {data_type}")
         
-        if data_type in ['int8', 'bigint', 'integer', 'double precision', 'float8', 'numeric']:
+        if data_type in ['int8', 'bigint', 'integer', 'smallint', 'double precision', 'real', 'float8', 'numeric']:
             column_types['numerical'].append(column_name)
         elif data_type in ['timestamp without time zone', 'timestamp with time zone', 'date', 'time']:
             column_types['dates'].append(column_name)
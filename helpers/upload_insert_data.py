@@ -112,9 +112,50 @@
 #         db.close_cursor_and_connection(cursor, conn)
 
 # upload_insert_data_db_helper_function
+import os
+import re
+import shutil
+import hashlib
+import logging
+import pickle
+import zipfile
+import tempfile
+import threading
 import pandas as pd
 from io import BytesIO, StringIO
+from multiprocessing import get_context
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
 from db.config import Database
+from db.catalog import catalog
+from helpers.excel_stream import iter_sheet_chunks, read_sheet_names, chunk_rows
+from helpers.excel_engine import get_engine
+from helpers.xlsx_reader import read_workbook_index, iter_sheet_rows
+from helpers.copy_encoder import copy_frame, supports_binary
+from helpers.type_inference import ColumnType, EMPTY, infer_frame, widen_sql_type, INT_TYPES
+from helpers.working_table import create_working_table
+from helpers.table_metadata import find_loaded_table, record_loaded_table
+from helpers.upload_spool import map_upload
+from helpers.delimited_ingest import (DELIMITED_SHEET_NAME, is_delimited, sample_delimited,
+                                     infer_delimited_types, copy_delimited, failed_column)
+from psycopg2 import errors
+
+logger = logging.getLogger(__name__)
+
+# 'auto' streams workbooks larger than UPLOAD_STREAMING_THRESHOLD bytes,
+# 'on' always streams and 'off' always loads the whole sheet with pandas.
+UPLOAD_STREAMING = os.getenv('UPLOAD_STREAMING', 'auto').lower()
+UPLOAD_STREAMING_THRESHOLD = int(os.getenv('UPLOAD_STREAMING_THRESHOLD', 20 * 1024 * 1024))
+UPLOAD_CHUNK_ROWS = int(os.getenv('UPLOAD_CHUNK_ROWS', 10000))
+# 'binary' sends uploads as binary COPY typed by get_sql_type, so the server
+# skips text parsing; 'text' uses the COPY text encoder.
+UPLOAD_COPY_FORMAT = os.getenv('UPLOAD_COPY_FORMAT', 'text').lower()
+# 'on' infers column types from the values during the load; 'off' maps
+# pandas dtypes with get_sql_type.
+UPLOAD_TYPE_INFERENCE = os.getenv('UPLOAD_TYPE_INFERENCE', 'on').lower()
+# Worker processes for multi-sheet ingest, shared by all uploads of an app
+# worker; each holds one database connection.
+UPLOAD_SHEET_WORKERS = int(os.getenv('UPLOAD_SHEET_WORKERS', min(4, os.cpu_count() or 1)))
 
 def get_sql_type(dtype):
     """Convert pandas dtype to SQL type."""
@@ -128,40 +169,325 @@ def get_sql_type(dtype):
         return 'TIMESTAMP'
     else:
         return 'TEXT'
+
+def infer_frame_types(df):
+    """
+    Decide the SQL type of every column and convert the values to match.
+
+    With UPLOAD_TYPE_INFERENCE on, types are inferred from the values
+    (numbers stored as text, Excel date serials, percentages, currency,
+    yes/no flags) and narrowed; otherwise they follow the pandas dtype.
+
+    Returns:
+        tuple: (converted df, {column: ColumnType})
+    """
+    if UPLOAD_TYPE_INFERENCE != 'off':
+        return infer_frame(df)
+    types = {col: EMPTY if df[col].isna().all() else ColumnType(get_sql_type(df[col].dtype), 'dtype')
+             for col in df.columns}
+    return df, types
+
 def get_sheet_names(file_storage):
-    """Extract sheet names from uploaded Excel file (in-memory)."""
+    """Extract sheet names from the workbook index, without parsing worksheets."""
+    if is_delimited(file_storage.filename or ''):
+        return [DELIMITED_SHEET_NAME]
     try:
-        excel_data = pd.ExcelFile(file_storage)
-        return excel_data.sheet_names
+        return read_sheet_names(file_storage)
     except Exception as e:
         raise RuntimeError(f"Could not extract sheet names: {str(e)}")
 
 
+def create_original_table(cursor, table_name, sql_types):
+    """Create the original table with a serial id and the given column types."""
+    columns = ', '.join([f'"{col}" {sql_type}' for col, sql_type in sql_types.items()])
+    create_table_sql = f"""
+        CREATE TABLE {table_name} (
+            id SERIAL PRIMARY KEY,
+            {columns}
+        );
+    """
+    cursor.execute(create_table_sql)
+
+
+def copy_into_new_table(cursor, table_name, df, sql_types):
+    """
+    COPY rows into a table created in the current transaction.
+
+    FREEZE writes the rows already frozen, so the freshly built table skips
+    the later hint-bit / anti-wraparound vacuum rewrite.
+    """
+    binary = UPLOAD_COPY_FORMAT == 'binary' and supports_binary(sql_types)
+    binary_types = sql_types if binary else None
+    return copy_frame(cursor, table_name, df, sql_types=binary_types, freeze=True)
+
+
+def stream_excel_into_table(cursor, file, sheetname, table_name, chunk_rows=UPLOAD_CHUNK_ROWS):
+    """Create ``table_name`` and fill it from a worksheet one chunk at a time."""
+    def read_chunks():
+        return iter_sheet_chunks(file, sheetname, chunk_rows)
+    return stream_chunks_into_table(cursor, read_chunks(), sheetname, table_name, reread=read_chunks)
+
+
+def _raw_frame(header, chunk):
+    header = ['ID' if col == 'id' else col for col in header]
+    return pd.DataFrame(chunk, columns=header)
+
+
+def restore_raw_text(cursor, table_name, columns, chunks, rows):
+    """
+    Rewrite ``columns`` of the first ``rows`` rows of a table being loaded
+    with the values as they were read, re-reading them from ``chunks``.
+
+    Used when a column is widened to TEXT: ``USING col::TEXT`` would keep
+    the earlier rows in their converted form (0.5, true, 1968-06-11) while
+    later rows hold the raw text (50%, y). Rows were copied in order into a
+    new table, so the n-th row read has the n-th ``id``.
+    """
+    cursor.execute(f'SELECT min(id) FROM "{table_name}";')
+    first_id = cursor.fetchone()[0]
+    if first_id is None:
+        return
+
+    restore_table = f"{table_name}_raw_restore"
+    types = {'id': 'BIGINT', **{col: 'TEXT' for col in columns}}
+    cursor.execute(f'DROP TABLE IF EXISTS "{restore_table}";')
+    cursor.execute(f"""
+        CREATE TEMP TABLE "{restore_table}" ({', '.join(f'"{col}" {sql_type}' for col, sql_type in types.items())})
+        ON COMMIT DROP;
+    """)
+
+    read = 0
+    for header, chunk in chunks:
+        if read >= rows:
+            break
+        raw = _raw_frame(header, chunk[:rows - read])
+        frame = raw[list(columns)]
+        frame.insert(0, 'id', range(first_id + read, first_id + read + len(frame)))
+        copy_into_new_table(cursor, restore_table, frame, types)
+        read += len(frame)
+
+    assignments = ', '.join(f'"{col}" = r."{col}"' for col in columns)
+    cursor.execute(f'UPDATE "{table_name}" t SET {assignments} FROM "{restore_table}" r WHERE t.id = r.id;')
+    cursor.execute(f'DROP TABLE "{restore_table}";')
+
+
+def stream_chunks_into_table(cursor, chunks, sheetname, table_name, progress=None, reread=None):
+    """
+    Create ``table_name`` and fill it from (header, rows) chunks.
+
+    Column types come from the first chunk. A later chunk whose values do not
+    fit widens the column in place (SMALLINT -> INTEGER -> BIGINT ->
+    DOUBLE PRECISION -> TEXT); columns that are still entirely empty take
+    the type of the first chunk that has values. Peak memory is bounded by
+    the chunk size.
+
+    A column widened to TEXT holds every value as it was read: the rows
+    already copied are read again from ``reread()`` (a fresh chunk
+    iterator over the same source) and rewritten. Without ``reread`` they
+    keep their converted form cast to text.
+
+    ``progress(rows_parsed, rows_copied)`` is called after each chunk is
+    parsed and again after it is copied; it may raise to abort the load.
+
+    Returns:
+        int: number of rows copied
+    """
+    sql_types = None
+    kinds = {}
+    undecided = set()
+    total_rows = 0
+
+    for header, chunk in chunks:
+        raw = _raw_frame(header, chunk)
+        df, chunk_types = infer_frame_types(raw)
+        if progress:
+            progress(total_rows + len(df), total_rows)
+
+        if sql_types is None:
+            sql_types = {col: chunk_types[col].sql_type for col in df.columns}
+            kinds = {col: chunk_types[col].kind for col in df.columns}
+            undecided = {col for col in df.columns if chunk_types[col] == EMPTY}
+            create_original_table(cursor, table_name, sql_types)
+            print("Table created successfully")
+        else:
+            to_text = []
+            for col in df.columns:
+                if chunk_types[col] == EMPTY:
+                    continue
+                incoming = chunk_types[col].sql_type
+                if col in undecided:
+                    new_type = incoming
+                    kinds[col] = chunk_types[col].kind
+                    undecided.discard(col)
+                elif 'percent' in (kinds[col], chunk_types[col].kind) and kinds[col] != chunk_types[col].kind:
+                    # 50% was stored as 0.5; a plain 50 next to it would mean something else
+                    new_type = 'TEXT'
+                else:
+                    new_type = widen_sql_type(sql_types[col], incoming)
+                if new_type != sql_types[col]:
+                    print(f"Changing column {col} from {sql_types[col]} to {new_type}")
+                    cursor.execute(f"""
+                        ALTER TABLE {table_name}
+                        ALTER COLUMN "{col}" TYPE {new_type} USING "{col}"::{new_type};
+                    """)
+                    sql_types[col] = new_type
+                    if new_type == 'TEXT' and kinds[col] != 'text':
+                        to_text.append(col)
+                    kinds[col] = 'text' if new_type == 'TEXT' else kinds[col]
+            if to_text and total_rows:
+                if reread is not None:
+                    print(f"Re-reading {total_rows} rows of {to_text} as text")
+                    restore_raw_text(cursor, table_name, to_text, reread(), total_rows)
+                else:
+                    logger.warning(f"Columns {to_text} widened to TEXT keep earlier rows in converted form")
+
+        # Columns widened to TEXT keep this chunk's values as they were read
+        for col in df.columns:
+            if sql_types[col] == 'TEXT' and chunk_types[col].kind != 'text':
+                df[col] = raw[col]
+
+        if len(df):
+            copy_into_new_table(cursor, table_name, df, sql_types)
+            total_rows += len(df)
+            print(f"Copied {total_rows} rows so far")
+        if progress:
+            progress(total_rows, total_rows)
+
+    if sql_types is None:
+        raise ValueError(f"Sheet '{sheetname}' is empty")
+
+    return total_rows
+
+
+def copy_delimited_into_table(cursor, file, filename, table_name, progress=None):
+    """
+    Create ``table_name`` and load a CSV/TSV (optionally .gz/.zst) upload
+    with one server-side COPY; no DataFrame is built.
+
+    Types come from a sample at the start of the file. If a later value
+    does not fit, the server reports the column: it is widened (next
+    integer type, else TEXT) and the load is redone from the start.
+
+    Returns:
+        int: number of rows copied
+    """
+    header, sample = sample_delimited(file, filename)
+    sql_types = infer_delimited_types(header, sample)
+    print(f"Sampled {len(sample)} rows, column types: {sql_types}")
+
+    # Each retry turns at least one column wider, so this ends.
+    for _ in range(len(header) * len(INT_TYPES) + 1):
+        cursor.execute("SAVEPOINT delimited_load;")
+        create_original_table(cursor, table_name, sql_types)
+        try:
+            rows = copy_delimited(cursor, table_name, header, file, filename, freeze=True, progress=progress)
+        except errors.DataError as e:
+            cursor.execute("ROLLBACK TO SAVEPOINT delimited_load;")
+            column = failed_column(e, header)
+            retyped = [column] if column else [col for col in header if sql_types[col] != 'TEXT']
+            if not retyped:
+                raise
+            for col in retyped:
+                current = sql_types[col]
+                out_of_range = isinstance(e, errors.NumericValueOutOfRange)
+                if out_of_range and current in INT_TYPES and current != INT_TYPES[-1]:
+                    sql_types[col] = INT_TYPES[INT_TYPES.index(current) + 1]
+                else:
+                    sql_types[col] = 'TEXT'
+                print(f"Column {col} does not fit {current} further down the file, retrying as {sql_types[col]}")
+            continue
+        cursor.execute("RELEASE SAVEPOINT delimited_load;")
+        return rows
+
+    raise ValueError("Could not find column types that fit the file")
+
+
+def use_streaming(file, filename, streaming=None):
+    """Decide whether a workbook upload goes through the streaming ingest path."""
+    if streaming is not None:
+        return streaming
+    if UPLOAD_STREAMING in ('on', 'off'):
+        return UPLOAD_STREAMING == 'on'
+
+    file.seek(0, os.SEEK_END)
+    size = file.tell()
+    file.seek(0)
+    return size > UPLOAD_STREAMING_THRESHOLD
+
+
+def upload_fingerprint(content_digest, sheetname):
+    """
+    Fingerprint of one sheet of an upload: its file content hash, the sheet
+    and the type inference setting, which all decide what the table holds.
+    """
+    key = f"{content_digest}\0{sheetname}\0{UPLOAD_TYPE_INFERENCE}"
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()
+
+
+def reuse_identical_table(owner, fingerprint, original_table_name, copy_table_name):
+    """
+    Skip the load when ``owner`` already has ``original_table_name`` built
+    from the same fingerprint: only the copy table is reset from it.
+
+    Returns:
+        tuple: (row count if the table was reused else None, error)
+    """
+    if not owner or not fingerprint:
+        return None, None
+
+    db = Database()
+    conn = None
+    cursor = None
+
+    try:
+        conn = db.get_db_connection()
+        if not conn:
+            raise Exception("Database connection failed")
+
+        cursor = conn.cursor()
+        row_count = find_loaded_table(cursor, original_table_name, owner, fingerprint)
+        if row_count is None:
+            return None, None
+
+        print(f"Reusing {original_table_name} ({row_count} rows), resetting {copy_table_name}")
+        create_working_table(cursor, original_table_name, copy_table_name)
+        db.commit(conn)
+        catalog.invalidate(copy_table_name)
+        return row_count, None
+
+    except Exception as e:
+        logger.error(f"Error checking for an identical upload: {str(e)}")
+        if conn:
+            db.rollback(conn)
+        return None, str(e)
+
+    finally:
+        db.close_cursor_and_connection(cursor, conn)
+
 
-def insert_data_from_excel(file, original_table_name, copy_table_name, sheetname):
+def insert_data_from_excel(file, original_table_name, copy_table_name, sheetname, streaming=None,
+                           owner=None, fingerprint=None):
     print("Starting data import...")
     db = Database()
     conn = None
     cursor = None
+    mapped = None
 
     try:
         filename = file.filename.lower()
+        delimited = is_delimited(filename)
+        streaming = not delimited and use_streaming(file, filename, streaming)
 
-        # Read the data
-        # if filename.endswith('.csv'):
-        #     df = pd.read_csv(file)
-        #     sheetname = "csv_import"
-        # else:
-        #     file.stream.seek(0)
-        #     df = pd.read_excel(file.stream, sheet_name=sheetname)
-
-        file.seek(0)  # Reset pointer before reading
-        if filename.endswith('.csv'):
-            df = pd.read_csv(file)
-            sheetname = "csv_import"
-        else:
-            file.seek(0)
-            df = pd.read_excel(file, sheet_name=sheetname)
+        # Workbooks spooled or staged on disk are parsed through a read-only
+        # memory map instead of being buffered into the worker's heap.
+        mapped = None if delimited else map_upload(file)
+        source = mapped or file
+
+        df = None
+        if not streaming and not delimited:
+            engine = get_engine()
+            print(f"Reading sheet {sheetname} with the {engine.name} engine")
+            df = engine.read_frame(source, sheetname)
 
 
         # ✅ Connect to DB BEFORE using cursor
@@ -174,56 +500,41 @@ def insert_data_from_excel(file, original_table_name, copy_table_name, sheetname
         # Now it's safe to execute queries
         cursor.execute(f"DROP TABLE IF EXISTS {original_table_name} CASCADE;")
 
-        # Rename id column if it exists
-        if 'id' in df.columns:
-            df = df.rename(columns={'id': 'ID'})
-
-        print(f"Read {len(df)} rows from Excel")
-
-        # Clean data
-        df = df.replace({pd.NaT: None})
-        df = df.where(pd.notnull(df), None)
-
-        # Create original table
-        columns = ', '.join([f'"{col}" {get_sql_type(df[col].dtype)}' for col in df.columns])
-        create_table_sql = f"""
-            CREATE TABLE {original_table_name} (
-                id SERIAL PRIMARY KEY,
-                {columns}
-            );
-        """
-        cursor.execute(create_table_sql)
-        print("Table created successfully")
-
-        # Prepare data for COPY
-        output = StringIO()
-        df_copy = df.copy()
-        for col in df_copy.columns:
-            df_copy[col] = df_copy[col].apply(
-                lambda x: None if pd.isna(x)
-                else x.strftime('%Y-%m-%d %H:%M:%S') if isinstance(x, pd.Timestamp)
-                else str(x)
-            )
-
-        df_copy.to_csv(output, index=False, header=False, sep=',', na_rep='\\N')
-        output.seek(0)
-
-        # Use COPY
-        copy_sql = f"""
-            COPY {original_table_name} ({','.join([f'"{col}"' for col in df.columns])})
-            FROM STDIN WITH (FORMAT CSV, NULL '\\N')
-        """
-        cursor.copy_expert(sql=copy_sql, file=output)
-        conn.commit()
-        print(f"Inserted {len(df)} rows using COPY")
-
-        # Create copy table
-        cursor.execute(f"DROP TABLE IF EXISTS {copy_table_name} CASCADE;")
-        cursor.execute(f"""
-            CREATE TABLE {copy_table_name} AS 
-            SELECT * FROM {original_table_name};
-        """)
-        conn.commit()
+        if delimited:
+            sheetname = DELIMITED_SHEET_NAME
+            print(f"Copying {file.filename} straight into {original_table_name}")
+            total_rows = copy_delimited_into_table(cursor, file, filename, original_table_name)
+            record_loaded_table(cursor, original_table_name, owner, fingerprint, sheetname, total_rows)
+            db.commit(conn)
+            print(f"Inserted {total_rows} rows using COPY")
+        elif streaming:
+            print(f"Streaming sheet {sheetname} in chunks of {UPLOAD_CHUNK_ROWS} rows with the {get_engine().name} engine")
+            total_rows = stream_excel_into_table(cursor, source, sheetname, original_table_name)
+            record_loaded_table(cursor, original_table_name, owner, fingerprint, sheetname, total_rows)
+            db.commit(conn)
+            print(f"Inserted {total_rows} rows using COPY")
+        else:
+            # Rename id column if it exists
+            if 'id' in df.columns:
+                df = df.rename(columns={'id': 'ID'})
+
+            print(f"Read {len(df)} rows from Excel")
+
+            # Create original table
+            df, column_types = infer_frame_types(df)
+            sql_types = {col: column_types[col].sql_type for col in df.columns}
+            create_original_table(cursor, original_table_name, sql_types)
+            print("Table created successfully")
+
+            # Use COPY
+            copy_into_new_table(cursor, original_table_name, df, sql_types)
+            record_loaded_table(cursor, original_table_name, owner, fingerprint, sheetname, len(df))
+            db.commit(conn)
+            print(f"Inserted {len(df)} rows using COPY")
+
+        create_working_table(cursor, original_table_name, copy_table_name)
+        db.commit(conn)
+        catalog.invalidate(original_table_name, copy_table_name)
         print("Data import completed successfully")
 
         return True, None
@@ -235,4 +546,216 @@ def insert_data_from_excel(file, original_table_name, copy_table_name, sheetname
 
     finally:
         db.close_cursor_and_connection(cursor, conn)
+        if mapped is not None:
+            mapped.close()
+
+
+def build_table_names(filename, sheetname, max_length=10):
+    """Return (original_table_name, copy_table_name) for a file's sheet."""
+    base_name = os.path.splitext(filename)[0]
+    safe_base_name = re.sub(r'\W+', '_', base_name)
+    safe_sheetname = re.sub(r'\W+', '_', sheetname)
+
+    # Truncate names if they're too long (PostgreSQL has 63 byte limit for identifiers)
+    if len(safe_base_name) > max_length:
+        safe_base_name = safe_base_name[:max_length]
+    if len(safe_sheetname) > max_length:
+        safe_sheetname = safe_sheetname[:max_length]
+
+    # Convert to lowercase to avoid case sensitivity issues
+    original_table_name = f"{safe_base_name.lower()}_{safe_sheetname.lower()}"
+    return original_table_name, f"{original_table_name}_copy"
 
+
+# --- multi-sheet ingest ---------------------------------------------------
+
+# Sheet worker processes are spawned once per app worker and reused, so
+# pandas and the app modules are imported once, not on every upload.
+_sheet_pool = None
+_sheet_pool_pid = None
+_sheet_pool_lock = threading.Lock()
+
+# Per-process cache of the last WorkbookIndex (shared strings, date
+# styles) a sheet worker loaded, keyed by the file it was pickled to.
+_sheet_worker = {}
+
+
+def _get_sheet_pool():
+    """Return this process's sheet worker pool, creating it on first use or after a fork."""
+    global _sheet_pool, _sheet_pool_pid
+    with _sheet_pool_lock:
+        if _sheet_pool is None or _sheet_pool_pid != os.getpid():
+            # spawn, not fork: the parent may hold gevent hubs, pool
+            # connections and threads that must not be duplicated.
+            _sheet_pool = ProcessPoolExecutor(max_workers=UPLOAD_SHEET_WORKERS, mp_context=get_context('spawn'))
+            _sheet_pool_pid = os.getpid()
+        return _sheet_pool
+
+
+def _reset_sheet_pool(pool):
+    """Drop a pool whose worker died, so the next upload spawns a new one."""
+    global _sheet_pool
+    with _sheet_pool_lock:
+        if _sheet_pool is pool:
+            _sheet_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _worker_index(index_path):
+    if _sheet_worker.get('index_path') != index_path:
+        with open(index_path, 'rb') as f:
+            _sheet_worker['index'] = pickle.load(f)
+        _sheet_worker['index_path'] = index_path
+    return _sheet_worker['index']
+
+
+def _ingest_sheet_task(path, index_path, *task):
+    """Entry point in a sheet worker: ``_ingest_sheet`` with the pickled index."""
+    return _ingest_sheet(path, _worker_index(index_path), *task)
+
+
+def _ingest_sheet(path, index, sheet_name, original_table_name, copy_table_name, owner=None, fingerprint=None):
+    """Load one sheet into its original and copy tables on a connection of its own."""
+    result = {'sheetName': sheet_name, 'tableName': original_table_name, 'success': False}
+    db = Database()
+
+    try:
+        with zipfile.ZipFile(path) as archive, db.connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(f"DROP TABLE IF EXISTS {original_table_name} CASCADE;")
+
+                def read_chunks():
+                    rows = iter_sheet_rows(archive, index.sheets[sheet_name], index)
+                    return chunk_rows(rows, UPLOAD_CHUNK_ROWS)
+                total_rows = stream_chunks_into_table(
+                    cursor, read_chunks(), sheet_name, original_table_name, reread=read_chunks)
+                record_loaded_table(cursor, original_table_name, owner, fingerprint, sheet_name, total_rows)
+                create_working_table(cursor, original_table_name, copy_table_name)
+            conn.commit()
+        result.update(success=True, rows=total_rows)
+    except Exception as e:
+        logger.error(f"Error importing sheet {sheet_name}: {str(e)}")
+        result['error'] = str(e)
+    return result
+
+
+def _run_sheet_tasks(path, index, tasks, workers):
+    """
+    Ingest ``tasks`` in the shared worker pool, at most ``workers`` at a
+    time; returns {sheet: result}.
+    """
+    # The index is pickled once to a file each worker loads once, rather
+    # than once per task.
+    fd, index_path = tempfile.mkstemp(suffix='.index')
+    results = {}
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        pool = _get_sheet_pool()
+        pending = list(tasks)
+        running = {}
+        while pending or running:
+            # Only ``workers`` tasks are submitted at once, so the pool never
+            # runs more of this upload's sheets in parallel, whatever its size.
+            while pending and len(running) < workers:
+                task = pending.pop(0)
+                running[pool.submit(_ingest_sheet_task, path, index_path, *task)] = task
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                task = running.pop(future)
+                try:
+                    results[task[0]] = future.result()
+                except Exception as e:
+                    if isinstance(e, BrokenProcessPool):
+                        _reset_sheet_pool(pool)
+                    results[task[0]] = {'sheetName': task[0], 'tableName': task[1],
+                                        'success': False, 'error': str(e)}
+    finally:
+        os.remove(index_path)
+    return results
+
+
+def _workbook_path(file):
+    """Return (path, is_temporary) of the upload on local disk, spooling it if needed."""
+    name = getattr(getattr(file, 'stream', file), 'name', None)
+    if isinstance(name, str) and os.path.isfile(name):
+        return name, False
+
+    fd, path = tempfile.mkstemp(suffix='.xlsx')
+    file.seek(0)
+    with os.fdopen(fd, 'wb') as out:
+        shutil.copyfileobj(file, out)
+    file.seek(0)
+    return path, True
+
+
+def insert_sheets_from_excel(file, filename, sheet_names=None, max_workers=None,
+                             owner=None, content_digest=None):
+    """
+    Import several sheets of one workbook, each into ``<base>_<sheet>`` and
+    its ``_copy`` table.
+
+    The zip index, shared strings and date styles are read once here and
+    loaded once by each worker process of the shared sheet pool; the
+    workers parse their sheets in parallel and COPY over separate pooled
+    connections. ``max_workers`` caps how many sheets of this upload run at
+    once (default UPLOAD_SHEET_WORKERS, which is also the pool size and so
+    the upper bound); 1 parses them one by one in this process. Every sheet
+    commits on its own, so one bad sheet does not undo the others. Sheets ``owner``
+    already loaded from the same content (``content_digest``) are not
+    parsed again; only their copy tables are reset.
+
+    Returns:
+        tuple: ([per-sheet result dict], error) - results are in sheet order
+    """
+    max_workers = max_workers or UPLOAD_SHEET_WORKERS
+    path, temporary = _workbook_path(file)
+
+    try:
+        index = read_workbook_index(path)
+        selected = list(dict.fromkeys(sheet_names or index.sheet_names))
+
+        results = {}
+        tasks = []
+        claimed = {}
+        for sheet in selected:
+            if sheet not in index.sheets:
+                results[sheet] = {'sheetName': sheet, 'success': False,
+                                  'error': f"Worksheet named '{sheet}' not found"}
+                continue
+            original_table_name, copy_table_name = build_table_names(filename, sheet)
+            if original_table_name in claimed:
+                results[sheet] = {'sheetName': sheet, 'tableName': original_table_name, 'success': False,
+                                  'error': f"Table name collides with sheet '{claimed[original_table_name]}'"}
+                continue
+            claimed[original_table_name] = sheet
+
+            fingerprint = upload_fingerprint(content_digest, sheet) if content_digest else None
+            reused_rows, _ = reuse_identical_table(owner, fingerprint, original_table_name, copy_table_name)
+            if reused_rows is not None:
+                results[sheet] = {'sheetName': sheet, 'tableName': original_table_name, 'success': True,
+                                  'rows': reused_rows, 'reused': True}
+                continue
+            tasks.append((sheet, original_table_name, copy_table_name, owner, fingerprint))
+
+        workers = min(max_workers, len(tasks))
+        print(f"Importing {len(tasks)} sheets with {max(workers, 1)} worker(s)")
+        if workers <= 1:
+            for task in tasks:
+                results[task[0]] = _ingest_sheet(path, index, *task)
+        else:
+            results.update(_run_sheet_tasks(path, index, tasks, workers))
+
+        if tasks:
+            catalog.invalidate(*[t[1] for t in tasks], *[t[2] for t in tasks])
+        return [results[sheet] for sheet in selected], None
+
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        return None, str(e)
+
+    finally:
+        if temporary:
+            os.remove(path)
@@ -0,0 +1,111 @@
+# upload_spool_helper_function
+
+import io
+import os
+import mmap
+import logging
+import tempfile
+
+from flask import Request
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.DEBUG)
+
+# Uploaded files larger than this are written to a file in UPLOAD_SPOOL_DIR
+# while the request is parsed; smaller ones stay in memory.
+UPLOAD_SPOOL_THRESHOLD = int(os.getenv('UPLOAD_SPOOL_THRESHOLD', 1024 * 1024))
+UPLOAD_SPOOL_DIR = os.getenv('UPLOAD_SPOOL_DIR', os.path.join(tempfile.gettempdir(), 'eda_upload_spool'))
+# Requests with a larger body are rejected with 413 before it is read;
+# 0 disables the cap.
+UPLOAD_MAX_BYTES = int(os.getenv('UPLOAD_MAX_BYTES', 2 * 1024 * 1024 * 1024))
+
+
+class SpoolingRequest(Request):
+    """Request that spools large uploaded files to named files on disk."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if total_content_length is not None and total_content_length <= UPLOAD_SPOOL_THRESHOLD:
+            return io.BytesIO()
+        os.makedirs(UPLOAD_SPOOL_DIR, exist_ok=True)
+        # Named, so the multi-sheet workers can open the spooled file by
+        # path; deleted when the request closes its files.
+        return tempfile.NamedTemporaryFile(mode='w+b', dir=UPLOAD_SPOOL_DIR, suffix='.upload')
+
+
+def max_content_length():
+    """Value for Flask's MAX_CONTENT_LENGTH: UPLOAD_MAX_BYTES, or None when disabled."""
+    return UPLOAD_MAX_BYTES or None
+
+
+class MappedFile(io.RawIOBase):
+    """Seekable read-only file object over an mmap, for zipfile and openpyxl."""
+
+    def __init__(self, mapped):
+        super().__init__()
+        self._map = mapped
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._pos + offset
+        elif whence == io.SEEK_END:
+            position = len(self._map) + offset
+        else:
+            raise ValueError(f"Invalid whence {whence}")
+        if position < 0:
+            raise ValueError("Negative seek position")
+        self._pos = position
+        return position
+
+    def read(self, size=-1):
+        end = len(self._map) if size is None or size < 0 else min(self._pos + size, len(self._map))
+        data = self._map[self._pos:end] if end > self._pos else b''
+        self._pos += len(data)
+        return data
+
+    def readall(self):
+        return self.read()
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def close(self):
+        if not self.closed:
+            self._map.close()
+        super().close()
+
+
+def map_upload(file):
+    """
+    Return a MappedFile over an upload that lives in a real file (spooled
+    request body, staged upload), or None when it is only in memory.
+
+    Parsers then read pages straight from the page cache, which the kernel
+    shares and can reclaim, instead of buffered copies in the worker heap.
+    The caller closes the returned object.
+    """
+    stream = getattr(file, 'stream', file)
+    stream = getattr(stream, 'file', stream)  # NamedTemporaryFile wrapper
+    if isinstance(stream, io.BytesIO):
+        return None
+    try:
+        stream.flush()
+        fileno = stream.fileno()
+        if os.fstat(fileno).st_size == 0:
+            return None
+        return MappedFile(mmap.mmap(fileno, 0, access=mmap.ACCESS_READ))
+    except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+        return None
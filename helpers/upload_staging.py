@@ -0,0 +1,220 @@
+# upload_staging_helper_function
+
+import os
+import re
+import json
+import time
+import errno
+import shutil
+import hashlib
+import logging
+import tempfile
+
+from werkzeug.datastructures import FileStorage
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.DEBUG)
+
+# Uploads are staged on local disk between the sheet-listing call and the
+# ingest call. Every gunicorn worker on the host shares the same directory.
+STAGING_DIR = os.getenv('UPLOAD_STAGING_DIR', os.path.join(tempfile.gettempdir(), 'eda_upload_staging'))
+STAGING_TTL = float(os.getenv('UPLOAD_STAGING_TTL', 3600))
+STAGING_MAX_BYTES = int(os.getenv('UPLOAD_STAGING_MAX_BYTES', 2 * 1024 * 1024 * 1024))
+
+_TOKEN_RE = re.compile(r'^[0-9a-f]{64}$')
+_COPY_BUFFER = 1024 * 1024
+
+
+def _data_path(token):
+    return os.path.join(STAGING_DIR, f"{token}.xlsx")
+
+
+def _meta_path(token):
+    return os.path.join(STAGING_DIR, f"{token}.json")
+
+
+def _remove(token):
+    for path in (_data_path(token), _meta_path(token)):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def stage_upload(file_storage):
+    """
+    Write an uploaded file to the staging area and return its token.
+
+    The token is the SHA-256 of the file content, so re-sending the same
+    workbook reuses the staged copy. A JSON sidecar keeps the original
+    filename for the ingest call.
+    """
+    os.makedirs(STAGING_DIR, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+
+    file_storage.stream.seek(0)
+    fd, tmp_path = tempfile.mkstemp(dir=STAGING_DIR, suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            while True:
+                block = file_storage.stream.read(_COPY_BUFFER)
+                if not block:
+                    break
+                digest.update(block)
+                out.write(block)
+                size += len(block)
+        token = digest.hexdigest()
+
+        # Atomic rename: concurrent stagings of the same content end up
+        # with one complete file whichever finishes last.
+        os.replace(tmp_path, _data_path(token))
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+    finally:
+        file_storage.stream.seek(0)
+
+    _write_meta(token, file_storage.filename, size)
+    evict_staged(keep=token)
+    logger.info(f"Staged upload {file_storage.filename} ({size} bytes) as {token}")
+    return token
+
+
+def stage_file(path, filename, expected_sha256=None):
+    """
+    Move a complete file already on local disk into the staging area and
+    return its token. The file is renamed, not copied, so ``path`` must be
+    on the same filesystem as UPLOAD_STAGING_DIR.
+
+    With ``expected_sha256``, a file whose content does not match is left
+    where it is and None is returned.
+    """
+    os.makedirs(STAGING_DIR, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(_COPY_BUFFER)
+            if not block:
+                break
+            digest.update(block)
+            size += len(block)
+    token = digest.hexdigest()
+    if expected_sha256 and token != expected_sha256.lower():
+        logger.warning(f"Not staging {filename}: sha256 {token} does not match {expected_sha256}")
+        return None
+
+    try:
+        os.replace(path, _data_path(token))
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        shutil.move(path, _data_path(token))
+    _write_meta(token, filename, size)
+    evict_staged(keep=token)
+    logger.info(f"Staged assembled upload {filename} ({size} bytes) as {token}")
+    return token
+
+
+def _write_meta(token, filename, size):
+    meta = {'filename': filename, 'size': size, 'staged_at': time.time()}
+    meta_tmp = f"{_meta_path(token)}.{os.getpid()}.part"
+    with open(meta_tmp, 'w') as f:
+        json.dump(meta, f)
+    os.replace(meta_tmp, _meta_path(token))
+
+
+def file_digest(file_storage):
+    """SHA-256 of an uploaded file's content: the same value stage_upload uses as token."""
+    digest = hashlib.sha256()
+    file_storage.stream.seek(0)
+    try:
+        while True:
+            block = file_storage.stream.read(_COPY_BUFFER)
+            if not block:
+                break
+            digest.update(block)
+    finally:
+        file_storage.stream.seek(0)
+    return digest.hexdigest()
+
+
+def open_staged(token):
+    """
+    Return the staged upload for ``token`` as a FileStorage, or None when the
+    token is unknown or expired. The caller closes the returned file.
+    """
+    if not token or not _TOKEN_RE.match(token):
+        return None
+
+    try:
+        with open(_meta_path(token)) as f:
+            meta = json.load(f)
+        if time.time() - os.path.getmtime(_data_path(token)) > STAGING_TTL:
+            _remove(token)
+            return None
+        stream = open(_data_path(token), 'rb')
+    except (FileNotFoundError, ValueError):
+        return None
+
+    # Touch on use so eviction is least-recently-used.
+    try:
+        os.utime(_data_path(token))
+    except FileNotFoundError:
+        pass
+    return FileStorage(stream=stream, filename=meta.get('filename') or f"{token}.xlsx")
+
+
+def evict_staged(keep=None, now=None):
+    """Delete expired staged files, then the least recently used over the size cap."""
+    now = time.time() if now is None else now
+    try:
+        names = os.listdir(STAGING_DIR)
+    except FileNotFoundError:
+        return 0
+
+    entries = []
+    for name in names:
+        path = os.path.join(STAGING_DIR, name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        if name.endswith('.part'):
+            # Leftovers of a crashed write.
+            if now - stat.st_mtime > STAGING_TTL:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            continue
+        if name.endswith('.xlsx'):
+            entries.append((stat.st_mtime, stat.st_size, name[:-len('.xlsx')]))
+
+    removed = 0
+    total = 0
+    live = []
+    for mtime, size, token in entries:
+        if token != keep and now - mtime > STAGING_TTL:
+            _remove(token)
+            removed += 1
+        else:
+            total += size
+            live.append((mtime, size, token))
+
+    for mtime, size, token in sorted(live):
+        if total <= STAGING_MAX_BYTES:
+            break
+        if token == keep:
+            continue
+        _remove(token)
+        total -= size
+        removed += 1
+
+    if removed:
+        logger.info(f"Evicted {removed} staged upload(s), {total} bytes remain")
+    return removed
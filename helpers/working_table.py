@@ -0,0 +1,217 @@
+# working_table_helper_function
+
+import os
+import logging
+
+from db.config import Database
+from db.catalog import catalog
+from helpers.table_metadata import set_row_count, copy_row_count, ensure_metadata_table, METADATA_TABLE
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.DEBUG)
+
+# 'copy' builds every <table>_copy as a full duplicate of the original at
+# upload time. 'lazy' creates it as a view over the original and turns it
+# into a real table only when an operation first modifies it.
+WORKING_TABLE_MODE = os.getenv('WORKING_TABLE_MODE', 'copy').lower()
+
+# 'unlogged' creates working copies and scratch tables without WAL; they
+# are emptied by a crash and rebuilt from the original at startup.
+# Original tables are always logged.
+WORKING_TABLE_STORAGE = os.getenv('WORKING_TABLE_STORAGE', 'logged').lower()
+
+
+def lazy_mode():
+    return WORKING_TABLE_MODE == 'lazy'
+
+
+def scratch_table_clause():
+    """'UNLOGGED ' when working/scratch tables skip WAL, else ''."""
+    return 'UNLOGGED ' if WORKING_TABLE_STORAGE == 'unlogged' else ''
+
+
+def relation_kind(cursor, name):
+    """Return pg_class.relkind of ``name`` straight from the server, or None."""
+    cursor.execute("""
+        SELECT c.relkind
+        FROM pg_catalog.pg_class c
+        WHERE c.relname = %s
+          AND pg_catalog.pg_table_is_visible(c.oid)
+    """, (name,))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def add_row_key(cursor, table_name):
+    """
+    Make ``id`` the primary key of a table built by CREATE TABLE AS or a
+    table swap, which keep the column but not its index. Pages are read in
+    ``id`` order, so without the key every keyset page would be a sort.
+    Does nothing if the table has no ``id`` column or already has a key.
+
+    Returns:
+        bool: True if the key was added by this call
+    """
+    cursor.execute("""
+        SELECT EXISTS (SELECT 1 FROM pg_catalog.pg_attribute a
+                       WHERE a.attrelid = c.oid AND a.attname = 'id' AND NOT a.attisdropped),
+               EXISTS (SELECT 1 FROM pg_catalog.pg_index i
+                       WHERE i.indrelid = c.oid AND i.indisprimary)
+        FROM pg_catalog.pg_class c
+        WHERE c.relname = %s
+          AND c.relkind = 'r'
+          AND pg_catalog.pg_table_is_visible(c.oid)
+    """, (table_name,))
+    row = cursor.fetchone()
+    if row is None or not row[0] or row[1]:
+        return False
+    cursor.execute(f'ALTER TABLE "{table_name}" ADD PRIMARY KEY (id);')
+    return True
+
+
+def drop_working_table(cursor, copy_table_name):
+    """Drop a working copy whether it is currently a table or a view."""
+    kind = relation_kind(cursor, copy_table_name)
+    if kind == 'v':
+        cursor.execute(f'DROP VIEW IF EXISTS "{copy_table_name}" CASCADE;')
+    elif kind is not None:
+        cursor.execute(f'DROP TABLE IF EXISTS "{copy_table_name}" CASCADE;')
+    catalog.invalidate(copy_table_name)
+
+
+def create_working_table(cursor, original_table_name, copy_table_name):
+    """(Re)create the working copy of an original table for the configured mode."""
+    drop_working_table(cursor, copy_table_name)
+    if lazy_mode():
+        cursor.execute(f'CREATE VIEW "{copy_table_name}" AS SELECT * FROM "{original_table_name}";')
+        copy_row_count(cursor, original_table_name, copy_table_name)
+    else:
+        cursor.execute(f'CREATE {scratch_table_clause()}TABLE "{copy_table_name}" AS SELECT * FROM "{original_table_name}";')
+        set_row_count(cursor, copy_table_name, cursor.rowcount)
+        add_row_key(cursor, copy_table_name)
+    catalog.invalidate(copy_table_name)
+
+
+def materialize_working_table(cursor, copy_table_name, with_data=True):
+    """
+    Turn a working copy that is still a view into a real table before it is
+    modified. Does nothing if it already is a table.
+
+    ``with_data=False`` creates it empty, for callers that rewrite every
+    row anyway (filter, dedupe).
+
+    Returns:
+        bool: True if the copy was materialized by this call
+    """
+    info = catalog.describe(cursor, copy_table_name)
+    if info is not None and not info.is_view:
+        return False
+
+    # Serialize concurrent first writes; re-check under the lock since the
+    # cached kind may be stale.
+    cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s));", (copy_table_name,))
+    if relation_kind(cursor, copy_table_name) != 'v':
+        return False
+
+    staging_name = f"{copy_table_name}__cow"
+    data_clause = '' if with_data else ' WITH NO DATA'
+    logger.info(f"Materializing working table {copy_table_name}")
+    cursor.execute(f'DROP TABLE IF EXISTS "{staging_name}";')
+    cursor.execute(f'CREATE {scratch_table_clause()}TABLE "{staging_name}" AS SELECT * FROM "{copy_table_name}"{data_clause};')
+    cursor.execute(f'DROP VIEW "{copy_table_name}";')
+    cursor.execute(f'ALTER TABLE "{staging_name}" RENAME TO "{copy_table_name}";')
+    add_row_key(cursor, copy_table_name)
+    catalog.invalidate(copy_table_name)
+    return True
+
+
+def reset_working_table(cursor, original_table_name, copy_table_name):
+    """
+    Discard all changes to a lazy working copy by pointing it back at the
+    original: a metadata-only operation, whatever the table size.
+    """
+    drop_working_table(cursor, copy_table_name)
+    cursor.execute(f'CREATE VIEW "{copy_table_name}" AS SELECT * FROM "{original_table_name}";')
+    copy_row_count(cursor, original_table_name, copy_table_name)
+    catalog.invalidate(copy_table_name)
+
+
+# Unlogged one-row table: crash recovery empties it along with the unlogged
+# working copies, so an empty sentinel means a crash since it was filled.
+RECOVERY_SENTINEL = 'working_table_sentinel'
+
+_EMPTY_UNLOGGED_COPIES_QUERY = f"""
+    SELECT c.relname
+    FROM pg_catalog.pg_class c
+    JOIN {METADATA_TABLE} m ON m.table_name = c.relname
+    WHERE c.relname LIKE '%%\\_copy'
+      AND c.relkind = 'r'
+      AND c.relpersistence = 'u'
+      AND m.row_count > 0
+      AND pg_catalog.pg_table_is_visible(c.oid)
+"""
+
+
+def crashed_since_last_check(cursor):
+    """
+    True if the server went through crash recovery since the last call
+    (or this is the first one), by the emptied sentinel table. Refills it.
+    """
+    cursor.execute(f"CREATE UNLOGGED TABLE IF NOT EXISTS {RECOVERY_SENTINEL} (alive BOOLEAN);")
+    cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {RECOVERY_SENTINEL});")
+    if cursor.fetchone()[0]:
+        return False
+    cursor.execute(f"INSERT INTO {RECOVERY_SENTINEL} VALUES (TRUE);")
+    return True
+
+
+def rebuild_truncated_copies(cursor):
+    """
+    Rebuild unlogged working copies that crash recovery truncated.
+
+    Only runs after a crash (see ``crashed_since_last_check``), and only
+    rebuilds a copy that is empty while its maintained row count says it
+    had rows, so copies a user emptied on purpose (filter, remove) are
+    left alone. It is recreated from the original, which is what /sync
+    would do. Serialized across workers with an advisory lock.
+
+    Returns:
+        list: names of the copies that were rebuilt
+    """
+    cursor.execute("SELECT pg_advisory_xact_lock(hashtext('working_table_recovery'));")
+    if not crashed_since_last_check(cursor):
+        return []
+    ensure_metadata_table(cursor)
+    cursor.execute(_EMPTY_UNLOGGED_COPIES_QUERY)
+    candidates = [row[0] for row in cursor.fetchall()]
+
+    rebuilt = []
+    for copy_table_name in candidates:
+        original_table_name = copy_table_name[:-len('_copy')]
+        if relation_kind(cursor, original_table_name) not in ('r', 'p'):
+            continue
+        cursor.execute(f'SELECT EXISTS (SELECT 1 FROM "{copy_table_name}");')
+        if cursor.fetchone()[0]:
+            continue
+
+        logger.warning(f"Unlogged working table {copy_table_name} was emptied by a crash, "
+                       f"rebuilding from {original_table_name}")
+        create_working_table(cursor, original_table_name, copy_table_name)
+        rebuilt.append(copy_table_name)
+    return rebuilt
+
+
+def recover_working_tables():
+    """Startup hook: rebuild truncated unlogged copies on a pooled connection."""
+    db = Database()
+    try:
+        with db.connection() as conn:
+            with conn.cursor() as cursor:
+                rebuilt = rebuild_truncated_copies(cursor)
+            conn.commit()
+        if rebuilt:
+            logger.info(f"Rebuilt working tables after crash recovery: {rebuilt}")
+        return rebuilt
+    except Exception as e:
+        logger.warning(f"Could not recover working tables: {e}")
+        return []
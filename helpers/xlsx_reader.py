@@ -0,0 +1,271 @@
+# xlsx_reader_helper_function
+
+import re
+import zipfile
+import logging
+import posixpath
+from datetime import datetime, timedelta
+import xml.etree.ElementTree as ET
+
+logger = logging.getLogger(__name__)
+logging.basicConfig(level=logging.DEBUG)
+
+# Built-in number formats that display a date and/or time (ECMA-376 18.8.30).
+_BUILTIN_DATE_FORMATS = set(range(14, 23)) | set(range(27, 37)) | set(range(45, 48)) | set(range(50, 59))
+# Quoted literals, escaped characters and [colour]/[locale] sections never
+# make a format a date format.
+_FORMAT_NOISE = re.compile(r'"[^"]*"|\\.|\[[^\]]*\]')
+_DATE_TOKENS = re.compile(r'[dmyhs]', re.IGNORECASE)
+
+_EPOCH_1900 = datetime(1899, 12, 30)
+_EPOCH_1904 = datetime(1904, 1, 1)
+
+_REL_ID = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id'
+
+
+def _local(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+def _column_index(ref):
+    """Zero-based column index of a cell reference such as 'AB12'."""
+    index = 0
+    for ch in ref:
+        if 'A' <= ch <= 'Z':
+            index = index * 26 + ord(ch) - 64
+        else:
+            break
+    return index - 1
+
+
+def is_date_format(format_code):
+    if not format_code:
+        return False
+    cleaned = _FORMAT_NOISE.sub('', format_code)
+    return bool(_DATE_TOKENS.search(cleaned))
+
+
+def from_excel(serial, date1904=False):
+    """Convert an Excel date serial to a datetime."""
+    if date1904:
+        return _EPOCH_1904 + timedelta(days=serial)
+    if 0 < serial < 60:
+        # Serials before Excel's phantom 1900-02-29 are off by one.
+        serial += 1
+    return _EPOCH_1900 + timedelta(days=serial)
+
+
+class WorkbookIndex:
+    """Everything a sheet reader needs that is shared by all sheets of a workbook."""
+
+    def __init__(self, sheets, shared_strings, date_styles, date1904):
+        self.sheets = sheets                  # {sheet_name: zip member of its XML}, workbook order
+        self.shared_strings = shared_strings  # [str] or LazySharedStrings
+        self.date_styles = date_styles        # frozenset of cellXfs indexes with a date format
+        self.date1904 = date1904
+
+    @property
+    def sheet_names(self):
+        return list(self.sheets)
+
+
+def _read_sheet_members(archive):
+    rels = ET.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+    targets = {}
+    for rel in rels:
+        target = rel.get('Target', '')
+        if target.startswith('/'):
+            member = target.lstrip('/')
+        else:
+            member = posixpath.normpath(posixpath.join('xl', target))
+        targets[rel.get('Id')] = member
+
+    workbook = ET.fromstring(archive.read('xl/workbook.xml'))
+    sheets = {}
+    date1904 = False
+    for el in workbook.iter():
+        tag = _local(el.tag)
+        if tag == 'workbookPr':
+            date1904 = el.get('date1904', '0').lower() in ('1', 'true')
+        elif tag == 'sheet':
+            sheets[el.get('name')] = targets.get(el.get(_REL_ID))
+    return sheets, date1904
+
+
+def _iter_shared_strings(source):
+    for _, el in ET.iterparse(source):
+        if _local(el.tag) != 'si':
+            continue
+        # Plain <t>, or rich-text runs <r><t/></r>; phonetic <rPh> runs are skipped.
+        parts = []
+        for child in el:
+            tag = _local(child.tag)
+            if tag == 't':
+                parts.append(child.text or '')
+            elif tag == 'r':
+                for t in child:
+                    if _local(t.tag) == 't':
+                        parts.append(t.text or '')
+        yield ''.join(parts)
+        el.clear()
+
+
+def _read_shared_strings(archive):
+    try:
+        source = archive.open('xl/sharedStrings.xml')
+    except KeyError:
+        return []
+
+    with source:
+        return list(_iter_shared_strings(source))
+
+
+class LazySharedStrings:
+    """
+    Shared strings parsed only as far as the highest index looked up so far.
+
+    Excel and openpyxl number shared strings in order of first use, so the
+    first rows of a sheet only need the start of a table that can hold
+    millions of strings. Reads from the open archive; call ``close``.
+    """
+
+    def __init__(self, archive):
+        try:
+            self._source = archive.open('xl/sharedStrings.xml')
+            self._strings = _iter_shared_strings(self._source)
+        except KeyError:
+            self._source = None
+            self._strings = iter(())
+        self._parsed = []
+
+    def __getitem__(self, position):
+        while len(self._parsed) <= position:
+            try:
+                self._parsed.append(next(self._strings))
+            except StopIteration:
+                raise IndexError(f"Shared string {position} does not exist")
+        return self._parsed[position]
+
+    def close(self):
+        if self._source is not None:
+            self._source.close()
+
+
+def _read_date_styles(archive):
+    try:
+        styles = ET.fromstring(archive.read('xl/styles.xml'))
+    except KeyError:
+        return frozenset()
+
+    custom_formats = {}
+    date_styles = set()
+    for el in styles:
+        tag = _local(el.tag)
+        if tag == 'numFmts':
+            for fmt in el:
+                custom_formats[int(fmt.get('numFmtId'))] = fmt.get('formatCode')
+        elif tag == 'cellXfs':
+            for i, xf in enumerate(el):
+                fmt_id = int(xf.get('numFmtId', 0))
+                if fmt_id in custom_formats:
+                    if is_date_format(custom_formats[fmt_id]):
+                        date_styles.add(i)
+                elif fmt_id in _BUILTIN_DATE_FORMATS:
+                    date_styles.add(i)
+    return frozenset(date_styles)
+
+
+def read_workbook_index(file):
+    """
+    Open the zip once and read the sheet list, shared strings and date styles.
+
+    ``file`` is a path or a seekable binary file object. The result is
+    picklable, so it can be handed to worker processes once per workbook.
+    """
+    with zipfile.ZipFile(file) as archive:
+        return index_archive(archive)
+
+
+def index_archive(archive, lazy_strings=False):
+    """
+    WorkbookIndex of an open zip. With ``lazy_strings`` the shared strings
+    are a LazySharedStrings over the archive: it must stay open while rows
+    are read, and the index is no longer picklable.
+    """
+    sheets, date1904 = _read_sheet_members(archive)
+    shared_strings = LazySharedStrings(archive) if lazy_strings else _read_shared_strings(archive)
+    return WorkbookIndex(sheets, shared_strings, _read_date_styles(archive), date1904)
+
+
+def _cell_value(cell_type, raw, style, index):
+    if cell_type == 's':
+        return index.shared_strings[int(raw)]
+    if cell_type in ('str', 'inlineStr'):
+        return raw
+    if cell_type == 'b':
+        return raw == '1'
+    if cell_type == 'e':
+        # Error cells (#N/A, #DIV/0!) load as missing values, like pandas.
+        return None
+    if cell_type == 'd':
+        return datetime.fromisoformat(raw)
+    if '.' in raw or 'E' in raw or 'e' in raw:
+        value = float(raw)
+    else:
+        value = int(raw)
+    if style in index.date_styles:
+        return from_excel(value, index.date1904)
+    return value
+
+
+def iter_sheet_rows(archive, member, index):
+    """
+    Yield the rows of one worksheet as tuples of Python values.
+
+    Rows are parsed incrementally from the zip member, so memory stays flat
+    whatever the sheet size. Missing rows are yielded as empty tuples and
+    missing cells as None, the way openpyxl's read-only ``values_only`` does.
+    """
+    next_row = 1
+    sheet_data = None
+    with archive.open(member) as source:
+        for event, el in ET.iterparse(source, events=('start', 'end')):
+            tag = _local(el.tag)
+            if event == 'start':
+                if tag == 'sheetData':
+                    sheet_data = el
+                continue
+            if tag != 'row':
+                continue
+
+            row_number = int(el.get('r', next_row))
+            while next_row < row_number:
+                yield ()
+                next_row += 1
+            next_row = row_number + 1
+
+            values = []
+            for position, cell in enumerate(el):
+                if _local(cell.tag) != 'c':
+                    continue
+                ref = cell.get('r')
+                column = _column_index(ref) if ref else position
+                raw = None
+                cell_type = cell.get('t', 'n')
+                for child in cell:
+                    child_tag = _local(child.tag)
+                    if child_tag == 'v':
+                        raw = child.text
+                    elif child_tag == 'is':
+                        raw = ''.join(t.text or '' for t in child.iter() if _local(t.tag) == 't')
+                if raw is None:
+                    continue
+                if column >= len(values):
+                    values.extend([None] * (column + 1 - len(values)))
+                values[column] = _cell_value(cell_type, raw, int(cell.get('s', 0)), index)
+
+            yield tuple(values)
+            if sheet_data is not None:
+                sheet_data.clear()
+            else:
+                el.clear()
@@ -1,16 +1,26 @@
 from flask import Blueprint, request, jsonify,Flask,make_response,flash,current_app
 from io import BytesIO,StringIO
-from flask import Blueprint, request, jsonify, Flask, make_response, flash, current_app, redirect
+from flask import Blueprint, request, jsonify, Flask, make_response, flash, current_app, redirect, g
+from flask import Response, stream_with_context
 import helpers
 import pandas as pd
 import re
 from helpers.Get_data import get_table_data
 from helpers.Get_datas import get_table_datas
 from helpers.Updated_Get_O_D import Gets_Data
+from helpers.keyset import decode_after, RESPONSE_FORMATS, ROW_KEY
+from helpers.table_stream import STREAM_FORMATS, resolve_stream_table, stream_table
+from helpers.table_export import EXPORT_FORMATS
 from helpers.updated_stats import get_table_statistic
 import json
 from datetime import date, datetime,timedelta
 from helpers.upload_insert_data import get_sheet_names
+from helpers.delimited_ingest import is_delimited
+from helpers.sheet_preview import preview_sheet, PREVIEW_MAX_ROWS
+from helpers.upload_staging import stage_upload, open_staged, file_digest
+from helpers.ingest_jobs import submit_ingest_job, get_job, cancel_job
+from helpers.chunked_upload import (ChunkError, initiate_upload, upload_status, write_chunk,
+                                    complete_upload, abort_upload)
 import jwt
 from io import StringIO
 import psycopg2
@@ -18,6 +28,8 @@ from flask_cors import CORS
 from openpyxl import load_workbook
 from psycopg2.extras import RealDictCursor,execute_values
 from psycopg2 import Error
+from werkzeug.http import parse_content_range_header
+from werkzeug.exceptions import RequestEntityTooLarge
 from contextlib import closing
 import os
 import uuid
@@ -29,7 +41,8 @@ from functools import wraps
 from jwt import ExpiredSignatureError, InvalidTokenError
 from  helpers.login import authenticate_user
 from  helpers.remove_column import get_remaining_columns,verify_table_exists,remove_columns
-from  helpers.upload_insert_data import insert_data_from_excel
+from  helpers.upload_insert_data import insert_data_from_excel, insert_sheets_from_excel, build_table_names
+from  helpers.upload_insert_data import upload_fingerprint, reuse_identical_table
 from  helpers.update_overview import get_column_types_from_db
 from  helpers.filter_column import filter_dataframe_multiple,apply_filters_to_table
 from  helpers.change_datatype import check_table_existence, change_column_data_types, CustomJSONEncoder
@@ -72,6 +85,9 @@ def token_required(func):
         except InvalidTokenError:
             return jsonify({'Message': 'Invalid token'}), 403
 
+        # The signed-in user, for helpers that keep per-user records
+        g.user = data.get('user')
+
         return func(*args, **kwargs)
 
     return decorated
@@ -80,6 +96,16 @@ def token_required(func):
 main = Blueprint("main", __name__)
 
 
+@main.app_errorhandler(RequestEntityTooLarge)
+def request_too_large(e):
+    limit = current_app.config.get('MAX_CONTENT_LENGTH')
+    return jsonify({
+        'error': 'Request body too large',
+        'maxBytes': limit,
+        'hint': 'Use /upload/chunked for large files'
+    }), 413
+
+
 # count Router
 @main.route('/get_data', methods=['GET'])
 @token_required
@@ -109,6 +135,19 @@ def get_data_display():
 
     return jsonify(overview), 200
 
+# db_pool_stats Router
+@main.route('/db/pool_stats', methods=['GET'])
+@token_required
+def db_pool_stats():
+    """Expose connection pool usage of this worker for sizing."""
+    try:
+        return jsonify(Database().pool_stats()), 200
+
+    except Exception as e:
+        logger.error(f"Unexpected error in db_pool_stats: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
 # datatype_manage Router
 @main.route('/check_table/<table_name>', methods=['GET'])
 @token_required
@@ -202,13 +241,24 @@ def fetch_data():
         sheet_name = request.args.get('sheetName')
         page = int(request.args.get('page', 0))
         page_size = int(request.args.get('pageSize', 10))
+        after_token = request.args.get('after')
+        response_format = request.args.get('format', 'rows')
 
         logger.info(f"Fetching data for file: {filename}, sheet: {sheet_name}, page: {page}, pageSize: {page_size}")
 
         if not filename or not sheet_name:
             return jsonify({"error": "Filename and sheetName are required"}), 400
+        if response_format not in RESPONSE_FORMATS:
+            return jsonify({"error": f"format must be one of {list(RESPONSE_FORMATS)}"}), 400
 
-        result, error = get_table_data(filename, sheet_name, page, page_size)
+        after = None
+        if after_token:
+            try:
+                after = decode_after(after_token)
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+
+        result, error = get_table_data(filename, sheet_name, page, page_size, after, response_format)
 
         if error:
             if "does not exist" in error:
@@ -588,12 +638,19 @@ def fetched_data():
         # Get filename from query parameter
         filename = request.args.get('Filename')
 
-        # Check if pagination parameters are provided
-        pagination_requested = 'page' in request.args and 'pageSize' in request.args
+        # Check if pagination parameters are provided: page or an after token from the previous page
+        after_token = request.args.get('after')
+        pagination_requested = 'pageSize' in request.args and ('page' in request.args or after_token is not None)
 
+        after = None
         if pagination_requested:
             page = int(request.args.get('page', 0))
             page_size = int(request.args.get('pageSize', 10))
+            if after_token:
+                try:
+                    after = decode_after(after_token)
+                except ValueError as e:
+                    return jsonify({"error": str(e)}), 400
         else:
             # Default values for backward compatibility
             page = None
@@ -602,10 +659,29 @@ def fetched_data():
         if not filename:
             return jsonify({"error": "Filename parameter is required"}), 400
 
+        response_format = request.args.get('format', 'rows')
+        if response_format not in RESPONSE_FORMATS:
+            return jsonify({"error": f"format must be one of {list(RESPONSE_FORMATS)}"}), 400
+
+        # Whole table as a stream (stream=ndjson|json, or Accept: application/x-ndjson)
+        stream_format = request.args.get('stream')
+        if stream_format is None and 'application/x-ndjson' in request.headers.get('Accept', ''):
+            stream_format = 'ndjson'
+        if stream_format and not pagination_requested:
+            if stream_format not in STREAM_FORMATS:
+                return jsonify({"error": f"stream must be one of {sorted(STREAM_FORMATS)}"}), 400
+            table_info, error = resolve_stream_table(filename)
+            if error:
+                return jsonify({"error": error}), 404 if "does not exist" in error else 500
+            logger.info(f"Streaming {table_info.name} as {stream_format}")
+            stream = stream_table(table_info.name, table_info.column_names(include_id=False),
+                                  table_info.has_column(ROW_KEY), stream_format)
+            return Response(stream_with_context(stream), mimetype=STREAM_FORMATS[stream_format])
+
         logger.info(f"Received request for filename: {filename}, pagination requested: {pagination_requested}")
 
         # Get data from the table
-        result = Gets_Data(filename, page, page_size)
+        result = Gets_Data(filename, page, page_size, after, response_format)
 
         # Check if result is an error response
         if isinstance(result, tuple) and len(result) == 2:
@@ -614,17 +690,20 @@ def fetched_data():
                 return jsonify(result[0]), result[1]
 
         # Handle different return formats based on pagination
-        if pagination_requested and len(result) == 3:
-            data, columns, total_rows = result
-            logger.info(f"Successfully processed paginated data with {len(data)} rows, total rows: {total_rows}")
+        if pagination_requested and len(result) == 4:
+            data, columns, total_rows, next_after = result
+            logger.info(f"Successfully processed paginated data, total rows: {total_rows}")
+            if response_format == 'columnar':
+                return jsonify({**data, "totalRows": total_rows, "nextAfter": next_after})
             return jsonify({
                 "data": data,
-                "totalRows": total_rows
+                "totalRows": total_rows,
+                "nextAfter": next_after
             })
         else:
             # For backward compatibility, return just the data
             data = result
-            logger.info(f"Successfully processed data with {len(data)} rows")
+            logger.info("Successfully processed full table data")
             return jsonify(data)
 
     except Exception as e:
@@ -632,6 +711,32 @@ def fetched_data():
         return jsonify({"error": str(e)}), 500
 
 
+# Export Router: whole working copy as an Arrow IPC stream or a Parquet file
+@main.route('/export/<export_format>', methods=['GET'])
+@token_required
+def export_table(export_format):
+    try:
+        filename = request.args.get('Filename')
+        if not filename:
+            return jsonify({"error": "Filename parameter is required"}), 400
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({"error": f"export format must be one of {sorted(EXPORT_FORMATS)}"}), 400
+
+        table_info, error = resolve_stream_table(filename)
+        if error:
+            return jsonify({"error": error}), 404 if "does not exist" in error else 500
+
+        exporter, mimetype, extension = EXPORT_FORMATS[export_format]
+        logger.info(f"Exporting {table_info.name} as {export_format}")
+        response = Response(stream_with_context(exporter(table_info)), mimetype=mimetype)
+        response.headers['Content-Disposition'] = f'attachment; filename="{table_info.name}.{extension}"'
+        return response
+
+    except Exception as e:
+        logger.error(f"Error in export_table: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
 # updtaed_statistics
 @main.route('/updated_statistics', methods=['GET'])
 @token_required
@@ -661,6 +766,59 @@ from flask import request, jsonify
 from route.routes import main
   # adjust import as needed
 
+def load_sheet_response(file, sheetname, owner, content_digest, staging_token=None, run_async=False):
+    """Load one sheet of an upload (or reuse it) and return the /upload/ response."""
+    original_table_name, copy_table_name = build_table_names(file.filename, sheetname)
+    fingerprint = upload_fingerprint(content_digest, sheetname)
+
+    # Same user, same file and sheet: keep the original, reset the copy
+    reused_rows, error = reuse_identical_table(owner, fingerprint, original_table_name, copy_table_name)
+    if error:
+        print(f"Could not reuse existing table, loading again: {error}")
+    if reused_rows is not None:
+        return jsonify({
+            'message': 'File already uploaded, working copy reset',
+            'success': True,
+            'reused': True,
+            'rowCount': reused_rows,
+            'tableName': original_table_name
+        }), 200
+
+    if run_async:
+        # Background job: answer at once, load from the staged copy.
+        try:
+            token = staging_token or stage_upload(file)
+            job = submit_ingest_job(token, file.filename, sheetname,
+                                    original_table_name, copy_table_name,
+                                    owner=owner, fingerprint=fingerprint)
+        except Exception as e:
+            print(f"Error starting ingest job: {str(e)}")
+            return jsonify({'error': f'Failed to start import: {str(e)}'}), 500
+        return jsonify({
+            'message': 'Import started',
+            'jobId': job['jobId'],
+            'tableName': original_table_name,
+            'statusUrl': f"/upload/jobs/{job['jobId']}"
+        }), 202
+
+    try:
+        success, error = insert_data_from_excel(file, original_table_name, copy_table_name, sheetname,
+                                                owner=owner, fingerprint=fingerprint)
+
+        if success:
+            return jsonify({
+                'message': 'File uploaded and data saved successfully',
+                'success': True,
+                'tableName': original_table_name  # ✅ important for frontend
+            }), 200
+        else:
+            return jsonify({'error': f'Failed to save data: {error}'}), 400
+
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        return jsonify({'error': f'An error occurred: {str(e)}'}), 500
+
+
 @main.route('/upload/', methods=['POST', 'GET'])
 @token_required  # Uncomment if you want to enable token checking later
 def upload_excel():
@@ -668,71 +826,249 @@ def upload_excel():
         print("Request files:", request.files)
         print("Request form keys:", request.form.keys())
 
-        if 'file' not in request.files:
+        # The second call can name the file staged by the first one
+        # instead of sending the bytes again.
+        staging_token = request.form.get('stagingToken')
+        staged = None
+
+        if 'file' in request.files:
+            file = request.files['file']
+        elif staging_token:
+            staged = open_staged(staging_token)
+            if staged is None:
+                return jsonify({'error': 'Staged upload not found or expired, please upload the file again'}), 404
+            file = staged
+        else:
             print("Key not found in request files")
             return jsonify({'error': 'No file part in the request'}), 400
 
-        file = request.files['file']
-
         if file.filename == '':
             return jsonify({'error': 'No file selected'}), 400
 
-        if not file.filename.endswith(('.xlsx')):
-            return jsonify({'error': 'Invalid file format. Only .xlsx format is allowed.'}), 400
+        delimited = is_delimited(file.filename)
+        if not (file.filename.endswith('.xlsx') or delimited):
+            return jsonify({'error': 'Invalid file format. Only .xlsx, .csv and .tsv (optionally .gz or .zst) are allowed.'}), 400
 
         # Get sheetName if present
         sheetname = request.form.get('sheetName')
 
-        if sheetname:
-            # Case 2: sheetName present -> process file with this sheet
-            import re
-            base_name = os.path.splitext(file.filename)[0]
-            safe_base_name = re.sub(r'\W+', '_', base_name)
-            safe_sheetname = re.sub(r'\W+', '_', sheetname)
-
-            # Truncate names if they're too long (PostgreSQL has 63 byte limit for identifiers)
-            max_length = 10  # Allow 30 chars for each part to stay under the limit
-            if len(safe_base_name) > max_length:
-                safe_base_name = safe_base_name[:max_length]
-            if len(safe_sheetname) > max_length:
-                safe_sheetname = safe_sheetname[:max_length]
+        # Several sheets at once: sheetNames (repeated field or JSON list) or allSheets=true
+        sheet_names = request.form.getlist('sheetNames')
+        if len(sheet_names) == 1 and sheet_names[0].startswith('['):
+            sheet_names = json.loads(sheet_names[0])
+        all_sheets = request.form.get('allSheets', '').lower() in ('1', 'true', 'yes')
 
-            # Convert to lowercase to avoid case sensitivity issues
-            safe_base_name = safe_base_name.lower()
-            safe_sheetname = safe_sheetname.lower()
+        # Content hash of the workbook: identical re-uploads reuse their tables
+        owner = g.get('user')
+        content_digest = None
+        if sheet_names or all_sheets or sheetname:
+            content_digest = staging_token if staged is not None else file_digest(file)
 
-            original_table_name = f"{safe_base_name}_{safe_sheetname}"
-            copy_table_name = f"{original_table_name}_copy"
+        if (sheet_names or all_sheets) and delimited:
+            if staged is not None:
+                staged.close()
+            return jsonify({'error': 'Loading several sheets at once is only possible for .xlsx workbooks'}), 400
 
+        if sheet_names or all_sheets:
             try:
-                success, error = insert_data_from_excel(file, original_table_name, copy_table_name, sheetname)
+                results, error = insert_sheets_from_excel(file, file.filename, sheet_names or None,
+                                                          owner=owner, content_digest=content_digest)
+            finally:
+                if staged is not None:
+                    staged.close()
+            if error:
+                return jsonify({'error': f'Failed to save data: {error}'}), 400
+
+            succeeded = sum(1 for result in results if result['success'])
+            status = 200 if succeeded == len(results) else 207 if succeeded else 400
+            return jsonify({'success': succeeded == len(results), 'results': results}), status
 
-                if success:
-                    return jsonify({
-                        'message': 'File uploaded and data saved successfully',
-                        'success': True,
-                        'tableName': original_table_name  # ✅ important for frontend
-                    }), 200
-                else:
-                    return jsonify({'error': f'Failed to save data: {error}'}), 400
-
-            except Exception as e:
-                print(f"Error: {str(e)}")
-                return jsonify({'error': f'An error occurred: {str(e)}'}), 500
+        if sheetname:
+            # Case 2: sheetName present -> process file with this sheet
+            try:
+                run_async = request.form.get('async', '').lower() in ('1', 'true', 'yes')
+                return load_sheet_response(file, sheetname, owner, content_digest,
+                                           staging_token if staged is not None else None, run_async)
+            finally:
+                if staged is not None:
+                    staged.close()
 
         else:
             # Case 1: initial upload -> return available sheet names
             try:
                 sheet_names = get_sheet_names(file)
-                return jsonify({'sheetNames': sheet_names}), 200
-
             except Exception as e:
                 print(f"Error getting sheet names: {str(e)}")
                 return jsonify({'error': f'Failed to get sheet names: {str(e)}'}), 500
+            finally:
+                if staged is not None:
+                    staged.close()
+
+            response = {'sheetNames': sheet_names}
+            if staged is not None:
+                response['stagingToken'] = staging_token
+            else:
+                try:
+                    response['stagingToken'] = stage_upload(file)
+                except Exception as e:
+                    # Without a token the client simply re-sends the file.
+                    logger.warning(f"Could not stage upload: {str(e)}")
+            return jsonify(response), 200
 
     return jsonify({'message': 'Please use POST method to upload files.'}), 405
 
 
+@main.route('/upload/preview', methods=['POST'])
+@token_required
+def preview_upload():
+    """
+    First rows and inferred column types of one sheet, without importing it.
+    Takes the stagingToken from the first /upload/ call (or a file) plus
+    sheetName and optionally rows.
+    """
+    params = request.get_json(silent=True) or request.form
+    staging_token = params.get('stagingToken')
+
+    staged = None
+    if 'file' in request.files:
+        file = request.files['file']
+    elif staging_token:
+        staged = open_staged(staging_token)
+        if staged is None:
+            return jsonify({'error': 'Staged upload not found or expired, please upload the file again'}), 404
+        file = staged
+    else:
+        return jsonify({'error': 'A stagingToken or a file is required'}), 400
+
+    try:
+        if not (file.filename.endswith('.xlsx') or is_delimited(file.filename)):
+            return jsonify({'error': 'Invalid file format. Only .xlsx, .csv and .tsv (optionally .gz or .zst) are allowed.'}), 400
+
+        sheetname = params.get('sheetName')
+        if not sheetname and not is_delimited(file.filename):
+            return jsonify({'error': 'sheetName is required'}), 400
+
+        try:
+            rows = int(params.get('rows') or 0) or None
+        except (TypeError, ValueError):
+            return jsonify({'error': 'rows must be an integer'}), 400
+        if rows is not None and not 1 <= rows <= PREVIEW_MAX_ROWS:
+            return jsonify({'error': f'rows must be between 1 and {PREVIEW_MAX_ROWS}'}), 400
+
+        preview, error = preview_sheet(file, sheetname, rows)
+        if error:
+            return jsonify({'error': f'Failed to preview sheet: {error}'}), 400
+        return jsonify(preview), 200
+    finally:
+        if staged is not None:
+            staged.close()
+
+
+@main.route('/upload/jobs/<job_id>', methods=['GET'])
+@token_required
+def upload_job_status(job_id):
+    job = get_job(job_id, owner=g.get('user'))
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job), 200
+
+
+@main.route('/upload/jobs/<job_id>/cancel', methods=['POST'])
+@token_required
+def cancel_upload_job(job_id):
+    job, error = cancel_job(job_id, owner=g.get('user'))
+    if error:
+        return jsonify({'error': error}), 404
+    return jsonify(job), 202 if job['status'] not in ('done', 'failed', 'cancelled') else 200
+
+
+# chunked upload Router
+@main.route('/upload/chunked', methods=['POST'])
+@token_required
+def initiate_chunked_upload():
+    """Start a resumable upload: {fileName, totalSize} -> uploadId."""
+    data = request.get_json(silent=True) or {}
+    status, error = initiate_upload(data.get('fileName'), data.get('totalSize'), owner=g.get('user'))
+    if error:
+        return jsonify({'error': error}), 400
+    status['uploadUrl'] = f"/upload/chunked/{status['uploadId']}"
+    return jsonify(status), 201
+
+
+@main.route('/upload/chunked/<upload_id>', methods=['PUT'])
+@token_required
+def put_upload_chunk(upload_id):
+    """
+    Store one byte range. Headers: Content-Range: bytes <start>-<end>/<total>
+    and optionally X-Chunk-Sha256 with the hex SHA-256 of the body.
+    """
+    content_range = parse_content_range_header(request.headers.get('Content-Range'))
+    if content_range is None or content_range.units != 'bytes' or content_range.start is None:
+        return jsonify({'error': 'A Content-Range: bytes <start>-<end>/<total> header is required'}), 400
+
+    try:
+        status = write_chunk(upload_id, content_range.start, content_range.stop, content_range.length,
+                             request.stream, sha256=request.headers.get('X-Chunk-Sha256'),
+                             owner=g.get('user'))
+    except ChunkError as e:
+        return jsonify({'error': str(e)}), e.status
+    return jsonify(status), 200
+
+
+@main.route('/upload/chunked/<upload_id>', methods=['GET'])
+@token_required
+def chunked_upload_status(upload_id):
+    """Received ranges, so a client can resume after a dropped connection."""
+    try:
+        return jsonify(upload_status(upload_id, owner=g.get('user'))), 200
+    except ChunkError as e:
+        return jsonify({'error': str(e)}), e.status
+
+
+@main.route('/upload/chunked/<upload_id>', methods=['DELETE'])
+@token_required
+def abort_chunked_upload(upload_id):
+    try:
+        abort_upload(upload_id, owner=g.get('user'))
+    except ChunkError as e:
+        return jsonify({'error': str(e)}), e.status
+    return jsonify({'message': 'Upload discarded'}), 200
+
+
+@main.route('/upload/chunked/<upload_id>/complete', methods=['POST'])
+@token_required
+def complete_chunked_upload(upload_id):
+    """
+    Finish a resumable upload. Without sheetName this answers like the first
+    /upload/ call (sheetNames + stagingToken); with it the sheet is imported
+    like the second one, optionally as a background job (async).
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        token, filename = complete_upload(upload_id, sha256=data.get('sha256'), owner=g.get('user'))
+    except ChunkError as e:
+        return jsonify({'error': str(e)}), e.status
+
+    staged = open_staged(token)
+    if staged is None:
+        return jsonify({'error': 'Assembled upload is no longer available, please upload the file again'}), 404
+
+    try:
+        sheetname = data.get('sheetName')
+        if not sheetname:
+            try:
+                sheet_names = get_sheet_names(staged)
+            except Exception as e:
+                print(f"Error getting sheet names: {str(e)}")
+                return jsonify({'error': f'Failed to get sheet names: {str(e)}'}), 500
+            return jsonify({'sheetNames': sheet_names, 'stagingToken': token}), 200
+
+        run_async = str(data.get('async', '')).lower() in ('1', 'true', 'yes')
+        return load_sheet_response(staged, sheetname, g.get('user'), token, token, run_async)
+    finally:
+        staged.close()
+
+
 
 
 # remove_duplicate Router
@@ -6,6 +6,11 @@ import jwt
 # Register blueprints
 from route.routes import main  # This should work now
 from helpers.change_datatype import CustomJSONEncoder
+from db.config import Database
+from db import session as db_session
+from helpers.working_table import recover_working_tables
+from helpers.table_metadata import init_metadata_table
+from helpers.upload_spool import SpoolingRequest, max_content_length
 
 
 def create_app():
@@ -13,6 +18,10 @@ def create_app():
     app.json_encoder = CustomJSONEncoder
     app.url_map.strict_slashes = False
     app.config['SECRET_KEY'] = 'ZfvEbWyeHoGbcNYYs-o'
+    # Large uploads go to disk while the request is parsed, and oversized
+    # bodies are refused from their Content-Length before being read.
+    app.request_class = SpoolingRequest
+    app.config['MAX_CONTENT_LENGTH'] = max_content_length()
     # CORS(app,
     #      supports_credentials=False,
     #      resources={r"/*": {"origins": "http://localhost:3000"}}
@@ -24,6 +33,15 @@ def create_app():
 
     warnings.simplefilter('ignore')
 
+    # Runs in each gunicorn worker after fork (no --preload), so every
+    # worker gets its own pre-warmed connection pool.
+    Database().warm_pool()
+    db_session.init_app(app)
+
+    init_metadata_table()
+    # Unlogged working copies come back empty after a database crash.
+    recover_working_tables()
+
     # app.register_blueprint(main, url_prefix='')
 
     return app
@@ -0,0 +1,53 @@
+import io
+import datetime
+
+import jwt
+import psycopg2
+import pytest
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+@pytest.fixture(scope="session")
+def raw_db():
+    """Autocommit connection to the DB_* database; tests using it are skipped without one."""
+    from db.config import DB_CONFIG
+    try:
+        conn = psycopg2.connect(**DB_CONFIG, connect_timeout=3)
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"PostgreSQL not reachable: {e}")
+    conn.autocommit = True
+    yield conn
+    conn.close()
+
+
+@pytest.fixture(scope="session")
+def app(raw_db):
+    from run import app
+    app.config['TESTING'] = True
+    app.config['DB_DEBUG_COUNTERS'] = True
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture(scope="session")
+def auth_headers(app):
+    token = jwt.encode({'user': 'pytest', 'exp': datetime.datetime.utcnow() + datetime.timedelta(hours=1)},
+                       app.config['SECRET_KEY'], algorithm='HS256')
+    return {'Authorization': f'Bearer {token}'}
+
+
+@pytest.fixture
+def uploaded_table(client, auth_headers):
+    """A small CSV ingested through /upload/; yields the base table name."""
+    lines = ['name,qty,price'] + [f'n{i % 5},{i},{i * 1.5}' for i in range(50)]
+    body = ('\n'.join(lines) + '\n').encode()
+    response = client.post('/upload/', data={'file': (io.BytesIO(body), 'pytest.csv'), 'sheetName': 'csv_import'}, headers=auth_headers)
+    assert response.status_code == 200, response.get_json()
+    yield 'pytest_csv_import'
+    client.post('/logout', json={'tableName': 'pytest_csv_import', 'sheetName': 'x'}, headers=auth_headers)
@@ -0,0 +1,38 @@
+import time
+
+from db.catalog import SchemaCatalog
+
+
+def test_missing_table_is_not_cached(raw_db):
+    catalog = SchemaCatalog(ttl=300)
+    with raw_db.cursor() as cursor:
+        cursor.execute('DROP TABLE IF EXISTS pytest_catalog_late;')
+        assert catalog.describe(cursor, 'pytest_catalog_late') is None
+
+        cursor.execute('CREATE TABLE pytest_catalog_late (id INT, a INT);')
+        try:
+            assert catalog.describe(cursor, 'pytest_catalog_late').column_names() == ['id', 'a']
+        finally:
+            cursor.execute('DROP TABLE pytest_catalog_late;')
+
+
+def test_notified_invalidation_drops_entry(raw_db):
+    catalog = SchemaCatalog(ttl=300)
+    with raw_db.cursor() as cursor:
+        cursor.execute('DROP TABLE IF EXISTS pytest_catalog_renamed;')
+        cursor.execute('CREATE TABLE pytest_catalog_renamed (id INT, a INT);')
+        try:
+            assert catalog.describe(cursor, 'pytest_catalog_renamed').column_names() == ['id', 'a']
+
+            # DDL and NOTIFY from another worker's connection
+            cursor.execute('ALTER TABLE pytest_catalog_renamed RENAME COLUMN a TO b;')
+            cursor.execute("SELECT pg_notify('schema_catalog', 'pytest_catalog_renamed');")
+
+            # Delivery is asynchronous; allow it a moment to arrive.
+            deadline = time.monotonic() + 2
+            while (catalog.describe(cursor, 'pytest_catalog_renamed').column_names() != ['id', 'b']
+                   and time.monotonic() < deadline):
+                time.sleep(0.05)
+            assert catalog.describe(cursor, 'pytest_catalog_renamed').column_names() == ['id', 'b']
+        finally:
+            cursor.execute('DROP TABLE pytest_catalog_renamed;')
@@ -0,0 +1,54 @@
+import hashlib
+import io
+
+import pytest
+
+from helpers import chunked_upload, upload_staging
+from helpers.chunked_upload import ChunkError, complete_upload, initiate_upload, upload_status, write_chunk
+
+BODY = b'name,qty\n' + b''.join(f'n{i},{i}\n'.encode() for i in range(100))
+
+
+@pytest.fixture(autouse=True)
+def upload_dirs(tmp_path, monkeypatch):
+    monkeypatch.setattr(chunked_upload, 'CHUNKED_DIR', str(tmp_path / 'chunked'))
+    monkeypatch.setattr(upload_staging, 'STAGING_DIR', str(tmp_path))
+
+
+def _sha(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _send(upload_id, start, end, body, sha256=None):
+    return write_chunk(upload_id, start, end, len(BODY), io.BytesIO(body), sha256=sha256)
+
+
+def test_bad_resend_keeps_received_bytes():
+    status, error = initiate_upload('pytest.csv', len(BODY))
+    assert error is None
+    upload_id = status['uploadId']
+    half = len(BODY) // 2
+    _send(upload_id, 0, half, BODY[:half])
+    _send(upload_id, half, len(BODY), BODY[half:])
+
+    corrupt = b'x' * half
+    with pytest.raises(ChunkError):
+        _send(upload_id, 0, half, corrupt, sha256=_sha(BODY[:half]))
+    with pytest.raises(ChunkError):
+        _send(upload_id, 0, half, BODY[:half // 2])
+
+    token, _ = complete_upload(upload_id)
+    assert token == _sha(BODY)
+
+
+def test_bad_new_chunk_is_not_received():
+    status, _ = initiate_upload('pytest.csv', len(BODY))
+    upload_id = status['uploadId']
+
+    with pytest.raises(ChunkError):
+        _send(upload_id, 0, len(BODY), BODY[:10])
+    assert upload_status(upload_id)['bytesReceived'] == 0
+
+    with pytest.raises(ChunkError) as refused:
+        complete_upload(upload_id)
+    assert refused.value.status == 409
@@ -0,0 +1,33 @@
+import io
+
+import pytest
+
+CONNECTIONS_HEADER = 'X-DB-Connections-Opened'
+
+
+@pytest.mark.parametrize('method, path, args', [
+    ('get', '/data', {'Filename': 'pytest_csv_import_copy', 'sheetName': 'x', 'page': 0, 'pageSize': 10}),
+    ('get', '/updated_display', {'Filename': 'pytest_csv_import', 'page': 0, 'pageSize': 10}),
+    ('get', '/stats', {'Filename': 'pytest_csv_import', 'sheet_name': 'x'}),
+    ('get', '/updated_statistics', {'Filename': 'pytest_csv_import'}),
+    ('get', '/updated_overview', {'Filename': 'pytest_csv_import'}),
+    ('post', '/filtering', {'table_name': 'pytest', 'sheet_name': 'csv_import',
+                            'filters': {'qty': {'operator': '>', 'value': 10}}}),
+])
+def test_one_connection_per_request(client, auth_headers, uploaded_table, method, path, args):
+    if method == 'get':
+        response = client.get(path, query_string=args, headers=auth_headers)
+    else:
+        response = client.post(path, json=args, headers=auth_headers)
+
+    assert response.status_code == 200, response.get_json()
+    assert response.headers[CONNECTIONS_HEADER] == '1'
+
+
+def test_upload_uses_one_connection(client, auth_headers, uploaded_table):
+    body = b'name,qty\na,1\nb,2\n'
+    response = client.post('/upload/', data={'file': (io.BytesIO(body), 'pytest.csv'),
+                                             'sheetName': 'csv_import'}, headers=auth_headers)
+
+    assert response.status_code == 200, response.get_json()
+    assert response.headers[CONNECTIONS_HEADER] == '1'
@@ -0,0 +1,41 @@
+import io
+
+import zstandard
+
+from helpers.delimited_ingest import infer_delimited_types, is_delimited, sample_delimited
+
+
+def test_zero_padded_numbers_stay_text():
+    types = infer_delimited_types(['zip', 'qty', 'price'],
+                                  [['02134', '12', '007.5'], ['00501', '0', '1.25']])
+    assert types['zip'] == 'TEXT'
+    assert types['qty'] != 'TEXT'
+    assert types['price'] == 'TEXT'
+
+
+def test_single_letter_flags_stay_text():
+    types = infer_delimited_types(['grade', 'active'], [['F', 'yes'], ['F', 'no'], ['F', 'True']])
+    assert types['grade'] == 'TEXT'
+    assert types['active'] == 'BOOLEAN'
+
+
+def test_mixed_bool_words_and_letters_stay_text():
+    types = infer_delimited_types(['flag'], [['yes'], ['n']])
+    assert types['flag'] == 'TEXT'
+
+
+def test_zst_upload_is_loaded(client, auth_headers, raw_db):
+    body = zstandard.ZstdCompressor().compress(b'name,qty\na,1\nb,2\nc,3\n')
+    assert is_delimited('pytest.csv.zst')
+    assert sample_delimited(io.BytesIO(body), 'pytest.csv.zst') == (['name', 'qty'], [['a', '1'], ['b', '2'], ['c', '3']])
+
+    response = client.post('/upload/', data={'file': (io.BytesIO(body), 'pytest.csv.zst'), 'sheetName': 'csv_import'},
+                           headers=auth_headers)
+    try:
+        assert response.status_code == 200, response.get_json()
+        with raw_db.cursor() as cursor:
+            # The table is named after the file name without its last suffix.
+            cursor.execute('SELECT name, qty FROM "pytest_csv_csv_import" ORDER BY id;')
+            assert cursor.fetchall() == [('a', 1), ('b', 2), ('c', 3)]
+    finally:
+        client.post('/logout', json={'tableName': 'pytest_csv_csv_import', 'sheetName': 'x'}, headers=auth_headers)
@@ -0,0 +1,38 @@
+import io
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+TABLE = 'pytest_export_numeric_copy'
+
+
+@pytest.fixture
+def numeric_table(raw_db):
+    with raw_db.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS "{TABLE}";')
+        cursor.execute(f'CREATE TABLE "{TABLE}" (id SERIAL PRIMARY KEY, wide NUMERIC, price NUMERIC, qty INTEGER);')
+        cursor.execute(f'INSERT INTO "{TABLE}" (wide, price, qty) VALUES '
+                       "(12345678901234567891, 0.1, 1), (-98765432109876543210, 1234567.891, 2), (NULL, NULL, 3);")
+    yield TABLE
+    with raw_db.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS "{TABLE}";')
+
+
+def test_numeric_is_exported_exactly(client, auth_headers, numeric_table):
+    response = client.get('/export/arrow', query_string={'Filename': numeric_table}, headers=auth_headers)
+
+    assert response.status_code == 200
+    table = pa.ipc.open_stream(io.BytesIO(response.data)).read_all()
+    assert table.schema.field('wide').type == pa.string()
+    assert table.column('wide').to_pylist() == ['12345678901234567891', '-98765432109876543210', None]
+    assert table.column('price').to_pylist() == ['0.1', '1234567.891', None]
+    assert table.column('qty').to_pylist() == [1, 2, 3]
+
+
+def test_parquet_export_keeps_numeric_digits(client, auth_headers, numeric_table):
+    response = client.get('/export/parquet', query_string={'Filename': numeric_table}, headers=auth_headers)
+
+    assert response.status_code == 200
+    table = pq.read_table(io.BytesIO(response.data))
+    assert table.column('wide').to_pylist()[0] == '12345678901234567891'
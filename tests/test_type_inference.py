@@ -0,0 +1,103 @@
+import datetime
+
+import pandas as pd
+import pytest
+
+from helpers.type_inference import infer_frame, widen_sql_type
+
+
+def infer(**columns):
+    df, types = infer_frame(pd.DataFrame(columns))
+    return df, {col: column_type.sql_type for col, column_type in types.items()}
+
+
+@pytest.mark.parametrize('name', ['monthly_revenue', 'lifetime_value', 'update_count', 'days_open', 'year_total'])
+def test_date_words_inside_a_name_do_not_make_serials(name):
+    df, types = infer(**{name: [25000, 30000.5]})
+    assert types[name] == 'DOUBLE PRECISION'
+    assert df[name].tolist() == [25000, 30000.5]
+
+
+@pytest.mark.parametrize('name', ['date', 'Date', 'birth date', 'DOB'])
+def test_serials_in_a_date_named_column(name):
+    df, types = infer(**{name: [45000, 45001]})
+    assert types[name] == 'DATE'
+    assert df[name].iloc[0] == pd.Timestamp(2023, 3, 15)
+
+
+def test_serials_outside_the_plausible_range_stay_numbers():
+    _, types = infer(date=[1, 2, 3])
+    assert types['date'] == 'SMALLINT'
+
+
+def test_leading_zeros_stay_text():
+    df, types = infer(zip=['02134', '00501'], amount=['007.50', '1.25'])
+    assert types == {'zip': 'TEXT', 'amount': 'TEXT'}
+    assert df['zip'].tolist() == ['02134', '00501']
+
+
+def test_zero_and_signed_numbers_are_numbers():
+    df, types = infer(n=['0', '-12', '+3'], x=['0.5', '-0.25', '1,234.5'])
+    assert types == {'n': 'SMALLINT', 'x': 'DOUBLE PRECISION'}
+    assert df['n'].tolist() == [0, -12, 3]
+    assert df['x'].tolist() == [0.5, -0.25, 1234.5]
+
+
+def test_integer_widths():
+    _, types = infer(small=['1', '2'], medium=['40000', '1'], large=['3000000000', '1'],
+                     huge=['12345678901234567891', '1'])
+    assert types == {'small': 'SMALLINT', 'medium': 'INTEGER', 'large': 'BIGINT', 'huge': 'NUMERIC'}
+
+
+def test_single_letters_alone_are_not_booleans():
+    _, types = infer(grade=['F', 'F', 'F'], answer=['y', 'n', 'Y'])
+    assert types == {'grade': 'TEXT', 'answer': 'TEXT'}
+
+
+def test_boolean_words_with_letters():
+    df, types = infer(flag=['yes', 'n', 'Y', None])
+    assert types['flag'] == 'BOOLEAN'
+    assert df['flag'].tolist()[:3] == [True, False, True]
+
+
+def test_percent_currency_and_null_tokens():
+    df, types = infer(rate=['50%', '12.5 %', 'n/a'], price=['$1,200.50', '($3.00)', '-'])
+    assert types == {'rate': 'DOUBLE PRECISION', 'price': 'NUMERIC'}
+    assert df['rate'].tolist()[:2] == [0.5, 0.125]
+    assert df['price'].tolist()[:2] == ['1200.50', '-3.00']
+
+
+def test_text_dates_and_timestamps():
+    df, types = infer(day=['2024-01-02', '2024-02-03'], at=['2024-01-02 10:30', '2024-01-03 00:00'])
+    assert types == {'day': 'DATE', 'at': 'TIMESTAMP'}
+    assert df['at'].iloc[0] == pd.Timestamp(datetime.datetime(2024, 1, 2, 10, 30))
+
+
+def test_value_outside_the_sample_reinfers_the_column():
+    values = ['1'] * 3000 + ['oops'] + ['2'] * 3000
+    df, types = infer(n=values)
+    assert types['n'] == 'TEXT'
+    assert df['n'].iloc[3000] == 'oops'
+
+
+def test_empty_column():
+    _, types = infer(blank=[None, None, ''])
+    assert types['blank'] == 'TEXT'
+
+
+@pytest.mark.parametrize('current, incoming, expected', [
+    ('SMALLINT', 'SMALLINT', 'SMALLINT'),
+    ('SMALLINT', 'BIGINT', 'BIGINT'),
+    ('INTEGER', 'SMALLINT', 'INTEGER'),
+    ('BIGINT', 'NUMERIC', 'NUMERIC'),
+    ('INTEGER', 'DOUBLE PRECISION', 'DOUBLE PRECISION'),
+    ('DOUBLE PRECISION', 'NUMERIC', 'NUMERIC'),
+    ('NUMERIC', 'DOUBLE PRECISION', 'NUMERIC'),
+    ('DATE', 'TIMESTAMP', 'TIMESTAMP'),
+    ('TIMESTAMP', 'DATE', 'TIMESTAMP'),
+    ('BOOLEAN', 'SMALLINT', 'TEXT'),
+    ('DATE', 'INTEGER', 'TEXT'),
+    ('TEXT', 'BIGINT', 'TEXT'),
+])
+def test_widen_sql_type(current, incoming, expected):
+    assert widen_sql_type(current, incoming) == expected
@@ -0,0 +1,92 @@
+from decimal import Decimal
+
+from helpers.upload_insert_data import stream_chunks_into_table
+
+HEADER = ['rate', 'flag', 'n']
+FIRST = [['50%', 'yes', 1], ['12.5%', 'n', 2]]
+SECOND = [['unknown', 'maybe', 'x'], ['7', 'no', 3]]
+
+
+def test_widening_to_text_keeps_values_as_read(raw_db):
+    chunks = [(HEADER, FIRST), (HEADER, SECOND)]
+    with raw_db.cursor() as cursor:
+        cursor.execute('BEGIN;')
+        try:
+            rows = stream_chunks_into_table(cursor, iter(chunks), 'Sheet1', 'pytest_widen',
+                                            reread=lambda: iter(chunks))
+            cursor.execute('SELECT rate, flag, n FROM pytest_widen ORDER BY id;')
+            stored = cursor.fetchall()
+        finally:
+            cursor.execute('ROLLBACK;')
+
+    assert rows == 4
+    assert stored == [('50%', 'yes', '1'), ('12.5%', 'n', '2'), ('unknown', 'maybe', 'x'), ('7', 'no', '3')]
+
+
+def test_widening_between_numbers_converts_in_place(raw_db):
+    chunks = [(['n'], [[1], [2]]), (['n'], [[3000000000], [2.5]])]
+    with raw_db.cursor() as cursor:
+        cursor.execute('BEGIN;')
+        try:
+            stream_chunks_into_table(cursor, iter(chunks), 'Sheet1', 'pytest_widen', reread=lambda: iter(chunks))
+            cursor.execute("SELECT data_type FROM information_schema.columns "
+                           "WHERE table_name = 'pytest_widen' AND column_name = 'n';")
+            data_type = cursor.fetchone()[0]
+            cursor.execute('SELECT n FROM pytest_widen ORDER BY id;')
+            stored = [row[0] for row in cursor.fetchall()]
+        finally:
+            cursor.execute('ROLLBACK;')
+
+    assert data_type == 'double precision'
+    assert stored == [1, 2, 3000000000, 2.5]
+
+
+def test_wide_integers_stay_exact_next_to_floats(raw_db):
+    chunks = [(['n'], [['12345678901234567891'], ['2']]), (['n'], [[2.5], [3]])]
+    with raw_db.cursor() as cursor:
+        cursor.execute('BEGIN;')
+        try:
+            stream_chunks_into_table(cursor, iter(chunks), 'Sheet1', 'pytest_widen', reread=lambda: iter(chunks))
+            cursor.execute("SELECT data_type FROM information_schema.columns "
+                           "WHERE table_name = 'pytest_widen' AND column_name = 'n';")
+            data_type = cursor.fetchone()[0]
+            cursor.execute('SELECT n FROM pytest_widen ORDER BY id;')
+            stored = [row[0] for row in cursor.fetchall()]
+        finally:
+            cursor.execute('ROLLBACK;')
+
+    assert data_type == 'numeric'
+    assert stored == [Decimal('12345678901234567891'), 2, Decimal('2.5'), 3]
+
+
+def test_sheet_tasks_respect_max_workers(monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+    import threading
+    import time
+
+    from helpers import upload_insert_data
+
+    lock = threading.Lock()
+    running = []
+    peak = []
+
+    def fake_task(path, index_path, sheet, *rest):
+        with lock:
+            running.append(sheet)
+            peak.append(len(running))
+        time.sleep(0.05)
+        with lock:
+            running.remove(sheet)
+        return {'sheetName': sheet, 'success': True}
+
+    pool = ThreadPoolExecutor(max_workers=4)
+    monkeypatch.setattr(upload_insert_data, '_get_sheet_pool', lambda: pool)
+    monkeypatch.setattr(upload_insert_data, '_ingest_sheet_task', fake_task)
+    try:
+        tasks = [(f's{i}', f't{i}', f't{i}_copy', None, None) for i in range(6)]
+        results = upload_insert_data._run_sheet_tasks('book.xlsx', {}, tasks, workers=2)
+    finally:
+        pool.shutdown()
+
+    assert sorted(results) == [f's{i}' for i in range(6)]
+    assert max(peak) == 2
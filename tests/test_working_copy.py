@@ -0,0 +1,84 @@
+import threading
+import time
+
+COPY_TABLE = 'pytest_csv_import_copy'
+
+_CONFLICTS_QUERY = """
+    SELECT l.mode, l.granted
+    FROM pg_catalog.pg_locks l
+    WHERE l.relation = to_regclass(%s)
+      AND (NOT l.granted OR l.mode = 'AccessExclusiveLock');
+"""
+
+
+def _filter(client, auth_headers, filters):
+    return client.post('/filtering', json={'table_name': 'pytest', 'sheet_name': 'csv_import',
+                                           'filters': filters}, headers=auth_headers)
+
+
+def _ids(raw_db):
+    with raw_db.cursor() as cursor:
+        cursor.execute(f'SELECT id FROM "{COPY_TABLE}" ORDER BY id;')
+        return [row[0] for row in cursor.fetchall()]
+
+
+def test_filter_keeps_row_key_out_of_response(client, auth_headers, uploaded_table, raw_db):
+    response = _filter(client, auth_headers, {'qty': {'operator': '>', 'value': 44}})
+
+    assert response.status_code == 200, response.get_json()
+    rows = response.get_json()['filtered_data']
+    assert [row['qty'] for row in rows] == [45, 46, 47, 48, 49]
+    assert all(set(row) == {'name', 'qty', 'price'} for row in rows)
+    # The filtered copy keeps the original row keys.
+    assert _ids(raw_db) == [46, 47, 48, 49, 50]
+
+
+def test_fill_keeps_row_keys(client, auth_headers, uploaded_table, raw_db):
+    with raw_db.cursor() as cursor:
+        cursor.execute('UPDATE "pytest_csv_import" SET qty = NULL WHERE qty < 5;')
+
+    response = client.post('/handle/fill', json={'table_name': 'pytest_csv_import', 'columns': ['qty'],
+                                                 'action': 'remove'}, headers=auth_headers)
+
+    assert response.status_code == 200, response.get_json()
+    assert response.get_json()['rows_remaining'] == 45
+    assert _ids(raw_db) == list(range(6, 51))
+    with raw_db.cursor() as cursor:
+        cursor.execute('SELECT column_name FROM information_schema.columns WHERE table_name = %s;', (COPY_TABLE,))
+        assert sorted(row[0] for row in cursor.fetchall()) == ['id', 'name', 'price', 'qty']
+
+
+def test_parallel_reads_take_no_conflicting_locks(app, auth_headers, uploaded_table, raw_db):
+    # A filter materializes the copy as a table that keeps its id column.
+    assert _filter(app.test_client(), auth_headers, {'qty': {'operator': '>', 'value': 0}}).status_code == 200
+
+    requests = [
+        ('/data', {'Filename': COPY_TABLE, 'sheetName': 'x', 'page': 0, 'pageSize': 10}),
+        ('/stats', {'Filename': COPY_TABLE, 'sheet_name': 'x'}),
+    ]
+    stop = threading.Event()
+    statuses = []
+    conflicts = []
+
+    def reader(path, args):
+        client = app.test_client()
+        while not stop.is_set():
+            statuses.append(client.get(path, query_string=args, headers=auth_headers).status_code)
+
+    threads = [threading.Thread(target=reader, args=request) for request in requests for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    try:
+        deadline = time.monotonic() + 2.0
+        with raw_db.cursor() as cursor:
+            while time.monotonic() < deadline:
+                cursor.execute(_CONFLICTS_QUERY, (f'"{COPY_TABLE}"',))
+                conflicts.extend(cursor.fetchall())
+                time.sleep(0.005)
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+    assert statuses and set(statuses) == {200}
+    assert conflicts == []